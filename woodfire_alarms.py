@@ -0,0 +1,182 @@
+"""Kiln-master-defined alarms, evaluated as each sample arrives.
+
+Alarms are thresholds the kiln master sets for a kiln - stack above X, front
+to back spread above Y, climb rate below Z °F/hr for N minutes, no stoke in M
+minutes. ``AlarmMonitor`` listens to the store's appends, so entries from any
+session (or the phone ingest) are checked once, against a few numbers of
+rolling state per firing rather than a rescan of the log. A background tick
+catches the alarms that fire on silence (no stoke logged). Alarms only
+notify; what to do about them is the kiln master's call.
+"""
+import threading
+from collections import deque
+from datetime import datetime
+
+from woodfire_derived import smoothed_rate
+from woodfire_store import to_epoch
+
+ALARM_KINDS = {
+    "stack_above": "Stack above {threshold:.0f}°F",
+    "spread_above": "Front-to-back spread above {threshold:.0f}°F",
+    "climb_below": "Climb below {threshold:.0f}°F/hr for {minutes:.0f} min",
+    "no_stoke": "No stoke logged in {minutes:.0f} min",
+}
+# Phases where a slow climb is expected and the climb alarm stays quiet
+NO_CLIMB_PHASES = ("cooling", "finished")
+TICK_SECONDS = 30
+# Samples older than this (imports, late syncs) are history, not something to alarm on
+STALE_HOURS = 6
+MAX_EVENTS = 500
+
+
+def describe(alarm):
+    return ALARM_KINDS[alarm["kind"]].format(threshold=alarm["threshold"] or 0, minutes=alarm["minutes"] or 0)
+
+
+def _number(value):
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _FiringState:
+    """Rolling state for one firing: O(1) whatever the log length."""
+    __slots__ = ("last_t", "last_front", "rate", "last_stoke", "below_since", "active")
+
+    def __init__(self, last_stoke=None):
+        self.last_t = None
+        self.last_front = None
+        self.rate = None  # smoothed °F/hr
+        self.last_stoke = last_stoke
+        self.below_since = {}  # climb alarm id -> when the rate dropped below it
+        self.active = set()  # alarm ids currently firing
+
+
+class AlarmMonitor(threading.Thread):
+    """Evaluates every kiln's alarms and keeps a shared feed of alarm events."""
+
+    def __init__(self, store, tick_seconds=TICK_SECONDS):
+        super().__init__(name="alarm-monitor", daemon=True)
+        self.store = store
+        self.tick_seconds = tick_seconds
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.seq = 0
+        self._states = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        store.add_listener(self.on_append)
+
+    def _state(self, kiln, firing_id):
+        key = (kiln, firing_id)
+        if key not in self._states:
+            # Picking up a firing already under way (e.g. after a restart)
+            last_stoke = self.store.last_stoke_time(kiln, firing_id)
+            self._states[key] = _FiringState(to_epoch(last_stoke) if last_stoke else None)
+        return self._states[key]
+
+    def on_append(self, kind, rows):
+        stale = to_epoch(datetime.now()) - STALE_HOURS * 3600
+        with self._lock:
+            if kind == "deleted":
+                for row in rows:
+                    self._states.pop((row["kiln"], row["firing_id"]), None)
+                return
+            for row in rows:
+                if not row.get("time") or to_epoch(row["time"]) < stale:
+                    continue
+                alarms = self.store.alarms(row["kiln"])
+                if alarms:
+                    self._observe(row["kiln"], row["firing_id"], alarms, kind, row)
+
+    def _observe(self, kiln, firing_id, alarms, kind, row):
+        state = self._state(kiln, firing_id)
+        t = to_epoch(row["time"])
+        if kind == "wood" or row.get("entry_type") == "stoke":
+            state.last_stoke = max(state.last_stoke or t, t)
+        if kind == "entries":
+            front = _number(row.get("temp_front"))
+            if front is not None:
+                state.rate = smoothed_rate(state.rate, state.last_t, state.last_front, t, front)
+                if state.last_t is None or t >= state.last_t:
+                    state.last_t, state.last_front = t, front
+        self._evaluate(kiln, firing_id, state, alarms, t, row if kind == "entries" else {})
+
+    def _evaluate(self, kiln, firing_id, state, alarms, t, row):
+        for alarm in alarms:
+            kind, limit = alarm["kind"], alarm["threshold"]
+            value = active = None  # None: this sample says nothing about the alarm
+            if kind == "stack_above":
+                value = _number(row.get("temp_stack"))
+                active = None if value is None else value > limit
+            elif kind == "spread_above":
+                front, back = _number(row.get("temp_front")), _number(row.get("temp_back"))
+                if front is not None and back is not None:
+                    value = abs(front - back)
+                    active = value > limit
+            elif kind == "climb_below" and row:
+                if row.get("phase") in NO_CLIMB_PHASES or state.rate is None:
+                    state.below_since.pop(alarm["id"], None)
+                    active = False
+                elif state.rate < limit:
+                    since = state.below_since.setdefault(alarm["id"], t)
+                    value, active = state.rate, t - since >= (alarm["minutes"] or 0) * 60
+                else:
+                    state.below_since.pop(alarm["id"], None)
+                    active = False
+            elif kind == "no_stoke":
+                since = state.last_stoke if state.last_stoke is not None else state.last_t
+                if since is not None:
+                    value = (t - since) / 60
+                    active = value >= (alarm["minutes"] or 0)
+            if active is not None:
+                self._set(kiln, firing_id, state, alarm, active, t, value)
+
+    def _set(self, kiln, firing_id, state, alarm, active, t, value):
+        # Fire once when the condition starts; re-arm when it clears
+        if not active:
+            state.active.discard(alarm["id"])
+        elif alarm["id"] not in state.active:
+            state.active.add(alarm["id"])
+            self.seq += 1
+            self.events.append({
+                "seq": self.seq, "kiln": kiln, "firing_id": firing_id, "alarm_id": alarm["id"],
+                "message": describe(alarm), "value": value,
+                "at": datetime.now().strftime("%H:%M"),
+            })
+
+    def tick(self, now=None):
+        """Re-check every tracked live firing at ``now`` for alarms that fire on silence."""
+        t = to_epoch(now or datetime.now())
+        with self._lock:
+            for (kiln, firing_id), state in list(self._states.items()):
+                if state.last_t is None or t - state.last_t > STALE_HOURS * 3600:
+                    continue
+                alarms = [a for a in self.store.alarms(kiln) if a["kind"] == "no_stoke"]
+                self._evaluate(kiln, firing_id, state, alarms, t, {})
+
+    def events_since(self, seq, kiln=None):
+        with self._lock:
+            return [e for e in self.events if e["seq"] > seq and (kiln is None or e["kiln"] == kiln)]
+
+    def active(self, kiln, firing_id):
+        """Alarm ids currently firing for the firing."""
+        with self._lock:
+            state = self._states.get((kiln, firing_id))
+            return set(state.active) if state else set()
+
+    def forget(self, alarm_id):
+        with self._lock:
+            for state in self._states.values():
+                state.active.discard(alarm_id)
+                state.below_since.pop(alarm_id, None)
+
+    def run(self):
+        while not self._stopped.wait(self.tick_seconds):
+            try:
+                self.tick()
+            except Exception:
+                pass  # keep ticking; one bad check shouldn't silence every alarm
+
+    def stop(self):
+        self._stopped.set()
@@ -0,0 +1,58 @@
+"""Analytics across the whole historical archive.
+
+The per-firing numbers come out of ``FiringStore`` already grouped (catalog
+rows, phase segments, atmosphere counts per firing), so a dashboard over hundreds
+of firings is a few SQL queries plus vectorized pandas on the results, never a
+loop over each firing's log.
+"""
+import pandas as pd
+
+from woodfire_schema import ATMOSPHERES, PHASES
+
+STATS_COLUMNS = ["kiln", "firing_id", "start_time", "duration_hours", "peak_temp", "wood_pieces", "entry_count"]
+
+
+def _ordered(columns, known):
+    # Known categories in their natural order, anything from old imports after
+    return [c for c in known if c in columns] + sorted(c for c in columns if c not in known)
+
+
+def archive_analytics(store, kiln=None, start=None, end=None):
+    """DataFrames for the archive dashboard, filtered by kiln(s) and firing start time.
+
+    Returns ``{"firings", "phases", "phase_gain", "atmosphere"}``: one row per
+    firing, the firing x phase tables of hours and °F gained (read from the
+    phase segments), and each firing's share of entries per atmosphere.
+    """
+    firings = pd.DataFrame(store.archive_stats(kiln, start, end), columns=STATS_COLUMNS)
+    firings["start_time"] = pd.to_datetime(firings["start_time"])
+    firings["wood_per_hour"] = firings["wood_pieces"] / firings["duration_hours"].where(firings["duration_hours"] > 0)
+
+    segments = pd.DataFrame(store.archive_phase_segments(kiln, start, end),
+                            columns=["kiln", "firing_id", "phase", "hours", "temp_gained", "wood_pieces", "entries"])
+    phases = segments.pivot_table(index=["kiln", "firing_id"], columns="phase", values="hours",
+                                  aggfunc="sum", fill_value=0)
+    phases = phases[_ordered(phases.columns, PHASES)]
+    phase_gain = segments.pivot_table(index=["kiln", "firing_id"], columns="phase", values="temp_gained",
+                                      aggfunc="sum")
+    phase_gain = phase_gain[_ordered(phase_gain.columns, PHASES)]
+
+    counts = pd.DataFrame(store.archive_atmosphere_counts(kiln, start, end),
+                          columns=["kiln", "firing_id", "atmosphere", "entries"])
+    atmosphere = counts.pivot_table(index=["kiln", "firing_id"], columns="atmosphere", values="entries",
+                                    aggfunc="sum", fill_value=0)
+    atmosphere = atmosphere[_ordered(atmosphere.columns, ATMOSPHERES)]
+    atmosphere = atmosphere.div(atmosphere.sum(axis=1), axis=0)
+    return {"firings": firings, "phases": phases, "phase_gain": phase_gain, "atmosphere": atmosphere}
+
+
+def distribution(values, bins=10):
+    """Histogram of a numeric column as counts indexed by each bin's lower edge, for ``st.bar_chart``."""
+    values = pd.Series(values).dropna()
+    if values.empty:
+        return pd.Series(dtype=int)
+    if values.nunique() == 1:
+        return pd.Series([len(values)], index=[values.iloc[0]])
+    counts = pd.cut(values, bins=min(bins, values.nunique())).value_counts(sort=False)
+    counts.index = [round(interval.left, 1) for interval in counts.index]
+    return counts
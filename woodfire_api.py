@@ -0,0 +1,437 @@
+"""Lightweight HTTP ingest for Mobile Mode, plus a read-only JSON API.
+
+Quick log entries don't need a full Streamlit rerun (weather, sidebar stats,
+every tab). This server takes them as JSON and writes straight to the shared
+``FiringStore``. ``GET /`` serves a small quick-log page that queues entries in
+the phone's localStorage and flushes them in batches to ``POST /entries``
+whenever the connection comes back, so nothing is lost when Wi-Fi drops near
+the kiln shed.
+
+``GET /api/...`` serves firings, log entries, the wood log, cone state and
+summaries for a shop dashboard (see ``api_response``). Every response carries
+an ETag built from the firing's version counter, checked before anything is
+queried, so polling an unchanged firing every few seconds is one indexed
+lookup and a bodiless 304.
+
+Run it standalone with ``python woodfire_api.py`` or let the Streamlit app
+start it in a background thread. It only listens on this machine unless
+``WOODFIREPRO_INGEST_HOST`` (or ``--host``) says otherwise, e.g. ``0.0.0.0``
+for phones on the shop Wi-Fi; then every request for data needs the
+server's token (``WOODFIREPRO_INGEST_TOKEN``, or a random one per start) as
+``?token=`` or ``Authorization: Bearer``. The quick-log link carries it.
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from woodfire_field import cones_as_of
+from woodfire_schema import MOBILE_ATMOSPHERES, PHASES
+from woodfire_store import DEFAULT_DB_PATH, TIME_FORMAT, FiringStore
+
+DEFAULT_INGEST_HOST = os.environ.get("WOODFIREPRO_INGEST_HOST", "127.0.0.1")
+DEFAULT_INGEST_PORT = int(os.environ.get("WOODFIREPRO_INGEST_PORT", 8502))
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+MAX_BODY_BYTES = 1 << 20
+PAGE_SIZE, MAX_PAGE_SIZE = 100, 1000
+
+
+def mobile_entry(kiln, firing_id, logged_by, phase, temp_front, atmosphere,
+                 action_taken="", notes="", time=None, client_id=None):
+    """A log entry in the Mobile Mode quick-log shape.
+
+    Only the front spy is read on a quick entry; the other temperatures and
+    the damper and air settings are left empty rather than guessed.
+    """
+    entry = {
+        "kiln": kiln,
+        "firing_id": firing_id,
+        "time": time or datetime.now().strftime(TIME_FORMAT),
+        "logged_by": logged_by,
+        "phase": phase,
+        "entry_type": "mobile_quick",
+        "temp_front": temp_front,
+        "temp_middle": None,
+        "temp_back": None,
+        "temp_stack": None,
+        "atmosphere": atmosphere,
+        "damper_position": None,
+        "air_intake": None,
+        "fuel_type": "wood_only",
+        "action_taken": action_taken,
+        "notes": notes
+    }
+    if client_id:
+        entry["client_id"] = str(client_id)
+    return entry
+
+
+def parse_entry(item):
+    """Validate one JSON quick-log entry and build the log entry; raises ValueError."""
+    if not isinstance(item, dict):
+        raise ValueError("entry must be a JSON object")
+    missing = [k for k in ("kiln", "firing_id", "temp_front") if item.get(k) in (None, "")]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    try:
+        temp_front = float(item["temp_front"])
+    except (TypeError, ValueError):
+        raise ValueError("temp_front must be a number")
+    if temp_front.is_integer():
+        temp_front = int(temp_front)
+    phase = item.get("phase") or "heating"
+    if phase not in PHASES:
+        raise ValueError(f"unknown phase {phase!r}")
+    time = item.get("time")
+    if time is not None:
+        try:
+            datetime.strptime(time, TIME_FORMAT)
+        except (TypeError, ValueError):
+            raise ValueError(f"time must look like {datetime(2025, 1, 1).strftime(TIME_FORMAT)}")
+    return mobile_entry(
+        str(item["kiln"]), str(item["firing_id"]), item.get("logged_by") or "Unknown", phase,
+        temp_front, item.get("atmosphere") or "neutral",
+        item.get("action_taken", ""), item.get("notes", ""), time, item.get("client_id"))
+
+
+def ingest(store, payload):
+    """Store a single entry, a list, or ``{"entries": [...]}``.
+
+    Valid entries are written in one transaction even if others in the batch
+    are rejected, so one bad queued entry can't block the rest of a phone's
+    queue. ``stored`` lists the ``client_id`` of each one written or already
+    there; only those are safe to drop from the queue.
+    """
+    items = payload.get("entries", payload) if isinstance(payload, dict) else payload
+    if isinstance(items, dict):
+        items = [items]
+    if not isinstance(items, list):
+        raise ValueError("expected an entry, a list of entries or {\"entries\": [...]}")
+    entries, rejected = [], []
+    for index, item in enumerate(items):
+        try:
+            entries.append(parse_entry(item))
+        except ValueError as e:
+            rejected.append({"index": index, "error": str(e)})
+    # Every valid entry is stored by the time this returns, new or a retry; the phone drops these from its queue
+    stored = [entry["client_id"] for entry in entries if entry.get("client_id")]
+    ids, duplicates = store.append_entries(entries) if entries else ([], 0)
+    return {"accepted": len(ids), "ids": ids, "duplicates": duplicates, "rejected": rejected, "stored": stored}
+
+
+class NotFound(ValueError):
+    pass
+
+
+def _cursor(*key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def _uncursor(cursor, size):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        key = None
+    if not isinstance(key, list) or len(key) != size:
+        raise ValueError("bad cursor")
+    return key
+
+
+def _time_param(query, name):
+    value = query.get(name, [None])[0]
+    if value is not None:
+        try:
+            datetime.strptime(value, TIME_FORMAT)
+        except ValueError:
+            raise ValueError(f"{name} must look like {datetime(2025, 1, 1).strftime(TIME_FORMAT)}")
+    return value
+
+
+def _limit(query):
+    try:
+        limit = int(query.get("limit", [PAGE_SIZE])[0])
+    except ValueError:
+        raise ValueError("limit must be a number")
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _etag(*parts):
+    return '"' + hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()[:20] + '"'
+
+
+def api_response(store, target, if_none_match=None):
+    """``(etag, body)`` for a ``GET /api/...`` target; body is None when ``if_none_match`` still holds.
+
+    - ``/api/fleet``: each kiln's latest readings, phase and last stoke
+    - ``/api/firings?kiln=&status=``: every firing with its version
+    - ``/api/firings/<kiln>/<firing_id>``: summary and phase segments
+    - ``/api/firings/<kiln>/<firing_id>/entries?since=&until=&type=&limit=&cursor=``
+    - ``/api/firings/<kiln>/<firing_id>/wood?limit=&cursor=``
+    - ``/api/firings/<kiln>/<firing_id>/cones``: cone events and the state they add up to
+
+    Lists come a page at a time with a ``next_cursor`` (null on the last
+    page). Raises ``NotFound`` or ``ValueError`` (a bad request).
+    """
+    url = urlsplit(target)
+    parts = [unquote(p) for p in url.path.split("/")[2:] if p]
+    query = parse_qs(url.query)
+    def fresh(etag):
+        return not if_none_match or etag not in {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+
+    if parts in (["fleet"], ["firings"]):
+        # Cheap whole-store version: any write to any firing moves it
+        etag = _etag(target, store.data_version())
+        if not fresh(etag):
+            return etag, None
+        if parts == ["fleet"]:
+            return etag, {"kilns": store.fleet()}
+        return etag, {"firings": store.firings(query.get("kiln", [None])[0], query.get("status", [None])[0])}
+
+    if len(parts) not in (3, 4) or parts[0] != "firings":
+        raise NotFound(url.path)
+    kiln, firing_id, resource = parts[1], parts[2], parts[3] if len(parts) == 4 else None
+    version = store.firing_version(kiln, firing_id)
+    if not version:
+        raise NotFound(f"no firing {firing_id!r} for kiln {kiln!r}")
+    if resource == "cones":
+        # Cone events are saved beside the log, not counted in its version
+        events = store.attachment(kiln, firing_id, "cone_events", [])
+        etag = _etag(target, events)
+        if not fresh(etag):
+            return etag, None
+        state = [{"position": f"R{row+1}C{col+1}", "row": row, "col": col, "cones": cones}
+                 for (row, col), cones in sorted(cones_as_of(events, "9999").items()) if cones]
+        return etag, {"kiln": kiln, "firing_id": firing_id, "cones": state, "events": events}
+
+    etag = _etag(target, version)
+    if not fresh(etag):
+        return etag, None
+    body = {"kiln": kiln, "firing_id": firing_id, "version": version}
+    if resource is None:
+        body.update(summary=store.summary(kiln, firing_id), phase_segments=store.phase_segments(kiln, firing_id))
+    elif resource == "entries":
+        limit = _limit(query)
+        types = [t for value in query.get("type", []) for t in value.split(",") if t]
+        after = _uncursor(query["cursor"][0], 2) if "cursor" in query else None
+        entries = store.entry_page(kiln, firing_id, _time_param(query, "since"), _time_param(query, "until"),
+                                   types, after, limit)
+        body.update(entries=entries, next_cursor=(_cursor(entries[-1]["time"], entries[-1]["id"])
+                                                  if len(entries) == limit else None))
+    elif resource == "wood":
+        limit = _limit(query)
+        after = _uncursor(query["cursor"][0], 1)[0] if "cursor" in query else 0
+        wood = store.wood_entries(kiln, firing_id, after, limit)
+        body.update(wood=wood, next_cursor=_cursor(wood[-1]["id"]) if len(wood) == limit else None)
+    else:
+        raise NotFound(url.path)
+    return etag, body
+
+
+class IngestHandler(BaseHTTPRequestHandler):
+    server_version = "WoodFirePro"
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        data = body.encode("utf-8") if isinstance(body, str) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {"Cache-Control": "no-store"}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self):
+        token = self.server.token
+        if token is None:
+            return True
+        given = parse_qs(urlsplit(self.path).query).get("token", [""])[0]
+        bearer = self.headers.get("Authorization", "")
+        if bearer.startswith("Bearer "):
+            given = bearer[len("Bearer "):].strip()
+        return hmac.compare_digest(given.encode(), token.encode())
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/":
+            self._send(200, QUICK_LOG_PAGE, "text/html; charset=utf-8")  # just the form; it holds no data
+        elif path == "/health":
+            self._send(200, {"ok": True})
+        elif path.startswith("/api/"):
+            self._api()
+        else:
+            self._send(404, {"error": "not found"})
+
+    def _api(self):
+        # Readable from a dashboard on another origin (these routes only ever read);
+        # revalidated with the ETag on every poll
+        headers = {"Cache-Control": "no-cache", "Access-Control-Allow-Origin": "*",
+                   "Access-Control-Expose-Headers": "ETag"}
+        if not self._authorized():
+            return self._send(401, {"error": "missing or wrong token"}, headers=headers)
+        try:
+            etag, body = api_response(self.server.store, self.path, self.headers.get("If-None-Match"))
+        except NotFound as e:
+            return self._send(404, {"error": f"not found: {e}"}, headers=headers)
+        except ValueError as e:
+            return self._send(400, {"error": str(e)}, headers=headers)
+        headers["ETag"] = etag
+        if body is None:
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            return self.end_headers()
+        self._send(200, body, headers=headers)
+
+    def do_POST(self):
+        if self.path.split("?", 1)[0] != "/entries":
+            return self._send(404, {"error": "not found"})
+        if not self._authorized():
+            return self._send(401, {"error": "missing or wrong token"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            return self._send(413, {"error": "batch too large"})
+        try:
+            result = ingest(self.server.store, json.loads(self.rfile.read(length) or b"null"))
+        except ValueError as e:  # includes malformed JSON
+            return self._send(400, {"error": str(e)})
+        self._send(201 if result["accepted"] or result["duplicates"] else 400, result)
+
+    def log_message(self, format, *args):
+        pass  # one line per stoke is just noise in the Streamlit console
+
+
+class IngestServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, store, host=DEFAULT_INGEST_HOST, port=DEFAULT_INGEST_PORT, handler=IngestHandler, token=None):
+        super().__init__((host, port), handler)
+        self.store = store
+        # Anyone on the network could log or read firings, so off this machine it takes a token
+        self.token = token or os.environ.get("WOODFIREPRO_INGEST_TOKEN") or (
+            None if self.local else secrets.token_urlsafe(16))
+
+    @property
+    def local(self):
+        """Whether only this machine can reach the server."""
+        return self.server_address[0] in LOOPBACK_HOSTS
+
+
+def start_ingest_server(store, host=DEFAULT_INGEST_HOST, port=DEFAULT_INGEST_PORT):
+    """Serve in a daemon thread; returns None if the port is taken (e.g. a standalone server)."""
+    try:
+        server = IngestServer(store, host, port)
+    except OSError:
+        return None
+    threading.Thread(target=server.serve_forever, name="ingest-server", daemon=True).start()
+    return server
+
+
+QUICK_LOG_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1">
+<title>WoodFirePro Quick Log</title>
+<style>
+body{font-family:system-ui,sans-serif;margin:1em;max-width:32em}
+label{display:block;margin-top:.6em;font-weight:600}
+input,select,textarea,button{width:100%;font-size:1.1em;padding:.4em;box-sizing:border-box}
+button{margin-top:1em;background:#c0392b;color:#fff;border:0;border-radius:6px;padding:.7em}
+#status{margin-top:1em;padding:.5em;border-radius:6px;background:#eee}
+</style></head><body>
+<h2>🔥 Quick Log Entry</h2>
+<form id="f">
+<label>Kiln<input name="kiln" required></label>
+<label>Firing ID<input name="firing_id" required></label>
+<label>Your Name<input name="logged_by"></label>
+<label>Phase<select name="phase">PHASE_OPTIONS</select></label>
+<label>Front Temp (°F)<input name="temp_front" type="number" step="25" value="900" required></label>
+<label>Atmosphere<select name="atmosphere">ATMOSPHERE_OPTIONS</select></label>
+<label>What did you do?<textarea name="action_taken" placeholder="Added 3 oak splits, adjusted damper..."></textarea></label>
+<label>Voice Notes<textarea name="notes" placeholder="Tap here and use voice input..."></textarea></label>
+<button>🔥 Quick Log Entry</button>
+</form>
+<div id="status"></div>
+<script>
+const KEY = "woodfirepro-queue", STICKY = ["kiln", "firing_id", "logged_by", "phase"];
+const form = document.getElementById("f"), statusBox = document.getElementById("status");
+const params = new URLSearchParams(location.search);
+if (params.get("token")) localStorage.setItem("woodfirepro-token", params.get("token"));
+const token = localStorage.getItem("woodfirepro-token") || "";
+for (const name of STICKY) {
+  const value = params.get(name) || localStorage.getItem("woodfirepro-" + name);
+  if (value) form.elements[name].value = value;
+}
+const load = () => JSON.parse(localStorage.getItem(KEY) || "[]");
+const save = q => { localStorage.setItem(KEY, JSON.stringify(q)); show(); };
+const show = (msg) => {
+  const n = load().length;
+  statusBox.textContent = (msg ? msg + " " : "") + (n ? n + " entr" + (n == 1 ? "y" : "ies") + " waiting to send" : "All entries sent");
+};
+const pad = n => String(n).padStart(2, "0");
+const stamp = d => `${d.getFullYear()}-${pad(d.getMonth() + 1)}-${pad(d.getDate())} ${pad(d.getHours())}:${pad(d.getMinutes())}:${pad(d.getSeconds())}`;
+const newId = () => (window.crypto && crypto.randomUUID) ? crypto.randomUUID() : Date.now() + "-" + Math.random().toString(16).slice(2);
+let flushing = false;
+async function flush() {
+  if (flushing || !load().length) return;
+  flushing = true;
+  try {
+    // Only what the server says it has leaves the queue; the rest waits for the next try
+    let pending = load(), size = 50;
+    const problems = [];
+    while (pending.length) {
+      const batch = pending.slice(0, size);
+      const r = await fetch("/entries", {method: "POST", headers: {"Content-Type": "application/json", "Authorization": "Bearer " + token}, body: JSON.stringify({entries: batch})});
+      if (r.status >= 500) throw new Error("server error");
+      if (r.status == 401) { problems.push("🔒 Open the quick log from the link in the app to send"); break; }
+      if (r.status == 413 && batch.length > 1) { size = Math.ceil(batch.length / 2); continue; }
+      const result = await r.json().catch(() => ({}));
+      const stored = new Set(result.stored || []);
+      save(load().filter(e => !stored.has(e.client_id)));
+      for (const x of result.rejected || []) problems.push(x.error);
+      if (!r.ok && !(result.rejected || []).length) problems.push(result.error || "error " + r.status);
+      pending = pending.slice(batch.length);
+    }
+    show(problems.length ? "⚠️ Not sent: " + problems.join("; ") + "." : "✅ Logged.");
+  } catch (e) {
+    show("📴 Offline - will retry.");
+  } finally {
+    flushing = false;
+  }
+}
+form.addEventListener("submit", ev => {
+  ev.preventDefault();
+  const entry = Object.fromEntries(new FormData(form));
+  for (const name of STICKY) localStorage.setItem("woodfirepro-" + name, entry[name]);
+  entry.time = stamp(new Date());
+  entry.client_id = newId();
+  save(load().concat([entry]));
+  form.elements.action_taken.value = form.elements.notes.value = "";
+  flush();
+});
+window.addEventListener("online", flush);
+setInterval(flush, 15000);
+show();
+flush();
+</script></body></html>
+""".replace(
+    "PHASE_OPTIONS", "".join(f"<option>{p}</option>" for p in PHASES)
+).replace(
+    "ATMOSPHERE_OPTIONS", "".join(f"<option>{a}</option>" for a in MOBILE_ATMOSPHERES)
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WoodFirePro quick-log ingest server")
+    parser.add_argument("--host", default=DEFAULT_INGEST_HOST, help="0.0.0.0 to let phones on the network in")
+    parser.add_argument("--port", type=int, default=DEFAULT_INGEST_PORT)
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    args = parser.parse_args()
+    server = IngestServer(FiringStore(args.db), args.host, args.port)
+    print(f"WoodFirePro ingest listening on http://{args.host}:{args.port}/"
+          + (f"?token={server.token}" if server.token else ""))
+    server.serve_forever()
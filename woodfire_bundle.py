@@ -0,0 +1,264 @@
+"""Single-file firing bundles, for backups and moving firings between machines.
+
+A bundle is one zip holding a CSV per record type (log, wood, crew, cone map,
+cone changes, safety checklist, weather), ``summary.json`` and a ``manifest.json`` with the
+bundle schema version, row counts and a SHA-256 of every member. Everything is
+streamed: the log is paged out of the store and written row by row, and an
+import hashes each member in chunks before reading it back row by row, so
+memory stays flat however long the firing ran. An import that fails part way
+leaves nothing behind, so it can simply be run again.
+
+    python woodfire_bundle.py export --kiln Anagama --firing Spring_2025 spring.zip
+    python woodfire_bundle.py import spring.zip
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import zipfile
+from datetime import datetime
+
+from woodfire_schema import NUMERIC_FIELDS
+from woodfire_store import DEFAULT_DB_PATH, ENTRY_COLUMNS, TIME_FORMAT, WOOD_COLUMNS, FiringStore, to_epoch
+
+BUNDLE_FORMAT = "woodfirepro-bundle"
+BUNDLE_SCHEMA_VERSION = 2  # 2: cone_events.csv
+MANIFEST = "manifest.json"
+BATCH_SIZE = 500
+CHUNK_BYTES = 1 << 16
+# Weather kept around the firing, the same window join_weather interpolates over
+WEATHER_PAD_SECONDS = 60 * 60
+
+MEMBERS = {
+    "log.csv": ("id",) + ENTRY_COLUMNS + ("extra",),
+    "wood.csv": ("id",) + WOOD_COLUMNS,
+    "crew.csv": ("name", "role", "shift_start", "shift_end", "notes", "added_by", "date"),
+    "cones.csv": ("position", "cone_number", "status", "last_updated"),
+    "cone_events.csv": ("time", "row", "col", "cone_number", "status", "by", "heatwork"),
+    "safety.csv": ("item", "completed"),
+    "weather.csv": ("t", "temperature", "humidity", "pressure", "wind_speed",
+                    "wind_direction", "conditions", "source"),
+}
+# Session-only records that travel with an archived firing as store attachments
+ATTACHMENTS = {"crew.csv": "crew", "cones.csv": "cones", "cone_events.csv": "cone_events", "safety.csv": "safety"}
+
+
+def cone_rows(cone_status):
+    """Flatten the Cone Map's ``{"row_col": {"cones": {...}}}`` state into rows."""
+    rows = []
+    for position, data in cone_status.items():
+        row, col = position.split("_")
+        for cone_num, status in data["cones"].items():
+            rows.append({"position": f"R{int(row)+1}C{int(col)+1}", "cone_number": cone_num,
+                         "status": status, "last_updated": data["last_updated"]})
+    return rows
+
+
+class _HashingWriter(io.RawIOBase):
+    """Pass bytes through to ``raw`` while hashing and counting them."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.raw.write(data)
+
+
+def _write_csv(zf, name, rows):
+    count = 0
+    with zf.open(name, "w") as member:
+        hashed = _HashingWriter(member)
+        with io.TextIOWrapper(io.BufferedWriter(hashed), encoding="utf-8", newline="") as text:
+            writer = csv.DictWriter(text, MEMBERS[name], extrasaction="ignore")
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+    return {"sha256": hashed.sha256.hexdigest(), "bytes": hashed.size, "rows": count}
+
+
+def _write_json(zf, name, value):
+    data = json.dumps(value, indent=2, default=str).encode("utf-8")
+    zf.writestr(name, data)
+    return {"sha256": hashlib.sha256(data).hexdigest(), "bytes": len(data)}
+
+
+def write_bundle(store, out, kiln, firing_id, crew=None, cones=None, safety=None):
+    """Write one firing to ``out`` (a path or binary file) and return its manifest.
+
+    ``crew``, ``cones`` (Cone Map rows) and ``safety`` (checklist dict) come
+    from the live session; left as None they are taken from what was saved
+    with the archived firing.
+    """
+    crew = store.attachment(kiln, firing_id, "crew", []) if crew is None else crew
+    cones = store.attachment(kiln, firing_id, "cones", []) if cones is None else cones
+    safety = store.attachment(kiln, firing_id, "safety", {}) if safety is None else safety
+    summary = store.summary(kiln, firing_id)
+    weather = []
+    if summary["start_time"]:
+        weather = store.weather_rows(to_epoch(summary["start_time"]) - WEATHER_PAD_SECONDS,
+                                     to_epoch(summary["end_time"]) + WEATHER_PAD_SECONDS)
+
+    files = {}
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        files["log.csv"] = _write_csv(zf, "log.csv", store.entry_rows(kiln, firing_id))
+        files["wood.csv"] = _write_csv(zf, "wood.csv", store.wood_entries(kiln, firing_id))
+        files["crew.csv"] = _write_csv(zf, "crew.csv", crew)
+        files["cones.csv"] = _write_csv(zf, "cones.csv", cones)
+        files["cone_events.csv"] = _write_csv(
+            zf, "cone_events.csv", store.attachment(kiln, firing_id, "cone_events", []))
+        files["safety.csv"] = _write_csv(
+            zf, "safety.csv", ({"item": k, "completed": v} for k, v in safety.items()))
+        files["weather.csv"] = _write_csv(
+            zf, "weather.csv", (dict(zip(MEMBERS["weather.csv"], row)) for row in weather))
+        files["summary.json"] = _write_json(zf, "summary.json", summary)
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "schema_version": BUNDLE_SCHEMA_VERSION,
+            "kiln": kiln,
+            "firing_id": firing_id,
+            "created_at": datetime.now().strftime(TIME_FORMAT),
+            "files": files,
+        }
+        # Written last so its checksums cover everything before it
+        zf.writestr(MANIFEST, json.dumps(manifest, indent=2))
+    return manifest
+
+
+def read_manifest(zf):
+    """The bundle's manifest after checking every member against it; raises ValueError."""
+    try:
+        manifest = json.loads(zf.read(MANIFEST))
+    except KeyError:
+        raise ValueError("not a WoodFirePro bundle (no manifest.json)")
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError("not a WoodFirePro bundle")
+    if manifest.get("schema_version", 0) > BUNDLE_SCHEMA_VERSION:
+        raise ValueError(f"bundle schema {manifest['schema_version']} is newer than this WoodFirePro "
+                         f"(reads up to {BUNDLE_SCHEMA_VERSION})")
+    for name, info in manifest["files"].items():
+        sha256 = hashlib.sha256()
+        try:
+            with zf.open(name) as member:
+                while chunk := member.read(CHUNK_BYTES):
+                    sha256.update(chunk)
+        except KeyError:
+            raise ValueError(f"bundle is missing {name}")
+        if sha256.hexdigest() != info["sha256"]:
+            raise ValueError(f"{name} is corrupt (checksum mismatch)")
+    return manifest
+
+
+def _read_csv(zf, name):
+    with zf.open(name) as member:
+        for row in csv.DictReader(io.TextIOWrapper(member, encoding="utf-8", newline="")):
+            yield {k: (None if v == "" else v) for k, v in row.items()}
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _number(value):
+    if value is None:
+        return None
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def _log_entry(row, kiln, firing_id):
+    entry = {k: v for k, v in row.items() if k in ENTRY_COLUMNS and v is not None}
+    for name in NUMERIC_FIELDS:
+        if name in entry:
+            entry[name] = _number(entry[name])
+    if row.get("extra"):
+        entry.update(json.loads(row["extra"]))
+    return dict(entry, kiln=kiln, firing_id=firing_id)
+
+
+def import_bundle(store, file, kiln=None, firing_id=None):
+    """Load a bundle straight into the historical archive; returns its manifest.
+
+    The firing keeps its original kiln and name unless new ones are given.
+    Refuses (ValueError) to merge into a firing that already has records. If
+    anything goes wrong part way, what was imported so far is deleted again.
+    """
+    try:
+        zf = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise ValueError("not a WoodFirePro bundle (not a zip file)")
+    with zf:
+        manifest = read_manifest(zf)
+        kiln, firing_id = kiln or manifest["kiln"], firing_id or manifest["firing_id"]
+        if store.firing_version(kiln, firing_id):
+            raise ValueError(f"{firing_id} ({kiln}) is already in the database")
+        try:
+            _import_records(store, zf, manifest, kiln, firing_id)
+        except BaseException:
+            # Batches are committed as they go (listeners see them like any append), so undo them here
+            store.delete_firing(kiln, firing_id)
+            raise
+    return dict(manifest, kiln=kiln, firing_id=firing_id)
+
+
+def _import_records(store, zf, manifest, kiln, firing_id):
+    for batch in _batches(_read_csv(zf, "log.csv")):
+        store.append_entries([_log_entry(row, kiln, firing_id) for row in batch])
+    for batch in _batches(_read_csv(zf, "wood.csv")):
+        store.append_wood([dict(row, kiln=kiln, firing_id=firing_id, quantity=_number(row["quantity"]))
+                           for row in batch])
+    for batch in _batches(_read_csv(zf, "weather.csv")):
+        store.record_weather_many(
+            [dict(row, **{k: _number(row[k]) for k in ("t", "temperature", "humidity", "pressure", "wind_speed")})
+             for row in batch])
+    for name, attachment in ATTACHMENTS.items():
+        if name not in manifest["files"]:
+            continue  # an older bundle without it
+        rows = list(_read_csv(zf, name))
+        if name == "safety.csv":
+            rows = {row["item"]: row["completed"] == "True" for row in rows}
+        elif name == "cone_events.csv":
+            rows = [dict(row, row=int(row["row"]), col=int(row["col"]),
+                         heatwork=None if row["heatwork"] is None else float(row["heatwork"]))
+                    for row in rows]
+        if rows:
+            store.set_attachment(kiln, firing_id, attachment, rows)
+    store.archive_firing(kiln, firing_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import a WoodFirePro firing bundle")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write one firing to a bundle")
+    export.add_argument("--kiln", required=True)
+    export.add_argument("--firing", required=True)
+    export.add_argument("path")
+    load = commands.add_parser("import", help="load a bundle into the historical archive")
+    load.add_argument("--kiln")
+    load.add_argument("--firing")
+    load.add_argument("path")
+    args = parser.parse_args()
+
+    store = FiringStore(args.db)
+    if args.command == "export":
+        manifest = write_bundle(store, args.path, args.kiln, args.firing)
+    else:
+        manifest = import_bundle(store, args.path, args.kiln, args.firing)
+    counts = ", ".join(f"{info['rows']} {name[:-4]}" for name, info in manifest["files"].items() if "rows" in info)
+    print(f"{args.command}ed {manifest['firing_id']} ({manifest['kiln']}): {counts}")
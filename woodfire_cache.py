@@ -0,0 +1,83 @@
+"""Process-wide cache of decoded historical firings.
+
+Turning a firing's rows into a DataFrame is the slow part of every history
+view, and doing it per browser tab multiplied the memory by the number of
+users. ``FiringCache`` keeps decoded firings for the whole process under a
+fixed memory budget, evicting the least recently used; anything evicted is
+simply decoded again from the store on its next use. Each cached firing
+remembers the store version it was built from, so a late correction to an
+archived firing is picked up on the next read.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from woodfire_schema import entries_frame
+
+DEFAULT_BUDGET_MB = float(os.environ.get("WOODFIREPRO_HISTORY_CACHE_MB", 64))
+
+
+def firing_frame(store, kiln, firing_id):
+    """A firing's log as a DataFrame with a parsed ``datetime`` column."""
+    df = entries_frame(store.entries(kiln, firing_id))
+    df["datetime"] = pd.to_datetime(df["time"])
+    return df
+
+
+class FiringCache:
+    """LRU of firing DataFrames bounded by their in-memory size.
+
+    Frames are shared between sessions, so callers must not modify them in
+    place (``.copy()`` first, or build new frames from them).
+    """
+
+    def __init__(self, store, budget_mb=DEFAULT_BUDGET_MB, loader=firing_frame):
+        self.store = store
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.loader = loader
+        self.hits = self.misses = self.evictions = 0
+        self.size = 0
+        self._frames = OrderedDict()  # (kiln, firing_id) -> (version, frame, bytes)
+        self._lock = threading.Lock()
+
+    def get(self, kiln, firing_id):
+        key = (kiln, firing_id)
+        version = self.store.firing_version(kiln, firing_id)
+        with self._lock:
+            cached = self._frames.get(key)
+            if cached and cached[0] == version:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        # Decode outside the lock so one big firing doesn't stall other sessions
+        frame = self.loader(self.store, kiln, firing_id)
+        nbytes = int(frame.memory_usage(deep=True).sum())
+        with self._lock:
+            self._discard(key)
+            if nbytes <= self.budget:
+                self._frames[key] = (version, frame, nbytes)
+                self.size += nbytes
+                while self.size > self.budget:
+                    self._discard(next(iter(self._frames)))
+                    self.evictions += 1
+        return frame
+
+    def _discard(self, key):
+        cached = self._frames.pop(key, None)
+        if cached:
+            self.size -= cached[2]
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "firings": len(self._frames), "bytes": self.size, "budget": self.budget,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+            }
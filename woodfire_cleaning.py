@@ -0,0 +1,156 @@
+"""Cleaning stage for temperature readings on their way into the log.
+
+Thermocouple feeds drop out (0 or nothing), spike on an open circuit, and
+sometimes stick on one value; incident entries are logged with every
+temperature at 0. ``SensorCleaner`` looks at each reading as it is appended
+and masks the bad ones: the temperature column is left empty so peaks,
+rates, heat-work and charts never see it, and the reading itself is kept as
+``raw_<sensor>`` with the reason in ``flag_<sensor>``.
+
+Per sensor it keeps a rolling window of the last ``HAMPEL_WINDOW`` raw
+readings and the length of the current run of identical ones, so each
+sample costs the same however long the firing:
+
+- ``incident``: any temperature on an incident entry
+- ``out_of_range``: below ``MIN_TEMP_F`` or above ``MAX_TEMP_F``
+- ``stuck``: the ``STUCK_READINGS``-th identical reading in a row from a
+  feed logging at least every ``STUCK_MAX_GAP_MINUTES``
+- ``spike``: a Hampel test against the window's median, allowing for the
+  kiln climbing or falling at up to ``MAX_RATE_F_PER_HR`` since the
+  previous reading (the window's spread covers the climb before that); a
+  reading that carries on from the last one let through is not a spike
+
+A sustained step (a thermocouple pushed further in) fills the window and
+becomes the new median, so it is only masked for a few samples. A masked
+reading corrected by hand (``FiringStore.update_entry``) loses its raw value
+and flag.
+"""
+import re
+from collections import OrderedDict, deque
+
+MIN_TEMP_F, MAX_TEMP_F = 1, 2700
+HAMPEL_WINDOW = 7
+HAMPEL_SIGMAS = 3
+MIN_SPIKE_F = 100  # a flat window has no spread; don't call every wiggle a spike
+MAX_RATE_F_PER_HR = 600
+STUCK_READINGS = 8
+STUCK_MAX_GAP_MINUTES = 5  # people don't log this often; only a logger can be stuck
+SENSOR = re.compile(r"temp_(front|middle|back|stack|r\d+c\d+)$")
+FLAGS = ("incident", "out_of_range", "stuck", "spike")
+MAX_FIRINGS = 16  # firings with windows kept; one that comes back is seeded again from the log
+
+
+def _median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+class _SensorWindow:
+    __slots__ = ("samples", "run_value", "run_length", "run_t", "last_ok")
+
+    def __init__(self):
+        self.samples = deque(maxlen=HAMPEL_WINDOW)  # (t, raw value)
+        self.run_value = self.run_t = None
+        self.run_length = 0
+        self.last_ok = None  # (t, value) of the latest reading let through
+
+    def check(self, t, value):
+        """The flag for ``value`` at epoch ``t`` (or None), folding it into the window."""
+        if value < MIN_TEMP_F or value > MAX_TEMP_F:
+            return "out_of_range"
+        if value == self.run_value and self.run_t is not None and abs(t - self.run_t) <= STUCK_MAX_GAP_MINUTES * 60:
+            self.run_length += 1
+        else:
+            self.run_length = 1
+        self.run_value, self.run_t = value, t
+        if self.run_length >= STUCK_READINGS:
+            return "stuck"
+        flag = None
+        if len(self.samples) >= 3:
+            values = [v for _, v in self.samples]
+            median = _median(values)
+            spread = 1.4826 * _median([abs(v - median) for v in values])
+            allowed = max(HAMPEL_SIGMAS * spread, MIN_SPIKE_F)
+            # Only as far as the kiln could have moved since the last reading: the window's middle
+            # can be hours back when people log by hand, which would let almost anything through
+            hours = abs(t - self.samples[-1][0]) / 3600
+            if abs(value - median) > allowed + MAX_RATE_F_PER_HR * hours:
+                # ...unless it carries on from a reading already let through (a climb across a gap)
+                if self.last_ok is None or abs(value - self.last_ok[1]) > (
+                        allowed + MAX_RATE_F_PER_HR * abs(t - self.last_ok[0]) / 3600):
+                    flag = "spike"
+        self.samples.append((t, value))
+        if flag is None:
+            self.last_ok = (t, value)
+        return flag
+
+
+class SensorCleaner:
+    """Rolling per-sensor state for the ``MAX_FIRINGS`` firings logged to most recently."""
+
+    def __init__(self):
+        self._firings = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._firings
+
+    def _sensors(self, key):
+        sensors = self._firings.get(key)
+        if sensors is None:
+            sensors = self._firings[key] = {}
+            while len(self._firings) > MAX_FIRINGS:
+                self._firings.popitem(last=False)
+        else:
+            self._firings.move_to_end(key)
+        return sensors
+
+    def forget(self, kiln, firing_id):
+        """Drop a firing's windows (it was archived or deleted)."""
+        self._firings.pop((kiln, firing_id), None)
+
+    def seed(self, kiln, firing_id, recent):
+        """Start a firing's windows from its latest entries (oldest first, raw values restored)."""
+        self.forget(kiln, firing_id)
+        sensors = self._sensors((kiln, firing_id))
+        for t, readings in recent:
+            for name, value in readings.items():
+                sensors.setdefault(name, _SensorWindow()).check(t, value)
+
+    def clean(self, entry, t):
+        """``entry`` with bad readings masked and their raw values and flags added."""
+        sensors = self._sensors((entry.get("kiln"), entry.get("firing_id")))
+        cleaned = dict(entry)
+        for name, value in entry.items():
+            if not SENSOR.match(name) or value is None:
+                continue
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                continue
+            if entry.get("entry_type") == "incident":
+                flag = "incident"
+            elif t is None:
+                flag = None  # nothing to compare an untimed reading with
+            else:
+                flag = sensors.setdefault(name, _SensorWindow()).check(t, value)
+            if flag:
+                cleaned[name] = None
+                cleaned[f"raw_{name}"] = entry[name]
+                cleaned[f"flag_{name}"] = flag
+        return cleaned
+
+
+def raw_readings(row):
+    """A stored entry's readings as they came in: masked ones from ``raw_<sensor>``."""
+    readings = {}
+    for name, value in row.items():
+        if SENSOR.match(name) or (name.startswith("raw_") and SENSOR.match(name[4:])):
+            key = name[4:] if name.startswith("raw_") else name
+            if row.get(f"flag_{key}") == "incident":
+                continue
+            try:
+                readings[key] = float(value) if value is not None else readings.get(key)
+            except (TypeError, ValueError):
+                pass
+    return {name: value for name, value in readings.items() if value is not None}
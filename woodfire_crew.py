@@ -0,0 +1,141 @@
+"""Crew shifts as time intervals.
+
+A shift is kept as full start and end times (``TIME_FORMAT``), so a 22:00 to
+06:00 watch is one interval across midnight rather than two clock times.
+``ShiftIndex`` puts a firing's shifts in a pandas ``IntervalIndex`` and
+answers what a multi-day firing with rotating crews asks: who was on duty at
+a given time, how many entries each shift logged, and which stretches of a
+nightly window (say 2 to 5 am) nobody covered.
+"""
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+from woodfire_store import TIME_FORMAT
+
+SHIFT_COLUMNS = ["name", "role", "shift_start", "shift_end"]
+
+
+def shift_times(day, start, end):
+    """Start and end strings for a shift starting on ``day``; an end at or before the start is the next day."""
+    begin, finish = datetime.combine(day, start), datetime.combine(day, end)
+    if finish <= begin:
+        finish += timedelta(days=1)
+    return begin.strftime(TIME_FORMAT), finish.strftime(TIME_FORMAT)
+
+
+def shift_bounds(member):
+    """``(start, end)`` strings of a crew row's shift, or None if it has no usable times."""
+    start, end = member.get("shift_start"), member.get("shift_end")
+    try:
+        if start and end and len(str(start)) <= 8:
+            # Older crew rows (and their bundles) hold clock times only, plus the day they were added
+            day = date.fromisoformat(member["date"]) if member.get("date") else date.today()
+            return shift_times(day, time.fromisoformat(str(start)), time.fromisoformat(str(end)))
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+    except (TypeError, ValueError):
+        return None
+    if pd.isna(start) or pd.isna(end) or end <= start:
+        return None
+    return start.strftime(TIME_FORMAT), end.strftime(TIME_FORMAT)
+
+
+def shift_label(member):
+    bounds = shift_bounds(member)
+    if bounds is None:
+        return f"{member.get('shift_start')} - {member.get('shift_end')}"
+    start, end = (datetime.strptime(t, TIME_FORMAT) for t in bounds)
+    return f"{start:%a %H:%M} → {end:%a %H:%M}" if end.date() != start.date() else f"{start:%a %H:%M} - {end:%H:%M}"
+
+
+class ShiftIndex:
+    """A firing's crew shifts, indexed by their ``[start, end)`` intervals."""
+
+    def __init__(self, crew):
+        rows = []
+        for member in crew:
+            bounds = shift_bounds(member)
+            if bounds:
+                rows.append(dict(member, shift_start=bounds[0], shift_end=bounds[1]))
+        columns = list(dict.fromkeys(SHIFT_COLUMNS + [key for row in rows for key in row]))
+        shifts = pd.DataFrame(rows, columns=columns)
+        self.index = pd.IntervalIndex.from_arrays(pd.to_datetime(shifts["shift_start"]),
+                                                  pd.to_datetime(shifts["shift_end"]), closed="left")
+        shifts.index = self.index
+        self.shifts = shifts
+        self._covered = self._merge(self.index.left.to_numpy(), self.index.right.to_numpy())
+
+    @staticmethod
+    def _merge(starts, ends):
+        # Overlapping shifts collapse into disjoint covered spans, sorted, so a gap query is a binary search
+        merged = []
+        for left, right in sorted(zip(starts, ends)):
+            if merged and left <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], right)
+            else:
+                merged.append([left, right])
+        return (np.array([m[0] for m in merged], dtype="datetime64[ns]"),
+                np.array([m[1] for m in merged], dtype="datetime64[ns]"))
+
+    def __len__(self):
+        return len(self.shifts)
+
+    def on_duty(self, when):
+        """Crew rows whose shift covers ``when``."""
+        if not len(self):
+            return self.shifts
+        return self.shifts[self.index.contains(pd.Timestamp(when))]
+
+    def entries_per_shift(self, log_df):
+        """Each shift with its hours, the entries its crew member logged during it and all entries in it."""
+        out = self.shifts[SHIFT_COLUMNS].reset_index(drop=True)
+        out["hours"] = (self.index.right - self.index.left).total_seconds().to_numpy() / 3600
+        times = pd.to_datetime(log_df["time"]) if len(log_df) else pd.Series(dtype="datetime64[ns]")
+        starts, ends = self.index.left.to_numpy(), self.index.right.to_numpy()
+        everyone = np.sort(times.dropna().to_numpy())
+        out["entries_in_shift"] = np.searchsorted(everyone, ends) - np.searchsorted(everyone, starts)
+        by_person = {name: np.sort(group.dropna().to_numpy())
+                     for name, group in times.groupby(log_df["logged_by"].astype(object))} if len(log_df) else {}
+        logged = np.zeros(len(out), dtype=int)
+        for i, name in enumerate(out["name"]):
+            mine = by_person.get(name)
+            if mine is not None:
+                logged[i] = np.searchsorted(mine, ends[i]) - np.searchsorted(mine, starts[i])
+        out["entries_logged"] = logged
+        return out
+
+    def gaps(self, start, end):
+        """``[(gap_start, gap_end)]`` between ``start`` and ``end`` with nobody on shift."""
+        cursor, end = pd.Timestamp(start).to_datetime64(), pd.Timestamp(end).to_datetime64()
+        starts, ends = self._covered
+        first = np.searchsorted(ends, cursor, side="right")
+        last = np.searchsorted(starts, end, side="left")
+        found = []
+        for left, right in zip(starts[first:last], ends[first:last]):
+            if left > cursor:
+                found.append((cursor, left))
+            cursor = max(cursor, right)
+        if cursor < end:
+            found.append((cursor, end))
+        return [(pd.Timestamp(a), pd.Timestamp(b)) for a, b in found]
+
+    def window_gaps(self, start, end, from_time=time(2), to_time=time(5)):
+        """Uncovered stretches of the daily ``from_time``-``to_time`` window between ``start`` and ``end``.
+
+        A window whose end is before its start (22:00 to 04:00) runs overnight.
+        Returns a DataFrame of gap start, end and minutes.
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        found = []
+        day = start.date() - timedelta(days=1)  # yesterday's overnight window may reach into the span
+        while day <= end.date():
+            window = [pd.Timestamp(t) for t in shift_times(day, from_time, to_time)]
+            low, high = max(window[0], start), min(window[1], end)
+            if low < high:
+                found.extend(self.gaps(low, high))
+            day += timedelta(days=1)
+        gaps = pd.DataFrame({"start": pd.to_datetime([gap[0] for gap in found]),
+                             "end": pd.to_datetime([gap[1] for gap in found])})
+        gaps["minutes"] = (gaps["end"] - gaps["start"]).dt.total_seconds() / 60
+        return gaps
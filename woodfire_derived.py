@@ -0,0 +1,119 @@
+"""Derived series kept alongside the log: climb rates and kiln evenness.
+
+For every entry the store keeps a row of the numbers watched during body
+reduction and glaze maturation:
+
+- ``rate_*``: smoothed °F/hr climb per spy hole (and stack), an EWMA whose
+  weight depends on the time since that sensor's last reading, so irregular
+  log intervals don't distort it
+- ``front_back`` / ``front_middle``: differentials between spy holes
+- ``stack_ratio``: stack temperature over the chamber average
+
+``DerivedSeries`` listens to the store and folds each new entry into a few
+numbers of rolling state per firing. Edits, deletes, undo and out-of-order
+entries recompute that one firing from its log.
+"""
+import math
+import threading
+
+from woodfire_store import DERIVED_COLUMNS, to_epoch
+
+RATE_SMOOTHING_MINUTES = 15
+SENSORS = ("front", "middle", "back", "stack")
+
+
+def smoothed_rate(rate, last_t, last_temp, t, temp, tau_minutes=RATE_SMOOTHING_MINUTES):
+    """Fold one reading into an EWMA °F/hr rate; returns the new rate (or ``rate`` if dt <= 0)."""
+    if last_t is None or t <= last_t:
+        return rate
+    step = (temp - last_temp) / (t - last_t) * 3600
+    if rate is None:
+        return step
+    # A long gap between readings counts for more than a quick re-read
+    weight = 1 - math.exp(-(t - last_t) / (tau_minutes * 60))
+    return rate + weight * (step - rate)
+
+
+def _number(value):
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _FiringSeries:
+    __slots__ = ("last_time", "sensors")
+
+    def __init__(self):
+        self.last_time = None
+        self.sensors = {name: [None, None, None] for name in SENSORS}  # [last_t, last_temp, rate]
+
+    def fold(self, entry):
+        """Derived row for the next entry (in time order), updating the state."""
+        t = to_epoch(entry["time"])
+        temps = {name: _number(entry.get(f"temp_{name}")) for name in SENSORS}
+        row = {"entry_id": entry["id"], "time": entry["time"]}
+        for name, temp in temps.items():
+            state = self.sensors[name]
+            if temp is not None:
+                state[2] = smoothed_rate(state[2], state[0], state[1], t, temp)
+                if state[0] is None or t > state[0]:
+                    state[0], state[1] = t, temp
+            row[f"rate_{name}"] = state[2]
+        front, middle, back, stack = (temps[name] for name in SENSORS)
+        row["front_back"] = None if front is None or back is None else front - back
+        row["front_middle"] = None if front is None or middle is None else front - middle
+        chamber = [v for v in (front, middle, back) if v is not None]
+        row["stack_ratio"] = stack / (sum(chamber) / len(chamber)) if stack is not None and chamber and sum(chamber) else None
+        self.last_time = entry["time"]
+        return row
+
+
+class DerivedSeries:
+    """Keeps the store's ``entry_derived`` rows current as entries arrive."""
+
+    def __init__(self, store):
+        self.store = store
+        self._series = {}
+        self._lock = threading.Lock()
+        store.add_listener(self.on_change)
+
+    def _rebuild(self, kiln, firing_id):
+        series = _FiringSeries()
+        rows = sorted((e for e in self.store.entry_rows(kiln, firing_id) if e["time"]),
+                      key=lambda e: (e["time"], e["id"]))
+        self.store.write_derived(kiln, firing_id, [series.fold(e) for e in rows], replace=True)
+        self._series[(kiln, firing_id)] = series
+
+    def on_change(self, kind, rows):
+        if kind == "wood":
+            return
+        with self._lock:
+            if kind == "deleted":
+                for row in rows:
+                    self._series.pop((row["kiln"], row["firing_id"]), None)
+                return
+            by_firing = {}
+            for row in rows:
+                by_firing.setdefault((row["kiln"], row["firing_id"]), []).append(row)
+            for key, firing_rows in by_firing.items():
+                series = self._series.get(key)
+                ordered = sorted(firing_rows, key=lambda e: (e.get("time") or "", e["id"]))
+                if (kind == "changed" or series is None
+                        or any(not e.get("time") or (series.last_time and e["time"] < series.last_time)
+                               for e in ordered)):
+                    self._rebuild(*key)
+                else:
+                    self.store.write_derived(*key, [series.fold(e) for e in ordered])
+
+    def frame(self, kiln, firing_id):
+        """The firing's derived series as a DataFrame indexed by ``datetime``."""
+        import pandas as pd
+        with self._lock:
+            if (kiln, firing_id) not in self._series:
+                # First look at a firing logged before this process started
+                self._rebuild(kiln, firing_id)
+        df = pd.DataFrame(self.store.derived_rows(kiln, firing_id), columns=list(DERIVED_COLUMNS))
+        df = df.astype({name: float for name in DERIVED_COLUMNS[1:]})
+        df["datetime"] = pd.to_datetime(df["time"])
+        return df.set_index("datetime")
@@ -0,0 +1,111 @@
+"""Estimated temperature across the Cone Map grid.
+
+The spy holes give three readings; the cone map has 48 positions. Each
+position's temperature is estimated by inverse-distance weighting of the
+sensors that read at that time, for every log entry at once (one matrix
+product over the whole firing). The grid's columns run front (C1) to back
+(C8); the three spy holes sit at mid-height in the first, middle and last
+columns. Extra thermocouples can be logged as ``temp_r<row>c<col>`` columns
+(1-based, like the R1C1 labels) and are used where they read.
+"""
+import re
+
+from woodfire_store import to_epoch
+
+GRID_ROWS, GRID_COLS = 6, 8
+# (row, col) of each spy hole in grid coordinates, 0-based
+SENSOR_POSITIONS = {
+    "temp_front": ((GRID_ROWS - 1) / 2, 0),
+    "temp_middle": ((GRID_ROWS - 1) / 2, (GRID_COLS - 1) / 2),
+    "temp_back": ((GRID_ROWS - 1) / 2, GRID_COLS - 1),
+}
+EXTRA_SENSOR = re.compile(r"temp_r(\d+)c(\d+)$")
+IDW_POWER = 2
+
+
+def sensor_positions(columns):
+    """Grid position of every temperature sensor among ``columns``."""
+    positions = {name: pos for name, pos in SENSOR_POSITIONS.items() if name in columns}
+    for name in columns:
+        match = EXTRA_SENSOR.match(str(name))
+        if match:
+            positions[name] = (int(match[1]) - 1, int(match[2]) - 1)
+    return positions
+
+
+def _weights(positions, power=IDW_POWER):
+    import numpy as np
+    rows, cols = np.mgrid[0:GRID_ROWS, 0:GRID_COLS]
+    cells = np.stack([rows.ravel(), cols.ravel()], axis=1).astype(float)
+    sensors = np.array(list(positions.values()), dtype=float)
+    distance = np.linalg.norm(cells[None, :, :] - sensors[:, None, :], axis=2)
+    # A cell that holds a sensor takes its reading outright
+    return np.where(distance == 0, 1e12, 1 / np.maximum(distance, 1e-12) ** power)
+
+
+def temperature_field(df):
+    """Epoch times and the estimated field, shape (entries, GRID_ROWS, GRID_COLS), in time order.
+
+    Cells are NaN for entries where no sensor read.
+    """
+    import numpy as np
+    import pandas as pd
+    positions = sensor_positions(df.columns)
+    df = df.dropna(subset=["time"]).sort_values("time")
+    times = pd.to_datetime(df["time"]).astype("datetime64[s]").astype("int64").to_numpy()
+    if not positions or df.empty:
+        return times, np.full((len(df), GRID_ROWS, GRID_COLS), np.nan)
+    readings = df[list(positions)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    weights = _weights(positions)
+    read = ~np.isnan(readings)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        field = (np.where(read, readings, 0) @ weights) / (read @ weights)
+    return times, field.reshape(len(df), GRID_ROWS, GRID_COLS)
+
+
+def field_at(times, field, when):
+    """The field linearly interpolated in time at ``when`` (epoch seconds, scalar or array).
+
+    Times outside the log take the first/last estimate.
+    """
+    import numpy as np
+    when = np.atleast_1d(np.asarray(when, dtype=float))
+    if len(times) == 0:
+        return np.full((len(when), GRID_ROWS, GRID_COLS), np.nan)
+    upper = np.clip(np.searchsorted(times, when), 1, len(times) - 1) if len(times) > 1 else np.zeros(len(when), int)
+    lower = np.maximum(upper - 1, 0)
+    span = (times[upper] - times[lower]).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = np.clip(np.where(span > 0, (when - times[lower]) / span, 0), 0, 1)
+    frac = frac[:, None, None]
+    # A sensor gap on one side shouldn't blank the cell
+    before, after = field[lower], field[upper]
+    before = np.where(np.isnan(before), after, before)
+    after = np.where(np.isnan(after), before, after)
+    return before * (1 - frac) + after * frac
+
+
+def cone_event_temperatures(cone_events, times, field):
+    """Cone Map events with the estimated temperature at their position and time."""
+    import numpy as np
+    import pandas as pd
+    if not cone_events:
+        return pd.DataFrame(columns=["time", "position", "cone_number", "status", "by", "est_temp"])
+    events = pd.DataFrame(cone_events)
+    estimates = field_at(times, field, [to_epoch(t) for t in events["time"]])
+    events["est_temp"] = estimates[np.arange(len(events)), events["row"], events["col"]]
+    events["position"] = [f"R{r+1}C{c+1}" for r, c in zip(events["row"], events["col"])]
+    return events[["time", "position", "cone_number", "status", "by", "est_temp"]]
+
+
+def cones_as_of(cone_events, when):
+    """``{(row, col): {cone: status}}`` from the events recorded up to ``when`` (a log time string)."""
+    state = {}
+    for event in cone_events:
+        if event["time"] <= when:
+            cones = state.setdefault((event["row"], event["col"]), {})
+            if event["status"] == "removed":
+                cones.pop(event["cone_number"], None)
+            else:
+                cones[event["cone_number"]] = event["status"]
+    return state
@@ -0,0 +1,222 @@
+"""Heat-work: time at temperature, per sensor and per cone map position.
+
+Cones respond to heat-work rather than to the instantaneous reading, so
+alongside the log the store keeps a running integral of the time-temperature
+curve: degree-hours above ``HEATWORK_BASE_F`` for every sensor, and for each
+of the cone map's positions using the same inverse-distance estimate as the
+temperature overlay. ``HeatWork`` listens to the store and folds each new
+entry into the firing's running totals (one small JSON state per entry), so
+neither a rerun nor a restart re-integrates the log. Edits, deletes and
+out-of-order entries recompute that one firing.
+
+Readings are held between entries for sensors that skip one. Incident
+entries carry no readings and are left out.
+"""
+import json
+import math
+import threading
+
+from woodfire_field import EXTRA_SENSOR, GRID_COLS, GRID_ROWS, IDW_POWER, sensor_positions
+from woodfire_store import to_epoch
+
+HEATWORK_BASE_F = 1000  # below this nothing in the kiln is maturing
+MAX_HOLD_HOURS = 1  # how far past the last reading ``at`` carries it forward
+CHAMBER_SENSORS = ("temp_front", "temp_middle", "temp_back", "temp_stack")
+
+
+def _readings(entry):
+    extra = entry.get("extra")
+    if isinstance(extra, str):
+        entry = dict(entry, **json.loads(extra))
+    readings = {}
+    for name, value in entry.items():
+        if name in CHAMBER_SENSORS or EXTRA_SENSOR.match(name):
+            try:
+                readings[name] = float(value) if value is not None else None
+            except (TypeError, ValueError):
+                pass
+    return {name: value for name, value in readings.items() if value is not None}
+
+
+def degree_hours(a, b, hours, base=HEATWORK_BASE_F):
+    """Area above ``base`` under a straight line from ``a`` to ``b`` over ``hours``."""
+    a, b = a - base, b - base
+    if a >= 0 and b >= 0:
+        return (a + b) / 2 * hours
+    if a <= 0 and b <= 0:
+        return 0.0
+    top = max(a, b)
+    return top * top / (abs(a) + abs(b)) * hours / 2
+
+
+_WEIGHTS = {}
+
+
+def _cell_weights(names):
+    # Inverse-distance weights, per cell, of the positioned sensors in ``names``
+    key = tuple(sorted(names))
+    if key not in _WEIGHTS:
+        positions = sensor_positions(key)
+        weights = []
+        for row in range(GRID_ROWS):
+            for col in range(GRID_COLS):
+                cell = []
+                for name, (r, c) in positions.items():
+                    distance = math.hypot(row - r, col - c)
+                    cell.append((name, 1e12 if distance == 0 else 1 / distance ** IDW_POWER))
+                weights.append(cell)
+        _WEIGHTS[key] = weights
+    return _WEIGHTS[key]
+
+
+def cell_temperatures(readings):
+    """Estimated temperature of each cone map position (row-major), or None where no sensor read."""
+    weights = _cell_weights(readings)
+    return [sum(w * readings[n] for n, w in cell) / sum(w for _, w in cell) if cell else None for cell in weights]
+
+
+def empty_state():
+    return {"readings": {}, "sensors": {}, "cells": [0.0] * (GRID_ROWS * GRID_COLS)}
+
+
+def advance(state, hours, readings):
+    """State after ``hours`` more, with the readings moving in a straight line to ``readings``."""
+    held = dict(state["readings"], **readings)
+    sensors = dict(state["sensors"])
+    for name, value in held.items():
+        previous = state["readings"].get(name)
+        sensors[name] = sensors.get(name, 0.0) + (degree_hours(previous, value, hours) if previous is not None else 0.0)
+    cells = list(state["cells"])
+    if state["readings"]:
+        before, after = cell_temperatures(state["readings"]), cell_temperatures(held)
+        for i, (a, b) in enumerate(zip(before, after)):
+            if a is not None and b is not None:
+                cells[i] += degree_hours(a, b, hours)
+    return {"readings": held, "sensors": sensors, "cells": cells}
+
+
+class _Accumulator:
+    __slots__ = ("last_time", "last_t", "state")
+
+    def __init__(self, last_time=None, state=None):
+        self.last_time = last_time
+        self.last_t = to_epoch(last_time) if last_time else None
+        self.state = state or empty_state()
+
+    def fold(self, entry):
+        """Heat-work row for the next entry (in time order), or None for one without readings."""
+        readings = _readings(entry)
+        if entry.get("entry_type") == "incident" or not readings:
+            return None
+        t = to_epoch(entry["time"])
+        hours = max(t - self.last_t, 0) / 3600 if self.last_t is not None else 0
+        self.state = advance(self.state, hours, readings)
+        self.last_time, self.last_t = entry["time"], t
+        return {"entry_id": entry["id"], "time": entry["time"], "state": self.state}
+
+
+class HeatWork:
+    """Keeps the store's ``entry_heatwork`` rows current as entries arrive."""
+
+    def __init__(self, store):
+        self.store = store
+        self._firings = {}
+        self._lock = threading.Lock()
+        store.add_listener(self.on_change)
+
+    def _rebuild(self, kiln, firing_id):
+        accumulator = _Accumulator()
+        rows = sorted((e for e in self.store.entry_rows(kiln, firing_id) if e["time"]),
+                      key=lambda e: (e["time"], e["id"]))
+        folded = [accumulator.fold(e) for e in rows]
+        self.store.write_heatwork(kiln, firing_id, [row for row in folded if row], replace=True)
+        self._firings[(kiln, firing_id)] = accumulator
+
+    def _accumulator(self, kiln, firing_id):
+        # Pick up where the stored totals left off rather than integrating the log again
+        if (kiln, firing_id) not in self._firings:
+            latest, _ = self.store.heatwork_near(kiln, firing_id)
+            if latest:
+                self._firings[(kiln, firing_id)] = _Accumulator(*latest)
+            else:
+                self._rebuild(kiln, firing_id)
+        return self._firings[(kiln, firing_id)]
+
+    def on_change(self, kind, rows):
+        if kind == "wood":
+            return
+        with self._lock:
+            if kind == "deleted":
+                for row in rows:
+                    self._firings.pop((row["kiln"], row["firing_id"]), None)
+                return
+            by_firing = {}
+            for row in rows:
+                by_firing.setdefault((row["kiln"], row["firing_id"]), []).append(row)
+            for key, firing_rows in by_firing.items():
+                if kind == "changed":
+                    self._rebuild(*key)
+                    continue
+                accumulator = self._accumulator(*key)
+                ordered = sorted(firing_rows, key=lambda e: (e.get("time") or "", e["id"]))
+                if any(not e.get("time") or (accumulator.last_time and e["time"] < accumulator.last_time)
+                       for e in ordered):
+                    self._rebuild(*key)
+                else:
+                    folded = [accumulator.fold(e) for e in ordered]
+                    self.store.write_heatwork(*key, [row for row in folded if row])
+
+    def at(self, kiln, firing_id, when=None):
+        """Heat-work state at ``when`` (a log time string; default the latest reading).
+
+        ``sensors`` maps each sensor to degree-hours; ``cells`` is a
+        GRID_ROWS x GRID_COLS list of lists. Between entries the readings are
+        interpolated; after the last one they are held for up to
+        ``MAX_HOLD_HOURS``.
+        """
+        with self._lock:
+            self._accumulator(kiln, firing_id)
+        before, after = self.store.heatwork_near(kiln, firing_id, when)
+        if before is None:
+            state = empty_state()
+        elif when is None or when == before[0]:
+            state = before[1]
+        else:
+            hours = (to_epoch(when) - to_epoch(before[0])) / 3600
+            if after is None:
+                state = advance(before[1], min(hours, MAX_HOLD_HOURS), {})
+            else:
+                span = (to_epoch(after[0]) - to_epoch(before[0])) / 3600
+                fraction = hours / span if span else 1.0
+                readings = {name: a + (after[1]["readings"][name] - a) * fraction
+                            for name, a in before[1]["readings"].items() if name in after[1]["readings"]}
+                state = advance(before[1], hours, readings)
+        cells = state["cells"]
+        return {"time": when or (before[0] if before else None), "sensors": state["sensors"],
+                "cells": [cells[r * GRID_COLS:(r + 1) * GRID_COLS] for r in range(GRID_ROWS)]}
+
+    def cone_events(self, kiln, firing_id, events):
+        """Cone Map events with the heat-work at their position and time added as ``heatwork``."""
+        return [event if event.get("heatwork") is not None else
+                dict(event, heatwork=self.at(kiln, firing_id, event["time"])["cells"][event["row"]][event["col"]])
+                for event in events]
+
+
+def cone_heatwork(store, firings, statuses=("down",)):
+    """Heat-work at which cones reached one of ``statuses``, across ``[(kiln, firing_id)]``.
+
+    Uses each firing's saved ``cone_events``; the first event per cone and
+    position counts. Rows are dicts of kiln, firing_id, cone_number,
+    position, time and heatwork.
+    """
+    rows = []
+    for kiln, firing_id in firings:
+        seen = set()
+        for event in store.attachment(kiln, firing_id, "cone_events", []):
+            key = (event["cone_number"], event["row"], event["col"])
+            if event["status"] in statuses and event.get("heatwork") is not None and key not in seen:
+                seen.add(key)
+                rows.append({"kiln": kiln, "firing_id": firing_id, "cone_number": event["cone_number"],
+                             "position": f"R{event['row']+1}C{event['col']+1}", "time": event["time"],
+                             "heatwork": event["heatwork"]})
+    return rows
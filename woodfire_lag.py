@@ -0,0 +1,216 @@
+"""How the kiln answers the damper and the primary air, and how long it takes.
+
+Damper and air intake are logged as settings, temperatures as readings, at
+whatever times the crew got to them. Every firing is put on one grid of
+``GRID_MINUTES`` slots (a setting holds until it is changed, a reading is
+interpolated across gaps of up to ``MAX_GAP_MINUTES``), all firings end to
+end in the same arrays, so the archive is handled in one pass of vectorized
+operations rather than a loop over firings.
+
+Two views of the same question:
+
+- cross-correlation of each slot's control change with each sensor's change
+  ``lag`` minutes later, for lags up to ``MAX_LAG_MINUTES``
+- step responses: at every change of at least ``MIN_STEP_PCT`` the sensor's
+  rise over the following slots, less the climb it was already on, per 10 %
+  of opening. A response is cut off at the next step of the same control.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+CONTROLS = ("damper_position", "air_intake")
+SENSORS = ("temp_front", "temp_middle", "temp_back", "temp_stack")
+ROW_COLUMNS = ("kiln", "firing_id", "time") + CONTROLS + SENSORS + ("entry_type",)
+# Entries whose damper and air are not settings anyone made: incidents log them at 0,
+# and quick phone entries don't ask for them
+NOT_SETTINGS = ("incident", "mobile_quick")
+GRID_MINUTES = 5
+MAX_LAG_MINUTES = 120
+MAX_GAP_MINUTES = 60
+MIN_STEP_PCT = 5
+BASELINE_MINUTES = 30  # the trend before a step that its response is measured against
+SUMMARY_CACHE = 8
+
+
+def _held(values, codes):
+    # Each slot's value, or the last one before it in the same firing
+    idx = np.arange(len(values))
+    prev = np.maximum.accumulate(np.where(np.isnan(values), -1, idx))
+    ok = (prev >= 0) & (codes[np.maximum(prev, 0)] == codes)
+    return np.where(ok, values[np.maximum(prev, 0)], np.nan)
+
+
+def _interpolated(values, codes, max_gap):
+    # Straight lines across gaps of up to ``max_gap`` slots, never from one firing into the next
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return values
+    n, idx = len(values), np.arange(len(values))
+    filled = np.interp(idx, idx[valid], values[valid])
+    prev = np.maximum.accumulate(np.where(valid, idx, -1))
+    after = np.minimum.accumulate(np.where(valid, idx, n)[::-1])[::-1]
+    inside = ((prev >= 0) & (after < n) & (after - prev <= max_gap)
+              & (codes[np.maximum(prev, 0)] == codes) & (codes[np.minimum(after, n - 1)] == codes))
+    return np.where(valid | inside, filled, np.nan)
+
+
+def control_grid(rows, step=GRID_MINUTES):
+    """Log rows (dicts, tuples of ``ROW_COLUMNS`` or a DataFrame) on a ``step``-minute grid per firing.
+
+    Returns a DataFrame with ``firing`` (a code per firing), ``kiln``,
+    ``firing_id``, ``minutes`` since the firing's first entry, and the
+    control and sensor columns. Firings follow one another in the frame.
+    Controls on ``NOT_SETTINGS`` entries are ignored, so the setting before
+    them holds.
+    """
+    df = pd.DataFrame(rows, columns=list(ROW_COLUMNS)) if not isinstance(rows, pd.DataFrame) else rows
+    df = df.reindex(columns=list(ROW_COLUMNS))
+    df.loc[df["entry_type"].isin(NOT_SETTINGS), list(CONTROLS)] = np.nan
+    df["t"] = pd.to_datetime(df["time"], errors="coerce")
+    df = df.dropna(subset=["t"])
+    values = list(CONTROLS + SENSORS)
+    df[values] = df[values].apply(pd.to_numeric, errors="coerce").astype(float)
+    if df.empty:
+        return pd.DataFrame(columns=["firing", "kiln", "firing_id", "minutes"] + values)
+    df["firing"] = df.groupby(["kiln", "firing_id"], sort=False, observed=True).ngroup()
+    df = df.sort_values(["firing", "t"], kind="stable")
+    start = df.groupby("firing")["t"].transform("min")
+    df["slot"] = ((df["t"] - start).dt.total_seconds() // (step * 60)).astype(int)
+    per_slot = df.groupby(["firing", "slot"]).agg(
+        {**{c: "last" for c in CONTROLS}, **{s: "mean" for s in SENSORS}})
+
+    # Every slot of every firing, including the ones nobody logged in
+    lengths = per_slot.index.get_level_values("slot").to_series().groupby(
+        per_slot.index.get_level_values("firing")).max().to_numpy() + 1
+    codes = np.repeat(np.arange(len(lengths)), lengths)
+    slots = np.arange(len(codes)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    per_slot = per_slot.reindex(pd.MultiIndex.from_arrays([codes, slots], names=["firing", "slot"]))
+    names = df.drop_duplicates("firing").set_index("firing")[["kiln", "firing_id"]]
+    grid = pd.DataFrame({"firing": codes, "kiln": names["kiln"].to_numpy()[codes],
+                         "firing_id": names["firing_id"].to_numpy()[codes], "minutes": slots * step})
+    for column in CONTROLS:
+        grid[column] = _held(per_slot[column].to_numpy(), codes)
+    for column in SENSORS:
+        grid[column] = _interpolated(per_slot[column].to_numpy(), codes, MAX_GAP_MINUTES // step)
+    return grid
+
+
+def _change(values, codes):
+    # Change since the slot before, within a firing
+    change = np.full(len(values), np.nan)
+    change[1:] = np.where(codes[1:] == codes[:-1], values[1:] - values[:-1], np.nan)
+    return change
+
+
+def control_steps(grid, control, min_step=MIN_STEP_PCT):
+    """Changes of at least ``min_step`` in ``control``: kiln, firing_id, minutes, before, after, change."""
+    codes, values = grid["firing"].to_numpy(), grid[control].to_numpy()
+    change = _change(values, codes)
+    at = np.flatnonzero(np.abs(np.nan_to_num(change)) >= min_step)
+    return pd.DataFrame({"kiln": grid["kiln"].to_numpy()[at], "firing_id": grid["firing_id"].to_numpy()[at],
+                         "minutes": grid["minutes"].to_numpy()[at], "before": values[at - 1],
+                         "after": values[at], "change": change[at]}, index=at)
+
+
+def _ahead(values, codes, lag):
+    # values[i + lag] where that is still the same firing, else NaN
+    ahead = np.full(len(values), np.nan)
+    if lag < len(values):
+        same = codes[lag:] == codes[:len(codes) - lag]
+        ahead[:len(values) - lag] = np.where(same, values[lag:], np.nan)
+    return ahead
+
+
+def lag_correlation(grid, control, sensor, max_lag=MAX_LAG_MINUTES, step=GRID_MINUTES):
+    """Correlation of ``control`` changes with ``sensor`` changes ``lag`` minutes later.
+
+    A DataFrame indexed by ``lag`` (minutes) with ``r`` and ``pairs`` (how
+    many slot pairs went into it).
+    """
+    codes = grid["firing"].to_numpy()
+    x = _change(grid[control].to_numpy(), codes)
+    y = _change(grid[sensor].to_numpy(), codes)
+    lags = np.arange(max_lag // step + 1)
+    r, pairs = np.full(len(lags), np.nan), np.zeros(len(lags), dtype=int)
+    for k in lags:
+        y_k = _ahead(y, codes, k)
+        ok = ~(np.isnan(x) | np.isnan(y_k))
+        pairs[k] = ok.sum()
+        if pairs[k] > 2:
+            dx, dy = x[ok] - x[ok].mean(), y_k[ok] - y_k[ok].mean()
+            spread = np.sqrt((dx * dx).sum() * (dy * dy).sum())
+            r[k] = (dx * dy).sum() / spread if spread else np.nan
+    return pd.DataFrame({"r": r, "pairs": pairs}, index=pd.Index(lags * step, name="lag"))
+
+
+def step_responses(grid, control, sensor, min_step=MIN_STEP_PCT, max_lag=MAX_LAG_MINUTES, step=GRID_MINUTES):
+    """°F per 10 % of opening, beyond the climb already under way, for every step (rows) and lag (columns)."""
+    codes = grid["firing"].to_numpy()
+    temps = grid[sensor].to_numpy()
+    steps = control_steps(grid, control, min_step)
+    lags = np.arange(max_lag // step + 1)
+    if steps.empty:
+        return pd.DataFrame(columns=pd.Index(lags * step, name="lag"), dtype=float)
+    before = steps.index.to_numpy() - 1  # the last slot at the old setting
+    baseline = BASELINE_MINUTES // step
+    start = np.maximum(before - baseline, np.searchsorted(codes, codes[before]))  # not before the firing began
+    trend = np.where(before > start, (temps[before] - temps[start]) / np.maximum(before - start, 1), np.nan)
+    idx = before[:, None] + lags[None, :]
+    # Cut each response off at the next step of the same control, or the end of its firing
+    following = np.r_[before[1:], len(codes)]
+    inside = (idx < len(codes)) & (idx <= following[:, None])
+    idx = np.minimum(idx, len(codes) - 1)
+    inside &= codes[idx] == codes[before][:, None]
+    excess = temps[idx] - temps[before][:, None] - trend[:, None] * lags[None, :]
+    per_ten = np.where(inside, excess / steps["change"].to_numpy()[:, None] * 10, np.nan)
+    return pd.DataFrame(per_ten, index=steps.index, columns=pd.Index(lags * step, name="lag"))
+
+
+def lag_summary(grid, min_step=MIN_STEP_PCT, max_lag=MAX_LAG_MINUTES):
+    """One row per control and sensor: steps found, the strongest correlation and its lag,
+    the median step response at its largest and how long it took to get halfway there."""
+    rows = []
+    for control in CONTROLS:
+        for sensor in SENSORS:
+            correlation = lag_correlation(grid, control, sensor, max_lag)
+            responses = step_responses(grid, control, sensor, min_step, max_lag)
+            median = responses.median() if len(responses) else pd.Series(dtype=float)
+            row = {"control": control, "sensor": sensor, "steps": len(responses),
+                   "best_lag_min": np.nan, "r": np.nan, "half_response_min": np.nan, "f_per_10pct": np.nan}
+            if correlation["r"].notna().any():
+                best = correlation["r"].abs().idxmax()
+                row.update(best_lag_min=best, r=correlation.at[best, "r"])
+            if median.notna().any():
+                peak = median.abs().idxmax()
+                half = median.abs().ge(abs(median[peak]) / 2).idxmax()
+                row.update(half_response_min=half, f_per_10pct=median[peak])
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+class ControlLag:
+    """Archive-wide control response, recomputed only when the filter or the data changes."""
+
+    def __init__(self, store):
+        self.store = store
+        self._results = OrderedDict()  # (kilns, start, end, archive version) -> (grid, summary)
+        self._lock = threading.Lock()
+
+    def archive(self, kiln=None, start=None, end=None):
+        """``(grid, summary)`` over the archived firings matching the filter (see ``archive_stats``)."""
+        kilns = (kiln,) if isinstance(kiln, str) else tuple(sorted(kiln or ()))
+        key = (kilns, start, end, self.store.archive_version())
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+        grid = control_grid(self.store.archive_control_rows(kilns or None, start, end))
+        result = (grid, lag_summary(grid))
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > SUMMARY_CACHE:
+                self._results.popitem(last=False)
+        return result
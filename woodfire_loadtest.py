@@ -0,0 +1,354 @@
+"""Load test: N crew devices rerunning the app against one growing firing.
+
+Every interaction reruns the whole script on the one Streamlit server
+process. The harness starts that server headless on a scratch database and
+connects N simulated devices over the same websocket protocol the browser
+uses, while a feeder posts sensor entries through the ingest endpoint the way
+a running firing grows. Devices act at random with a think time between
+actions:
+
+- ``quick_entry``: Mobile Mode quick log entry
+- ``log_entry``: desktop Firing Log entry
+- ``wood_log``: Wood Tracker entry
+- ``cone_click``: a Cone Map position
+- ``tab_switch``: a plain rerun (every tab renders on every run, so another
+  tab costs the server the rerun its first widget interaction triggers)
+- ``alarm_poll``: the alarm banner fragment, rerun on its timer as the
+  browser would
+
+Each level of ``--sessions`` runs for ``--duration`` seconds and reports
+p50/p95/p99 rerun latency per action, with the server's CPU and RSS sampled
+over time. The level where p95 passes ``--slow`` seconds is where one process
+stops keeping up::
+
+    python woodfire_loadtest.py --sessions 1,2,4,8 --duration 60 --csv load.csv
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(HERE, "woodfirepro.py")
+KILN, FIRING_ID = "Ana", "loadtest"
+MOBILE_ACTIONS = {"quick_entry": 3, "tab_switch": 1}
+DESKTOP_ACTIONS = {"log_entry": 1, "wood_log": 2, "cone_click": 2, "tab_switch": 4}
+SAMPLE_SECONDS = 5
+WIDGETS = ("button", "checkbox", "number_input")
+FULL_RUN_DONE = (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_WITH_COMPILE_ERROR)
+FRAGMENT_RUN_DONE = FULL_RUN_DONE + (ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY,)
+
+
+def _percentile(values, q):
+    # Nearest rank
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def process_usage(pid):
+    """``(cpu_seconds, rss_mb)`` of a process from /proc, or None where there's no /proc."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            resident = int(f.read().split()[1])
+    except OSError:
+        return None
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")  # utime + stime
+    return cpu, resident * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+class Session:
+    """One browser tab: a websocket to the server plus the widget values it would send."""
+
+    def __init__(self, url):
+        self.url = url
+        self.widgets = {}  # label -> (widget id, element)
+        self.states = {}  # widget id -> WidgetState sent with every rerun
+        self.fragments = {}  # fragment id -> seconds between auto reruns
+        self._ws = None
+
+    async def connect(self):
+        self._ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        await self._ws.close()
+
+    async def rerun(self, trigger=None, fragment_id=None, **values):
+        """Rerun as a widget change would; returns ``(seconds, exceptions)`` until the script finishes."""
+        for label, value in values.items():
+            widget_id, element = self.widgets[label]
+            state = WidgetState(id=widget_id)
+            if isinstance(value, bool):
+                state.bool_value = value
+            elif getattr(element, "data_type", None) == element.INT:
+                state.int_value = int(value)
+            else:
+                state.double_value = float(value)
+            self.states[widget_id] = state
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        if trigger:
+            msg.rerun_script.widget_states.widgets.append(WidgetState(id=self.widgets[trigger][0], trigger_value=True))
+        if fragment_id:
+            msg.rerun_script.fragment_id = fragment_id
+            msg.rerun_script.is_auto_rerun = True
+        started = time.perf_counter()
+        await self._ws.send(msg.SerializeToString())
+        exceptions = 0
+        done = FRAGMENT_RUN_DONE if fragment_id else FULL_RUN_DONE
+        while True:
+            fmsg = ForwardMsg.FromString(await self._ws.recv())
+            kind = fmsg.WhichOneof("type")
+            if kind == "delta" and fmsg.delta.WhichOneof("type") == "new_element":
+                element_type = fmsg.delta.new_element.WhichOneof("type")
+                if element_type in WIDGETS:
+                    element = getattr(fmsg.delta.new_element, element_type)
+                    self.widgets[element.label] = (element.id, element)
+                elif element_type == "exception":
+                    exceptions += 1
+            elif kind == "auto_rerun":
+                self.fragments[fmsg.auto_rerun.fragment_id] = fmsg.auto_rerun.interval
+            elif kind == "script_finished" and fmsg.script_finished in done:
+                return time.perf_counter() - started, exceptions
+
+
+class Recorder:
+    """Rerun latencies and errors per action, and the server's CPU/RSS over time."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.samples = []
+        self.started = time.monotonic()
+
+    def record(self, action, seconds, exceptions):
+        self.latencies[action].append(seconds)
+        if exceptions:
+            self.errors[action] += 1
+
+    def reruns(self):
+        return sum(len(v) for v in self.latencies.values())
+
+
+def _post(port, entries):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/entries", json.dumps({"entries": entries}).encode(),
+                                     {"Content-Type": "application/json"})
+    urllib.request.urlopen(request, timeout=30).read()
+
+
+def _sensor_entry(when, temp):
+    return {"kiln": KILN, "firing_id": FIRING_ID, "time": when.strftime("%Y-%m-%d %H:%M:%S"),
+            "logged_by": "sensor", "phase": "heating", "temp_front": round(temp), "atmosphere": "neutral"}
+
+
+def seed(port, count):
+    """Back-fill ``count`` once-a-minute entries ending now, as if the firing were well under way."""
+    start = datetime.now() - timedelta(minutes=count)
+    for batch in range(0, count, 500):
+        _post(port, [_sensor_entry(start + timedelta(minutes=i), 200 + i * 0.8)
+                     for i in range(batch, min(count, batch + 500))])
+
+
+async def feeder(port, per_minute):
+    """Sensor entries through the ingest endpoint, so every listener sees them as in a real firing."""
+    temp = 1200.0
+    while True:
+        await asyncio.sleep(60 / per_minute)
+        temp += random.uniform(-2, 6)
+        try:
+            await asyncio.to_thread(_post, port, [_sensor_entry(datetime.now(), temp)])
+        except OSError:
+            pass
+
+
+async def device(url, mobile, think, deadline, recorder, rng):
+    session = Session(url)
+    await session.connect()
+    try:
+        recorder.record("first_load", *await session.rerun())
+        if mobile:
+            recorder.record("first_load", *await session.rerun(**{"📱 Mobile Mode": True}))
+        actions = MOBILE_ACTIONS if mobile else DESKTOP_ACTIONS
+        polled = {fragment: time.monotonic() for fragment in session.fragments}
+        while True:
+            await asyncio.sleep(rng.expovariate(1 / think))
+            if time.monotonic() >= deadline:
+                break
+            for fragment, interval in session.fragments.items():
+                if time.monotonic() - polled.get(fragment, 0) >= interval:
+                    recorder.record("alarm_poll", *await session.rerun(fragment_id=fragment))
+                    polled[fragment] = time.monotonic()
+            action = rng.choices(list(actions), weights=list(actions.values()))[0]
+            recorder.record(action, *await _act(session, action, rng))
+    finally:
+        await session.close()
+
+
+async def _act(session, action, rng):
+    if action == "quick_entry" and "🔥 Quick Log Entry" in session.widgets:
+        return await session.rerun("🔥 Quick Log Entry", **{"Front Temp (°F)": rng.randrange(1200, 2400, 25)})
+    if action == "log_entry" and "➕ Add Log Entry" in session.widgets:
+        return await session.rerun("➕ Add Log Entry")
+    if action == "wood_log" and "🔥 Log Wood Consumption" in session.widgets:
+        return await session.rerun("🔥 Log Wood Consumption")
+    if action == "cone_click":
+        position = f"R{rng.randrange(6) + 1}C{rng.randrange(8) + 1}"
+        if position in session.widgets:
+            return await session.rerun(position)
+    return await session.rerun()  # a tab switch, or the widget isn't on screen
+
+
+async def sampler(pid, recorder, level, store):
+    last, wall, reruns = process_usage(pid), time.monotonic(), 0
+    while True:
+        await asyncio.sleep(SAMPLE_SECONDS)
+        usage, now, now_reruns = process_usage(pid), time.monotonic(), recorder.reruns()
+        sample = {
+            "sessions": level, "elapsed": round(now - recorder.started, 1),
+            "cpu_percent": round(100 * (usage[0] - last[0]) / (now - wall), 1) if usage and last else None,
+            "rss_mb": round(usage[1], 1) if usage else None, "reruns": now_reruns - reruns,
+            "entries": store.summary(KILN, FIRING_ID)["entry_count"],
+        }
+        recorder.samples.append(sample)
+        print(f"  t={sample['elapsed']:>6}s cpu={sample['cpu_percent']}% rss={sample['rss_mb']} MB "
+              f"reruns={sample['reruns']} entries={sample['entries']}", flush=True)
+        last, wall, reruns = usage, now, now_reruns
+
+
+async def run_level(sessions, args, url, pid, store, ingest_port):
+    recorder = Recorder()
+    deadline = recorder.started + args.duration
+    background = [asyncio.create_task(sampler(pid, recorder, sessions, store)),
+                  asyncio.create_task(feeder(ingest_port, args.feed))]
+    mobile_count = round(sessions * args.mobile_share)
+    try:
+        await asyncio.gather(*(device(url, i < mobile_count, args.think, deadline, recorder,
+                                      random.Random(args.seed * 1000 + sessions * 100 + i))
+                               for i in range(sessions)))
+    finally:
+        for task in background:
+            task.cancel()
+    return recorder
+
+
+def report(sessions, recorder):
+    reruns = [s for action, values in recorder.latencies.items() if action != "first_load" for s in values]
+    print(f"sessions={sessions}: {len(reruns)} reruns, "
+          f"p50={_percentile(reruns, 50):.2f}s p95={_percentile(reruns, 95):.2f}s p99={_percentile(reruns, 99):.2f}s")
+    for action, values in sorted(recorder.latencies.items()):
+        print(f"  {action:<12} n={len(values):<5} p50={_percentile(values, 50):.2f}s "
+              f"p95={_percentile(values, 95):.2f}s p99={_percentile(values, 99):.2f}s "
+              f"errors={recorder.errors.get(action, 0)}")
+    cpu = [s["cpu_percent"] for s in recorder.samples if s["cpu_percent"] is not None]
+    if cpu:
+        print(f"  server cpu mean={sum(cpu) / len(cpu):.0f}% max={max(cpu):.0f}%  "
+              f"rss max={max(s['rss_mb'] for s in recorder.samples):.0f} MB")
+    return _percentile(reruns, 95)
+
+
+def start_server(db_path, port, ingest_port):
+    # The feeder posts from this machine, so a local ingest server with no token
+    env = dict(os.environ, WOODFIREPRO_DB=db_path, WOODFIREPRO_INGEST_PORT=str(ingest_port),
+               WOODFIREPRO_INGEST_HOST="127.0.0.1")
+    env.pop("WOODFIREPRO_INGEST_TOKEN", None)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP, "--server.headless", "true", "--server.port", str(port),
+         "--browser.gatherUsageStats", "false"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(300):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1).read()
+            return server
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError("streamlit server exited on startup")
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("streamlit server didn't come up")
+
+
+async def warm_up(url, ingest_port, seed_entries):
+    # Imports, cached resources and the ingest server, as on a server that's been up a while;
+    # then give the devices a firing to join
+    session = Session(url)
+    await session.connect()
+    await session.rerun()
+    await session.close()
+    await asyncio.to_thread(seed, ingest_port, max(seed_entries, 1))
+
+
+async def run(args, db_path):
+    from woodfire_store import FiringStore
+
+    port, ingest_port = _free_port(), _free_port()
+    server = start_server(db_path, port, ingest_port)
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    samples, saturated = [], None
+    try:
+        await warm_up(url, ingest_port, args.seed_entries)
+        store = FiringStore(db_path)
+        for sessions in (int(n) for n in args.sessions.split(",")):
+            print(f"== {sessions} session(s) for {args.duration:.0f}s", flush=True)
+            recorder = await run_level(sessions, args, url, server.pid, store, ingest_port)
+            p95 = report(sessions, recorder)
+            samples.extend(recorder.samples)
+            if saturated is None and p95 > args.slow:
+                saturated = sessions
+    finally:
+        server.terminate()
+        server.wait()
+    print(f"p95 passed {args.slow}s at {saturated} sessions" if saturated
+          else f"p95 stayed under {args.slow}s at every level")
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", default="1,2,4,8", help="comma-separated session counts, run in turn")
+    parser.add_argument("--duration", type=float, default=60, help="seconds per level")
+    parser.add_argument("--think", type=float, default=3, help="mean seconds between a device's actions")
+    parser.add_argument("--mobile-share", type=float, default=0.5, help="fraction of devices in Mobile Mode")
+    parser.add_argument("--feed", type=float, default=30, help="sensor entries per minute while running")
+    parser.add_argument("--seed-entries", type=int, default=0, help="entries already in the firing at the start")
+    parser.add_argument("--slow", type=float, default=2.0, help="p95 seconds that counts as not keeping up")
+    parser.add_argument("--db", help="database to load (default: a scratch file)")
+    parser.add_argument("--csv", help="write the CPU/RSS samples here")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        samples = asyncio.run(run(args, args.db or os.path.join(scratch, "loadtest.db")))
+    if args.csv and samples:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(samples[0]))
+            writer.writeheader()
+            writer.writerows(samples)
+
+
+if __name__ == "__main__":
+    main()
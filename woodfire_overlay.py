@@ -0,0 +1,104 @@
+"""Many firings on one elapsed-time grid.
+
+Comparing firings by wall-clock time lines nothing up, and joining their
+datetime indexes gives a frame that is mostly NaN. Here every firing is
+interpolated onto a shared grid of hours since its first entry, once, and
+kept as a small array. Bands across a selection (median, 10th-90th
+percentile) are a single ``nanpercentile`` over the stacked arrays and are
+memoised per selection, so overlaying 50 firings costs about what one does.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+GRID_STEP_HOURS = 0.25
+BAND_PERCENTILES = (10, 50, 90)
+BAND_CACHE = 16
+
+
+def elapsed_curve(times, values, step=GRID_STEP_HOURS):
+    """``values`` interpolated at every ``step`` hours since the first time, up to the last reading."""
+    times = pd.to_datetime(pd.Series(times), errors="coerce")
+    elapsed = (times - times.min()).dt.total_seconds().to_numpy() / 3600
+    values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+    keep = ~(np.isnan(elapsed) | np.isnan(values))
+    elapsed, values = elapsed[keep], values[keep]
+    if not len(elapsed):
+        return np.empty(0)
+    order = np.argsort(elapsed, kind="stable")
+    elapsed, values = elapsed[order], values[order]
+    grid = np.arange(0, elapsed[-1] + step / 2, step)
+    return np.interp(grid, elapsed, values)
+
+
+def _stack(curves):
+    # Ragged curves into one (firings x grid) matrix, NaN after each firing ended
+    width = max((len(c) for c in curves), default=0)
+    matrix = np.full((len(curves), width), np.nan)
+    for row, curve in zip(matrix, curves):
+        row[:len(curve)] = curve
+    return matrix
+
+
+class FiringOverlay:
+    """Per-firing grid curves and per-selection bands, shared by all sessions.
+
+    Curves are loaded through a ``FiringCache`` and remember the firing
+    version they were built from, like the cache itself.
+    """
+
+    def __init__(self, cache, step=GRID_STEP_HOURS):
+        self.cache = cache
+        self.store = cache.store
+        self.step = step
+        self._curves = {}  # (kiln, firing_id, column) -> (version, curve)
+        self._bands = OrderedDict()  # (column, ((kiln, firing_id, version), ...)) -> bands frame
+        self._lock = threading.Lock()
+
+    def curve(self, kiln, firing_id, column="temp_front"):
+        key = (kiln, firing_id, column)
+        version = self.store.firing_version(kiln, firing_id)
+        with self._lock:
+            cached = self._curves.get(key)
+            if cached and cached[0] == version:
+                return cached[1]
+        df = self.cache.get(kiln, firing_id)
+        curve = elapsed_curve(df["time"], df[column], self.step) if column in df.columns else np.empty(0)
+        with self._lock:
+            self._curves[key] = (version, curve)
+        return curve
+
+    def bands(self, firings, column="temp_front"):
+        """Median and 10th-90th percentile of ``[(kiln, firing_id)]`` on the grid.
+
+        Returns a DataFrame indexed by ``hours`` with ``p10``, ``median``,
+        ``p90`` and ``firings`` (how many were still going at that hour).
+        """
+        selection = tuple(sorted((kiln, fid, self.store.firing_version(kiln, fid)) for kiln, fid in firings))
+        key = (column, selection)
+        with self._lock:
+            if key in self._bands:
+                self._bands.move_to_end(key)
+                return self._bands[key]
+        matrix = _stack([self.curve(kiln, fid, column) for kiln, fid, _ in selection])
+        counts = (~np.isnan(matrix)).sum(axis=0)
+        low, median, high = (np.full(matrix.shape[1], np.nan) for _ in BAND_PERCENTILES)
+        if counts.any():
+            live = counts > 0
+            low[live], median[live], high[live] = np.nanpercentile(matrix[:, live], BAND_PERCENTILES, axis=0)
+        bands = pd.DataFrame({"p10": low, "median": median, "p90": high, "firings": counts},
+                             index=pd.Index(np.arange(matrix.shape[1]) * self.step, name="hours"))
+        with self._lock:
+            self._bands[key] = bands
+            while len(self._bands) > BAND_CACHE:
+                self._bands.popitem(last=False)
+        return bands
+
+    def frame(self, firings, column="temp_front"):
+        """Each of ``[(kiln, firing_id)]`` as a column on the grid (for drawing individual lines)."""
+        curves = [self.curve(kiln, fid, column) for kiln, fid in firings]
+        matrix = _stack(curves)
+        return pd.DataFrame(matrix.T, columns=[f"{fid} ({kiln})" for kiln, fid in firings],
+                            index=pd.Index(np.arange(matrix.shape[1]) * self.step, name="hours"))
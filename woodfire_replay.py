@@ -0,0 +1,273 @@
+"""Replay an archived firing through the live app, faster than real time.
+
+For training: a past firing is played back into a new firing of a
+``<kiln> (replay)`` kiln, so a trainee can open it in the normal UI and
+watch the log, charts, cone map and wood tracker fill in at 10-100x. The
+source is streamed, never loaded whole: ``archive_records`` pages through the
+entries in time order and merges in the wood log and cone changes as it
+goes. Each record is written with the store's ordinary ``append_entries``,
+``append_wood`` and cone attachment, so cleaning, derived series, heat-work,
+phase segments, alarms and the kiln status all run exactly as for live data
+(which also makes a replay at full speed a decent end-to-end benchmark).
+
+Times are shifted so the replay starts now; the spacing between records is
+the original one, so rates and heat-work come out the same. A replay's
+firing is scratch: it is deleted when the trainee closes it. When a replay
+starts, ones nobody has looked at for ``KEEP_MINUTES`` since they finished
+are cleared away, and so are replay firings from an earlier run left that
+long untouched.
+"""
+import argparse
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+
+from woodfire_store import DEFAULT_DB_PATH, TIME_FORMAT, FiringStore, from_epoch, to_epoch
+
+SPEEDS = (10, 25, 50, 100)
+PAGE_SIZE = 200
+REPLAY_SUFFIX = " (replay)"
+KEEP_MINUTES = 60  # a finished replay outlasts its last viewer by this much, so a trainee can look it over
+
+
+def _entry_pages(store, kiln, firing_id, page_size):
+    after = None
+    while True:
+        page = store.entry_page(kiln, firing_id, after=after, limit=page_size)
+        yield from page
+        if len(page) < page_size:
+            return
+        after = (page[-1]["time"], page[-1]["id"])
+
+
+def _wood_pages(store, kiln, firing_id, page_size):
+    after = 0
+    while True:
+        page = store.wood_entries(kiln, firing_id, after=after, limit=page_size)
+        yield from (w for w in page if w.get("time"))
+        if len(page) < page_size:
+            return
+        after = page[-1]["id"]
+
+
+def archive_records(store, kiln, firing_id, page_size=PAGE_SIZE):
+    """Yield ``(kind, record)`` for a firing in time order: ``"entry"``, ``"wood"`` or ``"cone"``.
+
+    Entries come a page at a time off the ``(kiln, firing_id, time)`` index;
+    the wood log is paged by id (logged as it happened, so in time order).
+    """
+    streams = [
+        (("entry", e) for e in _entry_pages(store, kiln, firing_id, page_size)),
+        (("wood", w) for w in _wood_pages(store, kiln, firing_id, page_size)),
+        (("cone", c) for c in sorted(store.attachment(kiln, firing_id, "cone_events", []), key=lambda c: c["time"])),
+    ]
+    yield from heapq.merge(*streams, key=lambda record: record[1]["time"])
+
+
+def as_logged(entry):
+    """An archived entry as it came in: readings the cleaner masked get their raw value back."""
+    entry = {k: v for k, v in entry.items() if k not in ("id", "edited_by", "edited_at")}
+    for name in [k for k in entry if k.startswith("flag_")]:
+        sensor = name[5:]
+        entry.pop(name)
+        entry[sensor] = entry.pop(f"raw_{sensor}", entry.get(sensor))
+    return entry
+
+
+class Replay(threading.Thread):
+    """One firing played back into ``target`` at ``speed`` times real time (0 = as fast as possible)."""
+
+    def __init__(self, store, source, target, speed, heatwork=None, span=(0, 0)):
+        super().__init__(name=f"replay-{target[1]}", daemon=True)
+        self.store = store
+        self.source, self.target = source, target
+        self.heatwork = heatwork
+        self.span = span  # source start and end, epoch seconds, for ``progress``
+        self.played = 0
+        self.time = None  # source time of the last record played
+        self.error = None
+        self.last_used = time.monotonic()  # when it last played a record or a session asked for it
+        self._speed = speed
+        self._cones = []
+        self._anchor = None  # (monotonic, source time) the schedule runs from
+        self._source_t = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    @property
+    def speed(self):
+        return self._speed
+
+    def set_speed(self, speed):
+        with self._lock:
+            if self._anchor is not None:
+                # Carry on from the last record played rather than catching up on the old schedule
+                self._anchor = (time.monotonic(), self._source_t if self._source_t is not None else self._anchor[1])
+            self._speed = speed
+
+    @property
+    def running(self):
+        return self.is_alive() and not self._stopped.is_set()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _wait_for(self, t):
+        # Sleep until source time ``t`` is due, in short steps so stop and speed changes apply at once
+        while not self._stopped.is_set():
+            with self._lock:
+                if self._anchor is None or not self._speed:
+                    return
+                wall, source = self._anchor
+                due = wall + (t - source) / self._speed
+            delay = due - time.monotonic()
+            if delay <= 0:
+                return
+            self._stopped.wait(min(delay, 0.5))
+
+    def run(self):
+        offset = None
+        try:
+            for kind, record in archive_records(self.store, *self.source):
+                t = to_epoch(record["time"])
+                if offset is None:
+                    offset = to_epoch(datetime.now()) - t
+                    with self._lock:
+                        self._anchor = (time.monotonic(), t)
+                self._wait_for(t)
+                if self._stopped.is_set():
+                    return
+                self._play(kind, record, from_epoch(t + offset))
+                with self._lock:
+                    self._source_t = t
+                self.played += 1
+                self.time = record["time"]
+                self.last_used = time.monotonic()
+        except Exception as e:  # the replay stops; the app carries on
+            self.error = str(e)
+        finally:
+            self.last_used = time.monotonic()
+            self._stopped.set()
+
+    def _play(self, kind, record, when):
+        kiln, firing_id = self.target
+        if kind == "entry":
+            self.store.append_entries([dict(as_logged(record), kiln=kiln, firing_id=firing_id, time=when)])
+        elif kind == "wood":
+            wood = {k: v for k, v in record.items() if k != "id"}
+            self.store.append_wood([dict(wood, kiln=kiln, firing_id=firing_id, time=when)])
+        else:
+            event = {k: v for k, v in record.items() if k != "heatwork"}
+            self._cones.append(dict(event, time=when))
+            if self.heatwork is not None:
+                self._cones = self.heatwork.cone_events(kiln, firing_id, self._cones)
+            self.store.set_attachment(kiln, firing_id, "cone_events", self._cones)
+
+    def progress(self):
+        """Share of the source firing's span played so far, 0-1."""
+        start, end = self.span
+        if not self.time or not end or end <= start:
+            return 0.0
+        return min((to_epoch(self.time) - start) / (end - start), 1.0)
+
+
+class Replayer:
+    """The replays running in this process, by target firing."""
+
+    def __init__(self, store, heatwork=None):
+        self.store = store
+        self.heatwork = heatwork
+        self._replays = {}
+        self._lock = threading.Lock()
+
+    def start(self, kiln, firing_id, speed):
+        """Start replaying an archived firing; returns the ``(kiln, firing_id)`` it plays into."""
+        self._sweep()
+        summary = next((s for s in self.store.catalog() if (s["kiln"], s["firing_id"]) == (kiln, firing_id)), {})
+        start, end = summary.get("start_time"), summary.get("end_time")
+        with self._lock:
+            stamp, n = f"{firing_id}-{datetime.now():%H%M%S}", 1
+            target = (kiln + REPLAY_SUFFIX, stamp)
+            while target in self._replays or self.store.firing_version(*target):
+                # Another one started this second (finished replays stay a while, so they can meet)
+                n += 1
+                target = (kiln + REPLAY_SUFFIX, f"{stamp}-{n}")
+            replay = Replay(self.store, (kiln, firing_id), target, speed, self.heatwork,
+                            (to_epoch(start) if start else 0, to_epoch(end) if end else 0))
+            self._replays[target] = replay
+        replay.start()
+        return target
+
+    def get(self, kiln, firing_id):
+        """The replay playing into that firing; asking for it counts as someone still looking."""
+        with self._lock:
+            replay = self._replays.get((kiln, firing_id))
+        if replay is not None:
+            replay.last_used = time.monotonic()
+        return replay
+
+    def close(self, kiln, firing_id):
+        """Stop a replay and delete the firing it played into."""
+        with self._lock:
+            replay = self._replays.pop((kiln, firing_id), None)
+        if replay is not None:
+            replay.stop()
+            replay.join(timeout=5)  # so no record lands after the delete
+        self.store.delete_firing(kiln, firing_id)
+
+    def _sweep(self):
+        # Finished replays of ours nobody has asked for in a while, and leftovers from an earlier run.
+        # Anything a session may still be watching stays: it asks for its replay on every rerun
+        idle = time.monotonic() - KEEP_MINUTES * 60
+        with self._lock:
+            done = [target for target, replay in self._replays.items()
+                    if not replay.running and replay.last_used < idle]
+            for target in done:
+                del self._replays[target]
+            ours = set(self._replays)
+        for target in done:
+            self.store.delete_firing(*target)
+        untouched = (datetime.now() - timedelta(minutes=KEEP_MINUTES)).strftime(TIME_FORMAT)
+        for firing in self.store.firings(status="active"):
+            target = (firing["kiln"], firing["firing_id"])
+            if (firing["kiln"].endswith(REPLAY_SUFFIX) and target not in ours
+                    and (firing["updated_at"] or "") < untouched):
+                self.store.delete_firing(*target)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay an archived firing into a '<kiln> (replay)' firing, reporting write throughput.")
+    parser.add_argument("kiln")
+    parser.add_argument("firing_id")
+    parser.add_argument("--speed", type=float, default=0, help="times real time; 0 = as fast as possible")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--keep", action="store_true", help=f"keep the replayed firing (the app clears it away after {KEEP_MINUTES} min untouched)")
+    args = parser.parse_args(argv)
+
+    from woodfire_alarms import AlarmMonitor
+    from woodfire_derived import DerivedSeries
+    from woodfire_heatwork import HeatWork
+
+    store = FiringStore(args.db)
+    # The same listeners the app keeps, so every write costs what it would live
+    AlarmMonitor(store)
+    DerivedSeries(store)
+    heatwork = HeatWork(store)
+    replayer = Replayer(store, heatwork)
+    started = time.perf_counter()
+    target = replayer.start(args.kiln, args.firing_id, args.speed)
+    replay = replayer.get(*target)
+    replay.join()
+    seconds = time.perf_counter() - started
+    if not args.keep:
+        replayer.close(*target)
+    if replay.error:
+        raise SystemExit(f"Replay stopped: {replay.error}")
+    print(f"Replayed {replay.played} records into {target[0]} / {target[1]} in {seconds:.1f} s "
+          f"({replay.played / seconds if seconds else 0:.0f} records/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""Post-firing report as one self-contained HTML file.
+
+Temperature, control and wood charts, the phase table, the cone map, crew
+shifts, incidents and the weather over the firing. Charts are inline SVG
+with no scripts or CDN, so the file opens anywhere and prints cleanly.
+
+Each section is keyed by a digest of exactly the data it shows, and rendered
+sections are kept with the firing (as ``report:<section>`` attachments), so a
+rebuild after a late log edit redoes the temperature chart but reuses the
+crew table. ``ReportBuilder`` renders in a background thread and remembers
+the last report per firing, so re-opening an unchanged report is instant.
+
+Run it standalone with ``python woodfire_report.py KILN FIRING_ID -o report.html``.
+"""
+import argparse
+import hashlib
+import html
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from woodfire_store import DEFAULT_DB_PATH, FiringStore, to_epoch
+
+SECTIONS = {
+    "summary": "Summary",
+    "temperature": "Temperature",
+    "control": "Damper, Air & Atmosphere",
+    "wood": "Wood",
+    "phases": "Phases",
+    "cones": "Cone Map",
+    "crew": "Crew",
+    "incidents": "Incidents",
+    "weather": "Weather",
+}
+COLORS = ("#c0392b", "#e67e22", "#2980b9", "#7f8c8d", "#27ae60", "#8e44ad")
+ATMOSPHERE_COLORS = {"light_oxidation": "#f8c471", "oxidation": "#f39c12", "neutral": "#d5d8dc",
+                     "light_reduction": "#85c1e9", "reduction": "#3498db", "heavy_reduction": "#1f4e79"}
+CONE_COLORS = {"bent": "#e74c3c", "down": "#e74c3c", "overfired": "#e74c3c", "bending": "#f1c40f", "soft": "#f1c40f"}
+MAX_POINTS = 600  # per chart series; longer series keep each bucket's min and max
+REPORT_CACHE = 8  # assembled reports kept in memory across sessions
+
+STYLE = """
+body{font-family:system-ui,sans-serif;max-width:52em;margin:2em auto;color:#222}
+h1{margin-bottom:.1em}h2{border-bottom:2px solid #c0392b;padding-bottom:.2em;margin-top:2em}
+table{border-collapse:collapse;width:100%;font-size:.9em}td,th{border:1px solid #ddd;padding:.3em .5em;text-align:left}
+th{background:#f4f4f4}.muted{color:#888}.cone td{height:3.2em;vertical-align:top;font-size:.8em;width:12.5%}
+svg{width:100%;height:auto}section{page-break-inside:avoid}
+"""
+
+
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _esc(value):
+    return html.escape("" if value is None else str(value))
+
+
+def _table(headers, rows):
+    if not rows:
+        return '<p class="muted">None recorded.</p>'
+    head = "".join(f"<th>{_esc(h)}</th>" for h in headers)
+    body = "".join("<tr>" + "".join(f"<td>{_esc(v)}</td>" for v in row) + "</tr>" for row in rows)
+    return f"<table><tr>{head}</tr>{body}</table>"
+
+
+def _downsample(points):
+    if len(points) <= MAX_POINTS:
+        return points
+    size = len(points) / (MAX_POINTS // 2)
+    out = []
+    for b in range(MAX_POINTS // 2):
+        bucket = points[int(b * size):int((b + 1) * size)]
+        if bucket:
+            low, high = min(bucket, key=lambda p: p[1]), max(bucket, key=lambda p: p[1])
+            out.extend(sorted({low, high}))
+    return out
+
+
+def svg_chart(series, unit="°F", height=240):
+    """Inline SVG line chart of ``{name: [(epoch, value)]}`` against hours from the first point."""
+    series = {name: sorted(p for p in points if p[1] is not None) for name, points in series.items()}
+    series = {name: points for name, points in series.items() if points}
+    if not series:
+        return '<p class="muted">No data.</p>'
+    times = [t for points in series.values() for t, _ in points]
+    values = [v for points in series.values() for _, v in points]
+    t0, t1 = min(times), max(times)
+    low, high = min(values), max(values)
+    if high == low:
+        low, high = low - 1, high + 1
+    width, left, bottom, top = 760, 52, 26, 22
+    x = lambda t: left + (t - t0) / max(t1 - t0, 1) * (width - left - 10)
+    y = lambda v: top + (high - v) / (high - low) * (height - top - bottom)
+    parts = [f'<svg viewBox="0 0 {width} {height}" xmlns="http://www.w3.org/2000/svg" font-size="11">']
+    for i in range(5):
+        v = low + (high - low) * i / 4
+        parts.append(f'<line x1="{left}" x2="{width - 10}" y1="{y(v):.1f}" y2="{y(v):.1f}" stroke="#eee"/>'
+                     f'<text x="{left - 4}" y="{y(v) + 4:.1f}" text-anchor="end">{v:.0f}{_esc(unit)}</text>')
+    hours = (t1 - t0) / 3600
+    step = next((s for s in (1, 2, 4, 6, 12, 24, 48) if hours / s <= 8), 96)
+    for h in range(0, int(hours) + 1, step):
+        parts.append(f'<text x="{x(t0 + h * 3600):.1f}" y="{height - 8}" text-anchor="middle">{h}h</text>')
+    for i, (name, points) in enumerate(series.items()):
+        color = COLORS[i % len(COLORS)]
+        path = " ".join(f"{x(t):.1f},{y(v):.1f}" for t, v in _downsample(points))
+        parts.append(f'<polyline fill="none" stroke="{color}" stroke-width="1.5" points="{path}"/>'
+                     f'<text x="{left + 8 + i * 110}" y="12" fill="{color}">■ {_esc(name)}</text>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def _strip(runs, t0, t1, colors):
+    """SVG band of ``[(start, end, label)]``, for the atmosphere over time."""
+    width, left = 760, 52
+    x = lambda t: left + (t - t0) / max(t1 - t0, 1) * (width - left - 10)
+    parts = [f'<svg viewBox="0 0 {width} 40" xmlns="http://www.w3.org/2000/svg" font-size="11">']
+    for start, end, label in runs:
+        parts.append(f'<rect x="{x(start):.1f}" y="0" width="{max(x(end) - x(start), 1):.1f}" height="18" '
+                     f'fill="{colors.get(label, "#bbb")}"><title>{_esc(label)}</title></rect>')
+    for i, label in enumerate(dict.fromkeys(r[2] for r in runs)):
+        parts.append(f'<text x="{left + i * 130}" y="34" fill="{colors.get(label, "#888")}">■ {_esc(label)}</text>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+# Section renderers: each takes only the inputs its cache key was computed from
+def _render_summary(inputs):
+    s = inputs
+    rows = [("Start", s["start_time"]), ("End", s["end_time"]), ("Duration", f"{s['duration_hours'] or 0:.1f} hrs"),
+            ("Log entries", s["entry_count"]), ("Stokes", s["stoke_count"]), ("Incidents", s["incident_count"]),
+            ("Peak front / middle / back", " / ".join(f"{s[k] or '-'}" for k in ("peak_front", "peak_middle", "peak_back"))),
+            ("Peak stack", s["peak_stack"]), ("Wood pieces", s["wood_pieces"])]
+    return _table(("", ""), rows)
+
+
+def _render_temperature(rows):
+    times = [to_epoch(r[0]) for r in rows]
+    return svg_chart({name: list(zip(times, (r[i] for r in rows)))
+                      for i, name in enumerate(("Front", "Middle", "Back", "Stack"), start=1)})
+
+
+def _render_control(rows):
+    times = [to_epoch(r[0]) for r in rows]
+    chart = svg_chart({"Damper": list(zip(times, (r[1] for r in rows))),
+                       "Air intake": list(zip(times, (r[2] for r in rows)))}, unit="%", height=200)
+    runs = []
+    for t, (_, _, _, atmosphere) in zip(times, rows):
+        if runs and runs[-1][2] == atmosphere:
+            runs[-1][1] = t
+        else:
+            if runs:
+                runs[-1][1] = t
+            runs.append([t, t, atmosphere])
+    strip = _strip(runs, runs[0][0], runs[-1][1], ATMOSPHERE_COLORS) if runs else ""
+    return chart + strip
+
+
+def _render_wood(rows):
+    total, points, by_species = 0, [], {}
+    for time_, species, size, quantity, location in sorted(rows, key=lambda r: r[0] or ""):
+        if time_ is None:
+            continue
+        t = to_epoch(time_)
+        points.append((t, total))
+        total += quantity or 0
+        points.append((t, total))
+        by_species[species] = by_species.get(species, 0) + (quantity or 0)
+    chart = svg_chart({"Pieces (cumulative)": points}, unit="", height=200)
+    return chart + _table(("Species", "Pieces"), sorted(by_species.items(), key=lambda kv: -kv[1]))
+
+
+def _render_phases(segments):
+    return _table(("Phase", "Start", "End", "Hours", "°F start → end", "Gained", "Wood", "Entries", "Atmosphere"), [
+        (s["phase"], s["start_time"], s["end_time"], s["hours"], f"{s['start_temp'] or '-'} → {s['end_temp'] or '-'}",
+         s["temp_gained"], s["wood_pieces"], s["entries"], s["dominant_atmosphere"]) for s in segments])
+
+
+def _render_cones(cones):
+    cells = {}
+    for cone in cones:
+        cells.setdefault(cone["position"], []).append(cone)
+    rows = []
+    for r in range(6):
+        tds = []
+        for c in range(8):
+            here = cells.get(f"R{r + 1}C{c + 1}", [])
+            hottest = next((CONE_COLORS[x["status"]] for x in here if x["status"] in CONE_COLORS), "#fff")
+            text = "<br>".join(f"{_esc(x['cone_number'])}: {_esc(x['status'])}" for x in here)
+            tds.append(f'<td style="background:{hottest}"><span class="muted">R{r + 1}C{c + 1}</span><br>{text}</td>')
+        rows.append("<tr>" + "".join(tds) + "</tr>")
+    return f'<p class="muted">Front (C1) to back (C8)</p><table class="cone">{"".join(rows)}</table>'
+
+
+def _render_crew(inputs):
+    import pandas as pd
+
+    from woodfire_crew import ShiftIndex, shift_label
+
+    crew, log = inputs
+    shifts = ShiftIndex(crew)
+    if not len(shifts):
+        return _table(("Name", "Role"), [(m.get("name"), m.get("role")) for m in crew])
+    per_shift = shifts.entries_per_shift(pd.DataFrame(log, columns=["time", "logged_by"]))
+    return _table(("Name", "Role", "Shift", "Hours", "Entries logged"), [
+        (row["name"], row["role"], shift_label(row), f"{row['hours']:.1f}", row["entries_logged"])
+        for _, row in per_shift.iterrows()])
+
+
+def _render_incidents(rows):
+    return _table(("Time", "Reported by", "Action", "Notes"), rows)
+
+
+def _render_weather(rows):
+    if not rows:
+        return '<p class="muted">No weather samples over the firing.</p>'
+    chart = svg_chart({"Outside °F": [(r[0], r[1]) for r in rows], "Humidity %": [(r[0], r[2]) for r in rows]},
+                      unit="", height=200)
+    conditions = ", ".join(dict.fromkeys(r[6] for r in rows if r[6]))
+    return chart + f'<p>Conditions: {_esc(conditions) or "-"} · {len(rows)} samples</p>'
+
+
+RENDERERS = {
+    "summary": _render_summary, "temperature": _render_temperature, "control": _render_control,
+    "wood": _render_wood, "phases": _render_phases, "cones": _render_cones, "crew": _render_crew,
+    "incidents": _render_incidents, "weather": _render_weather,
+}
+
+
+def section_inputs(store, kiln, firing_id, crew=None, cones=None):
+    """The data behind every section, read once from the store."""
+    crew = store.attachment(kiln, firing_id, "crew", []) if crew is None else crew
+    cones = store.attachment(kiln, firing_id, "cones", []) if cones is None else cones
+    entries = sorted((e for e in store.entry_rows(kiln, firing_id) if e["time"]), key=lambda e: (e["time"], e["id"]))
+    # Incidents are logged with zeroed readings; they'd drag every chart to 0°F
+    readings = [e for e in entries if e["entry_type"] != "incident"]
+    summary = store.summary(kiln, firing_id)
+    summary.pop("computed_at", None)
+    weather = []
+    if summary["start_time"]:
+        weather = store.weather_rows(to_epoch(summary["start_time"]) - 1800, to_epoch(summary["end_time"]) + 1800)
+    return {
+        "summary": summary,
+        "temperature": [(e["time"], e["temp_front"], e["temp_middle"], e["temp_back"], e["temp_stack"]) for e in readings],
+        "control": [(e["time"], e["damper_position"], e["air_intake"], e["atmosphere"]) for e in readings],
+        "wood": [(w["time"], w["species"], w["size"], w["quantity"], w["location"])
+                 for w in store.wood_entries(kiln, firing_id)],
+        "phases": store.phase_segments(kiln, firing_id),
+        "cones": cones,
+        "crew": (crew, [(e["time"], e["logged_by"]) for e in entries]),
+        "incidents": [(e["time"], e["logged_by"], e["action_taken"], e["notes"])
+                      for e in entries if e["entry_type"] == "incident"],
+        "weather": [tuple(r) for r in weather],
+    }
+
+
+def build_report(store, kiln, firing_id, crew=None, cones=None):
+    """``(html, rendered, reused)``: the report, and which sections were redone or taken from the last build."""
+    inputs = section_inputs(store, kiln, firing_id, crew, cones)
+    parts, rendered, reused = [], [], []
+    for name, title in SECTIONS.items():
+        key = _digest(inputs[name])
+        cached = store.attachment(kiln, firing_id, f"report:{name}")
+        if cached and cached["key"] == key:
+            body = cached["html"]
+            reused.append(name)
+        else:
+            body = RENDERERS[name](inputs[name])
+            store.set_attachment(kiln, firing_id, f"report:{name}", {"key": key, "html": body})
+            rendered.append(name)
+        parts.append(f'<section id="{name}"><h2>{_esc(title)}</h2>{body}</section>')
+    generated = datetime.now().strftime("%Y-%m-%d %H:%M")
+    page = (f'<!doctype html><html><head><meta charset="utf-8"><title>{_esc(kiln)} {_esc(firing_id)} - WoodFirePro</title>'
+            f"<style>{STYLE}</style></head><body><h1>🔥 {_esc(kiln)} · {_esc(firing_id)}</h1>"
+            f'<p class="muted">WoodFirePro firing report · generated {generated}</p>{"".join(parts)}</body></html>')
+    return page, rendered, reused
+
+
+class ReportBuilder(threading.Thread):
+    """Builds reports in the background; ``request`` never waits on a build."""
+
+    def __init__(self, store):
+        super().__init__(name="report-builder", daemon=True)
+        self.store = store
+        self._reports = OrderedDict()  # (kiln, firing_id) -> last report dict
+        self._pending = {}  # (kiln, firing_id) -> (crew, cones, key) of the newest request
+        self._building = None
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def _key(self, kiln, firing_id, crew, cones):
+        # Anything that can change a section: the firing's version covers entries, wood and phases.
+        # Weather only matters inside the firing's window, which its section digest already covers;
+        # the latest sample would rebuild every cached report every few minutes
+        return self.store.firing_version(kiln, firing_id), _digest([crew, cones])
+
+    def request(self, kiln, firing_id, crew=None, cones=None):
+        """Queue a build unless the last report is current. Returns the last report (maybe stale) or None."""
+        key = self._key(kiln, firing_id, crew, cones)
+        with self._lock:
+            report = self._reports.get((kiln, firing_id))
+            if report and report["key"] == key:
+                self._reports.move_to_end((kiln, firing_id))
+                return report
+            if (kiln, firing_id) not in self._pending:
+                self._queue.put((kiln, firing_id))
+            self._pending[(kiln, firing_id)] = (crew, cones, key)
+        return report
+
+    def report(self, kiln, firing_id):
+        with self._lock:
+            return self._reports.get((kiln, firing_id))
+
+    def building(self, kiln, firing_id):
+        with self._lock:
+            return (kiln, firing_id) in self._pending or self._building == (kiln, firing_id)
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                firing = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            with self._lock:
+                crew, cones, key = self._pending.pop(firing)
+                self._building = firing
+            started = time.perf_counter()
+            try:
+                page, rendered, reused = build_report(self.store, *firing, crew, cones)
+                report = {"key": key, "html": page, "rendered": rendered, "reused": reused, "error": None}
+            except Exception as e:
+                report = {"key": None, "html": None, "rendered": [], "reused": [], "error": str(e)}
+            report.update(built_at=datetime.now().strftime("%H:%M:%S"), seconds=time.perf_counter() - started)
+            with self._lock:
+                previous = self._reports.get(firing)
+                if report["error"] and previous and previous["html"]:
+                    report["html"] = previous["html"]  # keep something to download
+                self._reports[firing] = report
+                self._reports.move_to_end(firing)
+                while len(self._reports) > REPORT_CACHE:
+                    self._reports.popitem(last=False)
+                self._building = None
+
+    def stop(self):
+        self._stopped.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a firing's report as a self-contained HTML file.")
+    parser.add_argument("kiln")
+    parser.add_argument("firing_id")
+    parser.add_argument("-o", "--output", help="default: <kiln>_<firing_id>_report.html")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    args = parser.parse_args(argv)
+    store = FiringStore(args.db)
+    page, rendered, reused = build_report(store, args.kiln, args.firing_id)
+    output = args.output or f"{args.kiln}_{args.firing_id}_report.html"
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(page)
+    print(f"Wrote {output} ({len(rendered)} sections rendered, {len(reused)} reused)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Typed log entry model with enum-coded categorical fields.
+
+A log entry used to be a ~25-key dict repeating the same few strings
+(atmosphere, phase, entry type, ...) in every row. ``LogEntry`` is a slotted
+dataclass whose low-cardinality fields hold shared enum members or interned
+strings, and ``entries_frame`` turns a list of them into a DataFrame with
+pandas ``Categorical`` columns. pandas is only imported once a frame is
+built, so Mobile Mode and the ingest server start without it.
+"""
+import sys
+from dataclasses import dataclass, fields
+from enum import Enum
+
+
+class _Category(str, Enum):
+    # Render as the plain value in f-strings and st.write, like the old strings did
+    __str__ = str.__str__
+    __format__ = str.__format__
+
+
+Phase = _Category("Phase", [(p, p) for p in (
+    "heating", "water_smoking", "dehydration", "body_reduction", "glaze_maturation", "flash", "cooling", "finished")])
+Atmosphere = _Category("Atmosphere", [(a, a) for a in (
+    "neutral", "light_oxidation", "oxidation", "light_reduction", "reduction", "heavy_reduction")] + [("na", "n/a")])
+EntryType = _Category("EntryType", [(t, t) for t in (
+    "observation", "stoke", "damper_change", "door_brick", "problem", "milestone", "shift_change",
+    "incident", "mobile_quick")])
+FuelType = _Category("FuelType", [(f.replace("+", "_and_"), f) for f in (
+    "wood_only", "gas_only", "wood+gas", "coasting")] + [("na", "n/a")])
+WeatherImpact = _Category("WeatherImpact", [(w, w) for w in (
+    "none", "helping_draft", "hindering_draft", "affecting_heat", "other")])
+
+PHASES = [p.value for p in Phase]
+ATMOSPHERES = [a.value for a in Atmosphere if a is not Atmosphere.na]
+MOBILE_ATMOSPHERES = ["oxidation", "neutral", "reduction", "heavy_reduction"]
+ENTRY_TYPES = [t.value for t in EntryType if t not in (EntryType.incident, EntryType.mobile_quick)]
+FUEL_TYPES = [f.value for f in FuelType if f is not FuelType.na]
+WEATHER_IMPACTS = [w.value for w in WeatherImpact]
+
+# Categorical fields: enum-coded ones have a fixed category order, the rest
+# (names, ids) are open-ended but still repeat on every row
+ENUM_FIELDS = {
+    "phase": Phase,
+    "atmosphere": Atmosphere,
+    "entry_type": EntryType,
+    "fuel_type": FuelType,
+    "weather_impact": WeatherImpact,
+}
+INTERNED_FIELDS = ("kiln", "firing_id", "logged_by", "edited_by")
+NUMERIC_FIELDS = ("temp_front", "temp_middle", "temp_back", "temp_stack", "damper_position", "air_intake")
+
+
+def _coerce(enum, value):
+    # Values from old CSVs that aren't in the enum are kept as (interned) strings
+    if value is None or isinstance(value, enum):
+        return value
+    try:
+        return enum(value)
+    except ValueError:
+        return sys.intern(str(value))
+
+
+@dataclass(slots=True)
+class LogEntry:
+    kiln: str
+    firing_id: str
+    time: str
+    logged_by: str | None = None
+    phase: Phase | str | None = None
+    entry_type: EntryType | str | None = None
+    temp_front: float | None = None
+    temp_middle: float | None = None
+    temp_back: float | None = None
+    temp_stack: float | None = None
+    atmosphere: Atmosphere | str | None = None
+    damper_position: float | None = None
+    air_intake: float | None = None
+    fuel_type: FuelType | str | None = None
+    flame_color: str | None = None
+    spy_color: str | None = None
+    draft_sound: str | None = None
+    action_taken: str | None = None
+    notes: str | None = None
+    weather_impact: WeatherImpact | str | None = None
+    edited_by: str | None = None
+    edited_at: str | None = None
+    id: int | None = None
+    extra: dict | None = None  # imported columns outside the schema
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        values = {name: data.pop(name) for name in FIELD_NAMES if name in data and name != "extra"}
+        for name, enum in ENUM_FIELDS.items():
+            values[name] = _coerce(enum, values.get(name))
+        for name in INTERNED_FIELDS:
+            if values.get(name) is not None:
+                values[name] = sys.intern(str(values[name]))
+        data.pop("extra", None)
+        return cls(**{"kiln": "", "firing_id": "", "time": "", **values}, extra=data or None)
+
+    def to_dict(self):
+        """Plain dict (enum values as strings), skipping unset fields."""
+        data = {}
+        for name in FIELD_NAMES[:-1]:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value.value if isinstance(value, Enum) else value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def get(self, name, default=None):
+        value = getattr(self, name, None) if name in FIELD_NAMES else (self.extra or {}).get(name)
+        return default if value is None else value
+
+
+FIELD_NAMES = tuple(f.name for f in fields(LogEntry))
+
+
+def _categorical(values, enum=None):
+    import pandas as pd
+    known = [m.value for m in enum] if enum else []
+    raw = [None if v is None or v != v else v.value if isinstance(v, Enum) else v for v in values]
+    unseen = sorted({v for v in raw if v is not None} - set(known))
+    return pd.Categorical(raw, categories=known + unseen)
+
+
+def entries_frame(entries):
+    """DataFrame of ``LogEntry`` objects with categorical columns for the enum fields."""
+    import pandas as pd
+    columns = {name: [getattr(e, name) for e in entries] for name in FIELD_NAMES[:-1]}
+    for name in NUMERIC_FIELDS:
+        # A column nobody filled in (e.g. only quick entries) should still be numeric
+        if all(v is None for v in columns[name]):
+            columns[name] = pd.Series(columns[name], dtype=float)
+    for name, enum in ENUM_FIELDS.items():
+        columns[name] = _categorical(columns[name], enum)
+    for name in INTERNED_FIELDS:
+        columns[name] = pd.Categorical(columns[name])
+    df = pd.DataFrame(columns)
+    extras = [e.extra or {} for e in entries]
+    if any(extras):
+        df = df.join(pd.DataFrame(extras, index=df.index))
+    return df
@@ -0,0 +1,268 @@
+"""Live pyrometer samples from a separate acquisition process.
+
+Reading a serial pyrometer blocks, and the Streamlit script thread has far
+better things to do. ``acquire`` runs in its own process (``python
+woodfire_sensors.py``, which ``SensorFeed.start`` launches from the app)
+and writes every sample into ``SampleRing``, a ring buffer in a memory-mapped
+file. The app maps the same file and reads the latest window as NumPy views
+of it: no copy, no pipe, no lock, and the two processes never share a GIL.
+
+Layout: an int64 header, then rows of float64 ``(time, channel...)``. Each
+row is written twice, at ``i`` and ``i + capacity``, so any window of up to
+``capacity`` rows is one contiguous slice. There is a single writer; it
+fills a row, then bumps ``count``, so a reader only ever sees whole rows. A
+view stays valid until the writer comes round again, ``capacity - n`` samples
+later (hours at the default rate), so take what you need and let it go.
+"""
+import argparse
+import atexit
+import importlib.util
+import math
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from woodfire_store import DEFAULT_DB_PATH, to_epoch
+
+SENSORS = ("temp_front", "temp_middle", "temp_back", "temp_stack")
+CAPACITY = 65536  # rows; about 18 hours at one sample a second
+SAMPLE_SECONDS = 1.0
+DEFAULT_RING_PATH = os.environ.get("WOODFIREPRO_SENSOR_RING", os.path.splitext(DEFAULT_DB_PATH)[0] + ".ring")
+MAGIC = 0x57465052  # "WFPR"
+HEADER = 8  # int64s: magic, capacity, channels, count, started, pid, spare, spare
+_MAGIC, _CAPACITY, _CHANNELS, _COUNT, _STARTED, _PID = range(6)
+
+
+class SampleRing:
+    """A memory-mapped ring of ``(time, channels...)`` float64 rows; one writer, any number of readers."""
+
+    def __init__(self, path=DEFAULT_RING_PATH, channels=len(SENSORS), capacity=CAPACITY, create=False):
+        self.path = path
+        if create:
+            self._create(channels, capacity)
+        header = np.memmap(path, dtype=np.int64, mode="r", shape=(HEADER,))
+        if header[_MAGIC] != MAGIC:
+            raise ValueError(f"{path} is not a sample ring")
+        self.capacity, self.channels = int(header[_CAPACITY]), int(header[_CHANNELS])
+        del header
+        self._map = np.memmap(path, dtype=np.int64, mode="r+" if create else "r",
+                              shape=(HEADER + 2 * self.capacity * (1 + self.channels),))
+        self._header = self._map[:HEADER]
+        self._rows = self._map[HEADER:].view(np.float64).reshape(2 * self.capacity, 1 + self.channels)
+        self.inode = os.stat(path).st_ino
+
+    def _create(self, channels, capacity):
+        size = 8 * (HEADER + 2 * capacity * (1 + channels))
+        if os.path.exists(self.path) and os.path.getsize(self.path) == size:
+            # Same shape: reset in place, so a reader already mapping the file just sees the count restart
+            header = np.memmap(self.path, dtype=np.int64, mode="r+", shape=(HEADER,))
+        else:
+            # Build it aside and swap it in; a reader's old mapping stays valid until it re-attaches
+            scratch = f"{self.path}.{os.getpid()}"
+            header = np.memmap(scratch, dtype=np.int64, mode="w+", shape=(size // 8,))[:HEADER]
+        header[_COUNT] = 0
+        header[_MAGIC], header[_CAPACITY], header[_CHANNELS] = MAGIC, capacity, channels
+        header[_STARTED], header[_PID] = int(time.time()), os.getpid()
+        header.flush()
+        del header
+        if not os.path.exists(self.path) or os.path.getsize(self.path) != size:
+            os.replace(f"{self.path}.{os.getpid()}", self.path)
+
+    @property
+    def count(self):
+        """Samples written since the ring was created."""
+        return int(self._header[_COUNT])
+
+    @property
+    def writer_pid(self):
+        return int(self._header[_PID])
+
+    def append(self, t, values):
+        count = int(self._header[_COUNT])
+        i = count % self.capacity
+        self._rows[i, 0] = self._rows[i + self.capacity, 0] = t
+        self._rows[i, 1:] = self._rows[i + self.capacity, 1:] = values
+        self._header[_COUNT] = count + 1  # after the row, so readers never see half of one
+
+    def latest(self, n):
+        """``(times, values)`` of the last ``n`` samples, oldest first, as views of the ring.
+
+        ``times`` is local epoch seconds (like ``to_epoch`` of a log time),
+        ``values`` is ``(n, channels)``.
+        """
+        count = self.count
+        n = min(n, count, self.capacity)
+        start = (count - n) % self.capacity
+        window = self._rows[start:start + n]
+        return window[:, 0], window[:, 1:]
+
+    def since(self, count):
+        """``(times, values, new_count)`` of the samples written after ``count`` (at most ``capacity``)."""
+        now = self.count
+        times, values = self.latest(min(now - count, self.capacity) if now >= count else now)
+        return times, values, now
+
+    def close(self):
+        del self._header, self._rows
+        self._map._mmap.close()
+
+
+def _simulated(channels):
+    # A slow climb with some noise, for trying the feed out without a pyrometer
+    started = time.monotonic()
+    def read():
+        hours = (time.monotonic() - started) / 3600
+        level = 70 + 250 * hours + 40 * math.sin(hours * 6)
+        return [level - 15 * c + random.gauss(0, 3) for c in range(channels)]
+    return read
+
+
+def _serial(port, channels):
+    # One line per sample from the pyrometer: comma-separated °F, one per channel
+    try:
+        import serial
+    except ImportError:
+        raise RuntimeError("Reading a serial pyrometer needs pyserial: pip install pyserial")
+    device, _, baud = port.partition("@")
+    connection = serial.Serial(device, int(baud or 9600), timeout=SAMPLE_SECONDS * 2)
+    def read():
+        fields = connection.readline().decode("ascii", "replace").strip().split(",")
+        values = []
+        for c in range(channels):
+            try:
+                values.append(float(fields[c]))
+            except (IndexError, ValueError):
+                values.append(math.nan)  # a dropped channel; the log's cleaner deals with the rest
+        return values
+    return read
+
+
+def open_source(source, channels=len(SENSORS)):
+    """A ``read()`` returning one sample: ``"sim"`` or ``"serial:<device>[@baud]"``."""
+    if source == "sim":
+        return _simulated(channels)
+    if source.startswith("serial:"):
+        return _serial(source[len("serial:"):], channels)
+    raise ValueError(f"Unknown sensor source {source!r} (use 'sim' or 'serial:/dev/ttyUSB0@9600')")
+
+
+def acquire(path, source, channels=len(SENSORS), interval=SAMPLE_SECONDS, stop=None, parent=None):
+    """Read ``source`` every ``interval`` seconds into the ring at ``path`` until ``stop`` (an Event) is set,
+    or until process ``parent`` has gone (we get re-parented when it dies)."""
+    ring = SampleRing(path, channels, create=True)
+    read = open_source(source, channels)
+    local = to_epoch(datetime.now()) - time.time()  # log times are local clock readings
+    due = time.monotonic()
+    try:
+        while (stop is None or not stop.is_set()) and (parent is None or os.getppid() == parent):
+            ring.append(time.time() + local, read())
+            due += interval
+            time.sleep(max(due - time.monotonic(), 0))
+    finally:
+        ring.close()
+
+
+class SensorFeed:
+    """The app's side: starts and stops the acquisition process and reads its ring."""
+
+    def __init__(self, path=DEFAULT_RING_PATH):
+        self.path = path
+        self.source = None
+        self._process = None
+        self._ring = None
+        atexit.register(self.stop)  # don't leave the acquisition process behind when the app exits
+
+    def start(self, source, interval=SAMPLE_SECONDS):
+        # Fail here, where the app can show it, rather than in the child's stderr
+        if source != "sim" and not source.startswith("serial:"):
+            raise ValueError(f"Unknown sensor source {source!r} (use 'sim' or 'serial:/dev/ttyUSB0@9600')")
+        if source.startswith("serial:") and importlib.util.find_spec("serial") is None:
+            raise RuntimeError("Reading a serial pyrometer needs pyserial: pip install pyserial")
+        self.stop()
+        # The same command as running it by hand: a fresh interpreter that shares nothing with Streamlit
+        self._process = subprocess.Popen([sys.executable, os.path.abspath(__file__), source,
+                                          "--ring", self.path, "--interval", str(interval),
+                                          "--parent", str(os.getpid())])
+        self.source = source
+
+    def stop(self):
+        if self.running:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        self._process = None
+
+    @property
+    def running(self):
+        return self._process is not None and self._process.poll() is None
+
+    def age(self):
+        """Seconds since the newest sample (from this app's process or one started on its own), or None."""
+        times, _ = self.latest(0)
+        return to_epoch(datetime.now()) - times[-1] if len(times) else None
+
+    @property
+    def exitcode(self):
+        return self._process.poll() if self._process is not None else None
+
+    def ring(self):
+        """The ring, mapped on first use and re-mapped if a new writer replaced the file; None if there is none."""
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return None
+        if self._ring is None or self._ring.inode != inode:
+            try:
+                self._ring = SampleRing(self.path)
+            except (ValueError, OSError):
+                return None  # being created right now
+        return self._ring
+
+    def latest(self, seconds):
+        """``(times, values)`` views of the samples from the last ``seconds``, oldest first."""
+        ring = self.ring()
+        if ring is None:
+            return np.empty(0), np.empty((0, len(SENSORS)))
+        times, values = ring.latest(ring.capacity - 1)  # one short of full, so the next write lands outside it
+        if not len(times):
+            return times, values
+        first = np.searchsorted(times, times[-1] - seconds)  # times are in order, so this slices, not copies
+        return times[first:], values[first:]
+
+    def reading(self, seconds=60):
+        """Median of each channel over the last ``seconds``, as log entry fields (None where there is nothing)."""
+        _, values = self.latest(seconds)
+        if not len(values):
+            return {}
+        reading = {}
+        for name, column in zip(SENSORS, values.T):
+            column = column[~np.isnan(column)]
+            reading[name] = round(float(np.median(column))) if len(column) else None
+        return reading
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read pyrometers into the ring buffer the app shows live.")
+    parser.add_argument("source", help="'sim', or 'serial:<device>[@baud]' e.g. serial:/dev/ttyUSB0@9600")
+    parser.add_argument("--ring", default=DEFAULT_RING_PATH)
+    parser.add_argument("--interval", type=float, default=SAMPLE_SECONDS, help="seconds between samples")
+    parser.add_argument("--parent", type=int, help="exit when this process does (set by SensorFeed.start)")
+    args = parser.parse_args(argv)
+    print(f"Writing {args.source} to {args.ring} every {args.interval:g} s (Ctrl-C to stop)")
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # SensorFeed.stop
+    try:
+        acquire(args.ring, args.source, interval=args.interval, parent=args.parent)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
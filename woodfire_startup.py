@@ -0,0 +1,100 @@
+"""Cold-start budget for the app.
+
+Run ``python woodfire_startup.py`` after touching imports or startup code. It
+reports ``python -X importtime`` for the modules the app loads before it
+renders, and times a headless first run of ``woodfirepro.py`` in Mobile Mode
+and in the desktop layout, each in a fresh interpreter against a scratch
+database. Exits non-zero when anything is over budget or when Mobile Mode
+pulled in pandas.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(HERE, "woodfirepro.py")
+# What every session imports before the first widget, pandas-free
+STARTUP_MODULES = ("woodfire_alarms", "woodfire_api", "woodfire_bundle", "woodfire_cleaning", "woodfire_derived",
+                   "woodfire_field", "woodfire_heatwork", "woodfire_replay", "woodfire_report", "woodfire_schema",
+                   "woodfire_store", "woodfire_weather")
+HEAVY_MODULES = ("pandas", "numpy", "altair", "requests")
+
+# Budgets in milliseconds. Streamlit's own import (~0.5 s) is reported but not ours to budget.
+IMPORT_BUDGET_MS = 100
+FIRST_RUN_BUDGET_MS = {"mobile": 1500, "desktop": 4000}
+
+FIRST_RUN = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+started = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.session_state["mobile_mode"] = {mobile!r}
+at.run()
+print(json.dumps({{
+    "ms": (time.perf_counter() - started) * 1000,
+    "errors": [str(e.value) for e in at.exception],
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def import_times(modules=STARTUP_MODULES):
+    """Cumulative import time (ms) of each top-level import, and every module pulled in on the way."""
+    # Streamlit goes first so its cost isn't charged to whichever of ours imports it
+    code = "import streamlit; import " + ", ".join(modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=HERE,
+                            capture_output=True, text=True, check=True)
+    times, loaded = {}, set()
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( +)(\S+)", line)
+        if match:
+            loaded.add(match[3].split(".")[0])
+            if len(match[2]) == 1:  # deeper imports are indented under their importer
+                times[match[3]] = int(match[1]) / 1000
+    return times, loaded
+
+
+def first_run(mode, db_dir):
+    """Headless first rerun of the app in ``mode`` ("mobile" or "desktop") in a fresh interpreter."""
+    code = FIRST_RUN.format(app=APP, mobile=mode == "mobile", heavy=HEAVY_MODULES)
+    env = dict(os.environ, WOODFIREPRO_DB=os.path.join(db_dir, f"{mode}.db"))
+    result = subprocess.run([sys.executable, "-c", code], cwd=HERE, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    failures = []
+    times, loaded = import_times()
+    ours = sum(ms for name, ms in times.items() if name in STARTUP_MODULES)
+    print(f"streamlit import: {times.get('streamlit', 0):.0f} ms")
+    for name in STARTUP_MODULES:
+        print(f"  {name}: {times.get(name, 0):.1f} ms")
+    print(f"app modules: {ours:.0f} ms (budget {IMPORT_BUDGET_MS} ms)")
+    if ours > IMPORT_BUDGET_MS:
+        failures.append(f"app module imports took {ours:.0f} ms")
+    heavy = [m for m in HEAVY_MODULES if m in loaded]
+    if heavy:
+        failures.append(f"startup modules import {', '.join(heavy)}")
+
+    with tempfile.TemporaryDirectory() as db_dir:
+        for mode, budget in FIRST_RUN_BUDGET_MS.items():
+            run = first_run(mode, db_dir)
+            print(f"{mode} first run: {run['ms']:.0f} ms (budget {budget} ms), loaded {', '.join(run['heavy']) or 'nothing heavy'}")
+            if run["errors"]:
+                failures.append(f"{mode} run raised: {run['errors']}")
+            if run["ms"] > budget:
+                failures.append(f"{mode} first run took {run['ms']:.0f} ms")
+            if mode == "mobile" and "pandas" in run["heavy"]:
+                failures.append("Mobile Mode imported pandas")
+
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
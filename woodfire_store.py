@@ -0,0 +1,1256 @@
+"""SQLite storage shared by every WoodFirePro session in the process.
+
+Streamlit session state only lives as long as a browser tab, so anything that
+has to be recorded between reruns (or by background threads) goes here.
+
+The firing log is event-sourced: every create, edit and delete (tombstone) is
+appended to ``entry_events`` and applied to ``entries``, the materialized
+current view. Entries keep their id for life, deletes just flag the row, and
+undo/redo replay events backwards or forwards. Old events are compacted away
+periodically, which also purges long-deleted rows.
+"""
+import calendar
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from woodfire_cleaning import HAMPEL_WINDOW, STUCK_READINGS, SensorCleaner, raw_readings
+from woodfire_schema import LogEntry
+
+DEFAULT_DB_PATH = os.environ.get(
+    "WOODFIREPRO_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "woodfirepro.db"),
+)
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weather_samples (
+    t REAL PRIMARY KEY,
+    temperature REAL,
+    humidity REAL,
+    pressure REAL,
+    wind_speed REAL,
+    wind_direction TEXT,
+    conditions TEXT,
+    source TEXT
+);
+
+CREATE TABLE IF NOT EXISTS firings (
+    kiln TEXT NOT NULL,
+    firing_id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'active',
+    created_at TEXT,
+    updated_at TEXT,
+    archived_at TEXT,
+    version INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kiln, firing_id)
+);
+
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    client_id TEXT UNIQUE,
+    kiln TEXT NOT NULL,
+    firing_id TEXT NOT NULL,
+    time TEXT,
+    logged_by TEXT,
+    phase TEXT,
+    entry_type TEXT,
+    temp_front NUMERIC,
+    temp_middle NUMERIC,
+    temp_back NUMERIC,
+    temp_stack NUMERIC,
+    atmosphere TEXT,
+    damper_position NUMERIC,
+    air_intake NUMERIC,
+    fuel_type TEXT,
+    flame_color TEXT,
+    spy_color TEXT,
+    draft_sound TEXT,
+    action_taken TEXT,
+    notes TEXT,
+    weather_impact TEXT,
+    edited_by TEXT,
+    edited_at TEXT,
+    extra TEXT,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_firing ON entries (kiln, firing_id, time);
+-- Keyset pages in entry_rows walk this instead of sorting the whole firing per page
+CREATE INDEX IF NOT EXISTS entries_firing_id ON entries (kiln, firing_id, id);
+
+CREATE TABLE IF NOT EXISTS entry_events (
+    seq INTEGER PRIMARY KEY,
+    kiln TEXT NOT NULL,
+    firing_id TEXT NOT NULL,
+    entry_id INTEGER NOT NULL,
+    op TEXT NOT NULL,
+    data TEXT,
+    before TEXT,
+    actor TEXT,
+    at TEXT
+);
+CREATE INDEX IF NOT EXISTS entry_events_firing ON entry_events (kiln, firing_id, seq);
+
+CREATE TABLE IF NOT EXISTS wood_entries (
+    id INTEGER PRIMARY KEY,
+    kiln TEXT NOT NULL,
+    firing_id TEXT NOT NULL,
+    time TEXT,
+    logged_by TEXT,
+    species TEXT,
+    size TEXT,
+    quantity INTEGER,
+    location TEXT,
+    notes TEXT
+);
+CREATE INDEX IF NOT EXISTS wood_firing ON wood_entries (kiln, firing_id, time);
+
+-- One summary row per archived firing, so history views never rescan logs
+CREATE TABLE IF NOT EXISTS firing_catalog (
+    kiln TEXT NOT NULL,
+    firing_id TEXT NOT NULL,
+    start_time TEXT,
+    end_time TEXT,
+    duration_hours REAL,
+    entry_count INTEGER,
+    stoke_count INTEGER,
+    incident_count INTEGER,
+    peak_front REAL,
+    peak_middle REAL,
+    peak_back REAL,
+    peak_stack REAL,
+    wood_pieces INTEGER,
+    wood_entries INTEGER,
+    phase_timings TEXT,
+    final_actions TEXT,
+    computed_at TEXT,
+    atmosphere_counts TEXT,
+    PRIMARY KEY (kiln, firing_id)
+);
+
+-- Series derived from each entry (climb rates, evenness), kept up to date on append
+CREATE TABLE IF NOT EXISTS entry_derived (
+    entry_id INTEGER PRIMARY KEY,
+    kiln TEXT NOT NULL,
+    firing_id TEXT NOT NULL,
+    time TEXT,
+    rate_front REAL,
+    rate_middle REAL,
+    rate_back REAL,
+    rate_stack REAL,
+    front_back REAL,
+    front_middle REAL,
+    stack_ratio REAL
+);
+CREATE INDEX IF NOT EXISTS entry_derived_firing ON entry_derived (kiln, firing_id, time);
+
+-- Running heat-work after each entry (per sensor and cone map position), as JSON
+CREATE TABLE IF NOT EXISTS entry_heatwork (
+    entry_id INTEGER PRIMARY KEY,
+    kiln TEXT NOT NULL,
+    firing_id TEXT NOT NULL,
+    time TEXT,
+    state TEXT
+);
+CREATE INDEX IF NOT EXISTS entry_heatwork_firing ON entry_heatwork (kiln, firing_id, time);
+
+-- One row per run of consecutive entries in the same phase, kept up to date on write
+CREATE TABLE IF NOT EXISTS phase_segments (
+    kiln TEXT NOT NULL,
+    firing_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    phase TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    hours REAL,
+    start_temp REAL,
+    end_temp REAL,
+    temp_gained REAL,
+    wood_pieces INTEGER,
+    entries INTEGER,
+    atmosphere_counts TEXT,
+    dominant_atmosphere TEXT,
+    PRIMARY KEY (kiln, firing_id, seq)
+);
+
+-- Each kiln's latest readings, phase and stoke from its most recent firing, kept
+-- up to date on write so the fleet overview never reads a log
+CREATE TABLE IF NOT EXISTS kiln_status (
+    kiln TEXT PRIMARY KEY,
+    firing_id TEXT NOT NULL,
+    last_time TEXT,
+    phase TEXT,
+    atmosphere TEXT,
+    logged_by TEXT,
+    temp_front NUMERIC,
+    temp_middle NUMERIC,
+    temp_back NUMERIC,
+    temp_stack NUMERIC,
+    last_stoke TEXT
+);
+
+-- Kiln-master-defined alarms, per kiln so they carry over between firings
+CREATE TABLE IF NOT EXISTS alarms (
+    id INTEGER PRIMARY KEY,
+    kiln TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    threshold REAL,
+    minutes REAL,
+    created_by TEXT,
+    created_at TEXT
+);
+
+-- Counters that only go up: 'data' on every write or delete, 'archive' when the archive changes.
+-- A firing's version is the 'data' count of its last write, so it never repeats either
+CREATE TABLE IF NOT EXISTS store_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+
+-- Crew, cone map, safety checklist etc. kept with an archived firing as JSON
+CREATE TABLE IF NOT EXISTS firing_attachments (
+    kiln TEXT NOT NULL,
+    firing_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    data TEXT,
+    PRIMARY KEY (kiln, firing_id, name)
+);
+
+-- Full-text index over the free-text fields, kept in step with entries by triggers
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    action_taken, notes, flame_color, spy_color, draft_sound,
+    content='entries', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS entries_fts_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, action_taken, notes, flame_color, spy_color, draft_sound)
+    VALUES (new.id, new.action_taken, new.notes, new.flame_color, new.spy_color, new.draft_sound);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_fts_delete AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, action_taken, notes, flame_color, spy_color, draft_sound)
+    VALUES ('delete', old.id, old.action_taken, old.notes, old.flame_color, old.spy_color, old.draft_sound);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_fts_update
+AFTER UPDATE OF action_taken, notes, flame_color, spy_color, draft_sound ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, action_taken, notes, flame_color, spy_color, draft_sound)
+    VALUES ('delete', old.id, old.action_taken, old.notes, old.flame_color, old.spy_color, old.draft_sound);
+    INSERT INTO entries_fts (rowid, action_taken, notes, flame_color, spy_color, draft_sound)
+    VALUES (new.id, new.action_taken, new.notes, new.flame_color, new.spy_color, new.draft_sound);
+END;
+"""
+
+# Columns added after a table was first released: (table, column, declaration)
+ADDED_COLUMNS = [
+    ("firings", "archived_at", "TEXT"),
+    ("entries", "deleted", "INTEGER NOT NULL DEFAULT 0"),
+    ("firing_catalog", "atmosphere_counts", "TEXT"),
+]
+
+# Compact a firing's event stream once it has COMPACT_EVERY events beyond the last
+# KEEP_EVENTS (the undo depth), counted per firing
+COMPACT_EVERY = 1000
+KEEP_EVENTS = 200
+
+# How each event op changes the view, and which op reverses it
+INVERSE_OPS = {"create": "tombstone", "tombstone": "restore", "restore": "tombstone", "edit": "edit"}
+
+WOOD_COLUMNS = ("kiln", "firing_id", "time", "logged_by", "species", "size", "quantity", "location", "notes")
+CATALOG_COLUMNS = (
+    "kiln", "firing_id", "start_time", "end_time", "duration_hours",
+    "entry_count", "stoke_count", "incident_count",
+    "peak_front", "peak_middle", "peak_back", "peak_stack",
+    "wood_pieces", "wood_entries", "phase_timings", "final_actions", "computed_at",
+    "atmosphere_counts",
+)
+DERIVED_COLUMNS = (
+    "time", "rate_front", "rate_middle", "rate_back", "rate_stack", "front_back", "front_middle", "stack_ratio",
+)
+KILN_STATUS_COLUMNS = (
+    "kiln", "firing_id", "last_time", "phase", "atmosphere", "logged_by",
+    "temp_front", "temp_middle", "temp_back", "temp_stack", "last_stoke",
+)
+SEGMENT_COLUMNS = (
+    "seq", "phase", "start_time", "end_time", "hours", "start_temp", "end_temp", "temp_gained",
+    "wood_pieces", "entries", "atmosphere_counts", "dominant_atmosphere",
+)
+CATALOG_JSON = ("phase_timings", "final_actions", "atmosphere_counts")
+
+# Log entry fields with their own column; anything else rides along in ``extra``
+ENTRY_COLUMNS = (
+    "kiln", "firing_id", "time", "logged_by", "phase", "entry_type",
+    "temp_front", "temp_middle", "temp_back", "temp_stack",
+    "atmosphere", "damper_position", "air_intake", "fuel_type",
+    "flame_color", "spy_color", "draft_sound", "action_taken", "notes",
+    "weather_impact", "edited_by", "edited_at",
+)
+
+
+def to_epoch(value):
+    """Seconds for a naive timestamp (string or datetime), treating it as UTC.
+
+    Log times are naive local strings; reading them as UTC keeps the numbers
+    consistent with ``pd.to_datetime(...).astype("int64")`` on the same text.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value[:19])  # C-fast, and reads TIME_FORMAT exactly
+        except ValueError:
+            value = datetime.strptime(value[:19], TIME_FORMAT)
+    return calendar.timegm(value.timetuple())
+
+
+def from_epoch(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime(TIME_FORMAT)
+
+
+def _same(value, expected):
+    # NUMERIC columns store "1200" as 1200, so compare numbers as numbers
+    if value == expected:
+        return True
+    try:
+        return float(value) == float(expected)
+    except (TypeError, ValueError):
+        return False
+
+
+class FiringStore:
+    def __init__(self, path=DEFAULT_DB_PATH, clean=True):
+        self.path = path
+        # Readings are cleaned on the way in, whichever server appended them
+        self.cleaner = SensorCleaner() if clean else None
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._listeners = []
+        self._event_counts = {}  # (kiln, firing_id) -> events in its stream, counted from the first write
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # WAL keeps the database consistent on power loss; NORMAL just may
+            # lose the last few commits, which keeps an entry insert ~1 ms
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            had_fts = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'entries_fts'").fetchone()
+            self._conn.executescript(SCHEMA)
+            for table, column, declaration in ADDED_COLUMNS:
+                existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+            # Databases from before the counters: start past every firing's version
+            self._conn.execute("INSERT OR IGNORE INTO store_versions SELECT 'data', COALESCE(MAX(version), 0) "
+                               "FROM firings")
+            self._conn.execute("INSERT OR IGNORE INTO store_versions VALUES ('archive', 0)")
+            if not had_fts:
+                # Entries written before the index existed
+                self._conn.execute("INSERT INTO entries_fts (entries_fts) VALUES ('rebuild')")
+            # Firings logged before phase segments were kept
+            for key in self._conn.execute(
+                    "SELECT f.kiln, f.firing_id FROM firings f WHERE NOT EXISTS "
+                    "(SELECT 1 FROM phase_segments s WHERE s.kiln = f.kiln AND s.firing_id = f.firing_id) "
+                    "AND EXISTS (SELECT 1 FROM entries e WHERE e.kiln = f.kiln AND e.firing_id = f.firing_id "
+                    "AND e.deleted = 0)").fetchall():
+                with self._write():
+                    self._rebuild_segments(*key)
+            # Kilns last written before their status row was kept
+            for key in self._conn.execute(
+                    "SELECT kiln, firing_id FROM firings f WHERE NOT EXISTS "
+                    "(SELECT 1 FROM kiln_status k WHERE k.kiln = f.kiln) "
+                    "ORDER BY updated_at").fetchall():
+                with self._write():
+                    self._refresh_kiln_status(*key)
+            # Catalog rows from before a summary column existed
+            for key in self._conn.execute(
+                    "SELECT kiln, firing_id FROM firing_catalog WHERE atmosphere_counts IS NULL").fetchall():
+                self._refresh_catalog(*key)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def add_listener(self, callback):
+        """Call ``callback(kind, rows)`` after each committed append.
+
+        ``kind`` is ``"entries"`` or ``"wood"`` and ``rows`` the new rows as
+        dicts with their ids, ``"changed"`` with the kiln, firing and id of
+        an edited, deleted or undone entry, or ``"deleted"`` with the kiln and
+        firing of a firing that is gone. Lets alarms and derived series
+        update per sample instead of rescanning the log.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, kind, rows):
+        for callback in self._listeners:
+            try:
+                callback(kind, rows)
+            except Exception:
+                pass  # a broken listener must never lose an entry that is already stored
+
+    @contextmanager
+    def _write(self):
+        """One locked write transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    # Weather series
+    def record_weather(self, sample, when=None, source="live"):
+        self.record_weather_many([dict(sample, t=to_epoch(when or datetime.now()))], source=source)
+
+    def record_weather_many(self, samples, source="backfill"):
+        rows = [(
+            float(s["t"]),
+            s.get("temperature"), s.get("humidity"), s.get("pressure"), s.get("wind_speed"),
+            None if s.get("wind_direction") is None else str(s["wind_direction"]),
+            s.get("conditions"),
+            s.get("source", source),
+        ) for s in samples]
+        with self._write() as conn:
+            conn.executemany("INSERT OR REPLACE INTO weather_samples VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def weather_rows(self, start=None, end=None):
+        """Weather samples ordered by time as tuples matching the table columns."""
+        query = "SELECT * FROM weather_samples WHERE t >= ? AND t <= ? ORDER BY t"
+        with self._lock:
+            return self._conn.execute(
+                query, (float("-inf") if start is None else start,
+                        float("inf") if end is None else end)).fetchall()
+
+    def latest_weather(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT * FROM weather_samples ORDER BY t DESC LIMIT 1").fetchone()
+
+    # Firing log
+    def _bump(self, name):
+        return self._conn.execute(
+            "UPDATE store_versions SET version = version + 1 WHERE name = ? RETURNING version", (name,)).fetchone()[0]
+
+    def _touch_firing(self, kiln, firing_id):
+        now = datetime.now().strftime(TIME_FORMAT)
+        status, = self._conn.execute(
+            "INSERT INTO firings (kiln, firing_id, created_at, updated_at, version) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (kiln, firing_id) DO UPDATE SET version = excluded.version, updated_at = excluded.updated_at "
+            "RETURNING status",
+            (kiln, firing_id, now, now, self._bump("data"))).fetchone()
+        if status == "archived":
+            self._bump("archive")
+            # Late corrections to an archived firing keep its catalog row honest
+            self._refresh_catalog(kiln, firing_id)
+        self._refresh_kiln_status(kiln, firing_id)
+
+    def _refresh_kiln_status(self, kiln, firing_id):
+        """Point the kiln's status row at this firing's latest state, unless another firing is more recent.
+
+        Every lookup is a short walk back along an index, so this is cheap
+        enough to run inside each write.
+        """
+        key = (kiln, firing_id)
+        live = "FROM entries WHERE kiln = ? AND firing_id = ? AND deleted = 0 AND time IS NOT NULL"
+        latest = self._conn.execute(
+            f"SELECT time, phase, atmosphere, logged_by {live} ORDER BY time DESC, id DESC LIMIT 1", key).fetchone()
+        current = self._conn.execute("SELECT firing_id, last_time FROM kiln_status WHERE kiln = ?", (kiln,)).fetchone()
+        if latest is None:
+            if current and current[0] == firing_id:
+                self._conn.execute("DELETE FROM kiln_status WHERE kiln = ?", (kiln,))
+            return
+        if current and current[0] != firing_id and (current[1] or "") > latest[0]:
+            return  # a late correction to an older firing
+        temps = [self._conn.execute(f"SELECT {column} {live} AND {column} IS NOT NULL "
+                                    "ORDER BY time DESC, id DESC LIMIT 1", key).fetchone()
+                 for column in ("temp_front", "temp_middle", "temp_back", "temp_stack")]
+        stokes = (self._conn.execute(f"SELECT time {live} AND entry_type = 'stoke' ORDER BY time DESC LIMIT 1",
+                                     key).fetchone(),
+                  self._conn.execute("SELECT MAX(time) FROM wood_entries WHERE kiln = ? AND firing_id = ?",
+                                     key).fetchone())
+        last_stoke = max((row[0] for row in stokes if row and row[0]), default=None)
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO kiln_status ({', '.join(KILN_STATUS_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(KILN_STATUS_COLUMNS))})",
+            (kiln, firing_id, *latest, *(t[0] if t else None for t in temps), last_stoke))
+
+    def fleet(self):
+        """Every kiln's status row (``KILN_STATUS_COLUMNS`` plus its firing's ``status``), by kiln name."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join('k.' + c for c in KILN_STATUS_COLUMNS)}, f.status FROM kiln_status k "
+                "LEFT JOIN firings f USING (kiln, firing_id) ORDER BY k.kiln").fetchall()
+        return [dict(zip(KILN_STATUS_COLUMNS + ("status",), row)) for row in rows]
+
+    def _record_event(self, kiln, firing_id, entry_id, op, data=None, before=None, actor=None):
+        seq = self._conn.execute(
+            "INSERT INTO entry_events (kiln, firing_id, entry_id, op, data, before, actor, at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (kiln, firing_id, entry_id, op,
+             None if data is None else json.dumps(data), None if before is None else json.dumps(before),
+             actor, datetime.now().strftime(TIME_FORMAT))).lastrowid
+        key = (kiln, firing_id)
+        if key not in self._event_counts:
+            self._event_counts[key] = self._conn.execute(
+                "SELECT COUNT(*) FROM entry_events WHERE kiln = ? AND firing_id = ?", key).fetchone()[0]
+        else:
+            self._event_counts[key] += 1
+        if self._event_counts[key] >= KEEP_EVENTS + COMPACT_EVERY:
+            self._compact(kiln, firing_id)
+        return seq
+
+    def _apply(self, entry_id, op, data=None):
+        """Apply one event's effect to the materialized ``entries`` view."""
+        if op in ("create", "restore"):
+            self._conn.execute("UPDATE entries SET deleted = 0 WHERE id = ?", (entry_id,))
+        elif op == "tombstone":
+            self._conn.execute("UPDATE entries SET deleted = 1 WHERE id = ?", (entry_id,))
+        elif op == "edit":
+            columns = [c for c in data if c in ENTRY_COLUMNS or c == "extra"]
+            if columns:
+                self._conn.execute(
+                    f"UPDATE entries SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?",
+                    (*(data[c] for c in columns), entry_id))
+
+    def append_entries(self, entries):
+        """Insert log entries, returning ``(ids, duplicates)``.
+
+        An entry carrying a ``client_id`` that was already stored (a queued
+        retry from a phone) is skipped rather than logged twice.
+        """
+        ids, duplicates, inserted = [], 0, []
+        with self._write() as conn:
+            touched = set()
+            for entry in entries:
+                entry = entry.to_dict() if isinstance(entry, LogEntry) else dict(entry)
+                client_id = entry.pop("client_id", None)
+                entry.pop("id", None)
+                if self.cleaner is not None:
+                    if client_id and conn.execute(
+                            "SELECT 1 FROM entries WHERE client_id = ?", (client_id,)).fetchone():
+                        duplicates += 1  # a retry must not feed the same reading to the cleaner twice
+                        continue
+                    entry = self._clean(entry)
+                extra = {k: v for k, v in entry.items() if k not in ENTRY_COLUMNS}
+                cursor = conn.execute(
+                    f"INSERT OR IGNORE INTO entries (client_id, {', '.join(ENTRY_COLUMNS)}, extra) "
+                    f"VALUES ({', '.join('?' * (len(ENTRY_COLUMNS) + 2))})",
+                    (client_id, *(entry.get(c) for c in ENTRY_COLUMNS),
+                     json.dumps(extra) if extra else None))
+                if cursor.rowcount:
+                    ids.append(cursor.lastrowid)
+                    inserted.append(dict(entry, id=cursor.lastrowid))
+                    key = (entry.get("kiln"), entry.get("firing_id"))
+                    self._record_event(*key, cursor.lastrowid, "create", entry, actor=entry.get("logged_by"))
+                    touched.add(key)
+                else:
+                    duplicates += 1
+            for kiln, firing_id in touched:
+                self._advance_segments(kiln, firing_id, [e for e in inserted
+                                                         if (e.get("kiln"), e.get("firing_id")) == (kiln, firing_id)])
+                self._touch_firing(kiln, firing_id)
+        if inserted:
+            self._notify("entries", inserted)
+        return ids, duplicates
+
+    def _clean(self, entry):
+        # Edits are never cleaned: a person typing a reading in overrides the cleaner
+        key = (entry.get("kiln"), entry.get("firing_id"))
+        if key not in self.cleaner:
+            rows = self._conn.execute(
+                "SELECT time, entry_type, temp_front, temp_middle, temp_back, temp_stack, extra FROM entries "
+                "WHERE kiln = ? AND firing_id = ? AND deleted = 0 AND time IS NOT NULL "
+                "ORDER BY time DESC, id DESC LIMIT ?", (*key, max(HAMPEL_WINDOW, STUCK_READINGS))).fetchall()
+            recent = []
+            for time, entry_type, *temps, extra in reversed(rows):
+                row = dict(zip(("temp_front", "temp_middle", "temp_back", "temp_stack"), temps))
+                if extra:
+                    row.update(json.loads(extra))
+                if entry_type != "incident":
+                    recent.append((to_epoch(time), raw_readings(row)))
+            self.cleaner.seed(*key, recent)
+        try:
+            t = to_epoch(entry["time"]) if entry.get("time") else None
+        except (TypeError, ValueError):
+            t = None
+        return self.cleaner.clean(entry, t)
+
+    def update_entry(self, entry_id, changes, actor=None):
+        columns = [c for c in changes if c in ENTRY_COLUMNS]
+        with self._write() as conn:
+            row = conn.execute(
+                f"SELECT kiln, firing_id, extra{''.join(', ' + c for c in columns)} FROM entries "
+                "WHERE id = ? AND deleted = 0", (entry_id,)).fetchone()
+            if row is None:
+                return False
+            data = {c: changes[c] for c in columns}
+            before = dict(zip(columns, row[3:]))
+            extra = json.loads(row[2]) if row[2] else {}
+            # A reading corrected by hand is no longer the masked one the cleaner flagged
+            corrected = {c for c in columns if c.startswith("temp_") and not _same(before[c], data[c])}
+            kept = {k: v for k, v in extra.items()
+                    if not (k.startswith(("raw_", "flag_")) and k.split("_", 1)[1] in corrected)}
+            if kept != extra:
+                data["extra"], before["extra"] = json.dumps(kept) if kept else None, row[2]
+            self._apply(entry_id, "edit", data)
+            self._record_event(*row[:2], entry_id, "edit", data, before, actor)
+            self._rebuild_segments(*row[:2])
+            self._touch_firing(*row[:2])
+        self._notify("changed", [{"kiln": row[0], "firing_id": row[1], "id": entry_id}])
+        return True
+
+    def delete_entry(self, entry_id, actor=None):
+        """Tombstone an entry; the row and its id stay until compaction."""
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT kiln, firing_id FROM entries WHERE id = ? AND deleted = 0", (entry_id,)).fetchone()
+            if row is None:
+                return False
+            self._apply(entry_id, "tombstone")
+            self._record_event(*row, entry_id, "tombstone", actor=actor)
+            self._rebuild_segments(*row)
+            self._touch_firing(*row)
+        self._notify("changed", [{"kiln": row[0], "firing_id": row[1], "id": entry_id}])
+        return True
+
+    def _undo_stacks(self, kiln, firing_id, actor):
+        """Replay ``actor``'s events into (done, undone) stacks of undoable events."""
+        done, undone, by_seq = [], [], {}
+        for seq, entry_id, op, data, before in self._conn.execute(
+                "SELECT seq, entry_id, op, data, before FROM entry_events "
+                "WHERE kiln = ? AND firing_id = ? AND actor IS ? ORDER BY seq", (kiln, firing_id, actor)):
+            data = json.loads(data) if data else None
+            if op == "undo":
+                target = by_seq.get(data["seq"])
+                if done and done[-1] is target:
+                    undone.append(done.pop())
+            elif op == "redo":
+                target = by_seq.get(data["seq"])
+                if undone and undone[-1] is target:
+                    done.append(undone.pop())
+            elif op == "skip":
+                # Someone else changed the entry since, so this one can no longer be undone or redone
+                target = by_seq.get(data["seq"])
+                if done and done[-1] is target:
+                    done.pop()
+                elif undone and undone[-1] is target:
+                    undone.pop()
+            else:
+                by_seq[seq] = (seq, entry_id, op, data, json.loads(before) if before else None)
+                done.append(by_seq[seq])
+                undone.clear()
+        return done, undone
+
+    def _left_as(self, entry_id, seq, actor, deleted, columns=None):
+        # Is the entry still as ``actor`` left it: nobody else has touched it since ``seq``,
+        # and it is deleted or not, with these column values?
+        if self._conn.execute("SELECT 1 FROM entry_events WHERE entry_id = ? AND seq > ? AND actor IS NOT ?",
+                              (entry_id, seq, actor)).fetchone():
+            return False
+        columns = {c: v for c, v in (columns or {}).items() if c in ENTRY_COLUMNS}
+        row = self._conn.execute(
+            f"SELECT deleted{''.join(', ' + c for c in columns)} FROM entries WHERE id = ?", (entry_id,)).fetchone()
+        return row is not None and bool(row[0]) == deleted and all(
+            _same(value, expected) for value, expected in zip(row[1:], columns.values()))
+
+    def undo(self, kiln, firing_id, actor=None):
+        """Reverse ``actor``'s most recent change to the firing; returns it, or None.
+
+        Returns False, and drops the change from the undo stack, if someone
+        else has changed or deleted the entry since: undoing it would throw
+        their change away.
+        """
+        with self._write():
+            done, _ = self._undo_stacks(kiln, firing_id, actor)
+            if not done:
+                return None
+            seq, entry_id, op, data, before = done[-1]
+            if not self._left_as(entry_id, seq, actor, op == "tombstone", data if op == "edit" else None):
+                self._record_event(kiln, firing_id, entry_id, "skip", {"seq": seq}, actor=actor)
+                return False
+            self._apply(entry_id, INVERSE_OPS[op], before)
+            self._record_event(kiln, firing_id, entry_id, "undo", {"seq": seq}, actor=actor)
+            self._rebuild_segments(kiln, firing_id)
+            self._touch_firing(kiln, firing_id)
+        self._notify("changed", [{"kiln": kiln, "firing_id": firing_id, "id": entry_id}])
+        return {"op": op, "entry_id": entry_id}
+
+    def redo(self, kiln, firing_id, actor=None):
+        """Re-apply ``actor``'s most recently undone change; returns it, None, or False as for ``undo``."""
+        with self._write():
+            _, undone = self._undo_stacks(kiln, firing_id, actor)
+            if not undone:
+                return None
+            seq, entry_id, op, data, before = undone[-1]
+            if not self._left_as(entry_id, seq, actor, op in ("create", "restore"), before if op == "edit" else None):
+                self._record_event(kiln, firing_id, entry_id, "skip", {"seq": seq}, actor=actor)
+                return False
+            self._apply(entry_id, op, data)
+            self._record_event(kiln, firing_id, entry_id, "redo", {"seq": seq}, actor=actor)
+            self._rebuild_segments(kiln, firing_id)
+            self._touch_firing(kiln, firing_id)
+        self._notify("changed", [{"kiln": kiln, "firing_id": firing_id, "id": entry_id}])
+        return {"op": op, "entry_id": entry_id}
+
+    def _compact(self, kiln, firing_id, keep_events=KEEP_EVENTS):
+        key = (kiln, firing_id)
+        cutoff = self._conn.execute(
+            "SELECT seq FROM entry_events WHERE kiln = ? AND firing_id = ? ORDER BY seq DESC LIMIT 1 OFFSET ?",
+            (*key, keep_events)).fetchone()
+        if cutoff is None:
+            return 0
+        self._event_counts.pop(key, None)  # recounted on the next event
+        # Deleted rows nobody can undo any more are dropped from the view for good,
+        # with what was derived from them
+        purged = [row[0] for row in self._conn.execute(
+            "SELECT id FROM entries WHERE kiln = ? AND firing_id = ? AND deleted = 1 AND id NOT IN "
+            "(SELECT entry_id FROM entry_events WHERE kiln = ? AND firing_id = ? AND seq > ?)",
+            (*key, *key, cutoff[0]))]
+        for table, column in (("entry_derived", "entry_id"), ("entry_heatwork", "entry_id"), ("entries", "id")):
+            self._conn.executemany(f"DELETE FROM {table} WHERE {column} = ?", [(i,) for i in purged])
+        return self._conn.execute(
+            "DELETE FROM entry_events WHERE kiln = ? AND firing_id = ? AND seq <= ?", (*key, cutoff[0])).rowcount
+
+    def compact(self, kiln, firing_id, keep_events=KEEP_EVENTS):
+        """Drop all but the last ``keep_events`` events of a firing; returns how many went."""
+        with self._write():
+            return self._compact(kiln, firing_id, keep_events)
+
+    def entries(self, kiln, firing_id):
+        """Entries of one firing in insertion order, as ``LogEntry`` objects with their ``id``."""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"SELECT id, {', '.join(ENTRY_COLUMNS)}, extra FROM entries "
+                "WHERE kiln = ? AND firing_id = ? AND deleted = 0 ORDER BY id", (kiln, firing_id))
+            rows = cursor.fetchall()
+        names = ("id",) + ENTRY_COLUMNS
+        log = []
+        for row in rows:
+            entry = {k: v for k, v in zip(names, row) if v is not None}
+            if row[-1]:
+                entry.update(json.loads(row[-1]))
+            log.append(LogEntry.from_dict(entry))
+        return log
+
+    def entry_page(self, kiln, firing_id, since=None, until=None, entry_types=None, after=None, limit=100):
+        """One page of a firing's live, timed entries in ``(time, id)`` order, as plain row dicts.
+
+        ``since`` is inclusive and ``until`` exclusive; ``after`` is the
+        ``(time, id)`` of the last row of the previous page. Walks the
+        ``(kiln, firing_id, time)`` index, so a page costs the same anywhere
+        in the log.
+        """
+        names = ("id",) + ENTRY_COLUMNS
+        sql = (f"SELECT {', '.join(names)}, extra FROM entries "
+               "WHERE kiln = ? AND firing_id = ? AND deleted = 0 AND time IS NOT NULL")
+        params = [kiln, firing_id]
+        if since:
+            sql += " AND time >= ?"
+            params.append(since)
+        if until:
+            sql += " AND time < ?"
+            params.append(until)
+        if entry_types:
+            sql += f" AND entry_type IN ({', '.join('?' * len(entry_types))})"
+            params.extend(entry_types)
+        if after:
+            sql += " AND (time > ? OR (time = ? AND id > ?))"
+            params.extend((after[0], after[0], after[1]))
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY time, id LIMIT ?", (*params, limit)).fetchall()
+        page = []
+        for row in rows:
+            entry = dict(zip(names, row))
+            if row[-1]:
+                entry.update(json.loads(row[-1]))
+            page.append(entry)
+        return page
+
+    def entry_rows(self, kiln, firing_id, page_size=500):
+        """Yield a firing's live entries as plain row dicts, one page at a time.
+
+        Pages are keyed on ``id`` and the lock is only held per page, so a
+        long export neither loads the whole log nor blocks other writers.
+        ``extra`` stays a JSON string.
+        """
+        names = ("id",) + ENTRY_COLUMNS + ("extra",)
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(names)} FROM entries WHERE kiln = ? AND firing_id = ? "
+                    "AND deleted = 0 AND id > ? ORDER BY id LIMIT ?",
+                    (kiln, firing_id, last_id, page_size)).fetchall()
+            for row in rows:
+                yield dict(zip(names, row))
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1][0]
+
+    # Derived series
+    def write_derived(self, kiln, firing_id, rows, replace=False):
+        """Store derived rows (dicts keyed by ``DERIVED_COLUMNS``); ``replace`` drops the firing's old ones."""
+        with self._write() as conn:
+            if replace:
+                conn.execute("DELETE FROM entry_derived WHERE kiln = ? AND firing_id = ?", (kiln, firing_id))
+            conn.executemany(
+                f"INSERT OR REPLACE INTO entry_derived (entry_id, kiln, firing_id, {', '.join(DERIVED_COLUMNS)}) "
+                f"VALUES (?, ?, ?, {', '.join('?' * len(DERIVED_COLUMNS))})",
+                [(row["entry_id"], kiln, firing_id, *(row.get(c) for c in DERIVED_COLUMNS)) for row in rows])
+
+    def derived_rows(self, kiln, firing_id):
+        """Derived series of the firing's live entries, in time order, as tuples of ``DERIVED_COLUMNS``."""
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT {', '.join('d.' + c for c in DERIVED_COLUMNS)} FROM entry_derived d "
+                "JOIN entries e ON e.id = d.entry_id "
+                "WHERE d.kiln = ? AND d.firing_id = ? AND e.deleted = 0 ORDER BY d.time, d.entry_id",
+                (kiln, firing_id)).fetchall()
+
+    # Heat-work
+    def write_heatwork(self, kiln, firing_id, rows, replace=False):
+        """Store ``{"entry_id", "time", "state"}`` rows; ``replace`` drops the firing's old ones."""
+        with self._write() as conn:
+            if replace:
+                conn.execute("DELETE FROM entry_heatwork WHERE kiln = ? AND firing_id = ?", (kiln, firing_id))
+            conn.executemany(
+                "INSERT OR REPLACE INTO entry_heatwork (entry_id, kiln, firing_id, time, state) VALUES (?, ?, ?, ?, ?)",
+                [(row["entry_id"], kiln, firing_id, row["time"], json.dumps(row["state"])) for row in rows])
+
+    def heatwork_near(self, kiln, firing_id, time=None):
+        """Heat-work states of the live entries just before and after ``time`` (or the latest and None).
+
+        Each is a ``(time, state)`` tuple or None.
+        """
+        live = ("FROM entry_heatwork h JOIN entries e ON e.id = h.entry_id "
+                "WHERE h.kiln = ? AND h.firing_id = ? AND e.deleted = 0")
+        with self._lock:
+            if time is None:
+                before = self._conn.execute(f"SELECT h.time, h.state {live} ORDER BY h.time DESC, h.entry_id DESC "
+                                            "LIMIT 1", (kiln, firing_id)).fetchone()
+                after = None
+            else:
+                before = self._conn.execute(f"SELECT h.time, h.state {live} AND h.time <= ? "
+                                            "ORDER BY h.time DESC, h.entry_id DESC LIMIT 1",
+                                            (kiln, firing_id, time)).fetchone()
+                after = self._conn.execute(f"SELECT h.time, h.state {live} AND h.time > ? "
+                                           "ORDER BY h.time, h.entry_id LIMIT 1", (kiln, firing_id, time)).fetchone()
+        return tuple(None if row is None else (row[0], json.loads(row[1])) for row in (before, after))
+
+    def firing_version(self, kiln, firing_id):
+        """Moves on every write to the firing (the store's data version at the time); 0 if it has no entries yet."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM firings WHERE kiln = ? AND firing_id = ?", (kiln, firing_id)).fetchone()
+        return row[0] if row else 0
+
+    # Phase segments
+    def _load_segments(self, kiln, firing_id, open_only=False):
+        rows = self._conn.execute(
+            f"SELECT {', '.join(SEGMENT_COLUMNS)} FROM phase_segments WHERE kiln = ? AND firing_id = ? "
+            f"ORDER BY seq{' DESC LIMIT 1' if open_only else ''}", (kiln, firing_id)).fetchall()
+        segments = [dict(zip(SEGMENT_COLUMNS, row)) for row in rows]
+        for segment in segments:
+            segment["atmosphere_counts"] = json.loads(segment["atmosphere_counts"] or "{}")
+        return segments
+
+    def _save_segments(self, kiln, firing_id, segments):
+        rows = []
+        for s in segments:
+            s["hours"] = round((to_epoch(s["end_time"]) - to_epoch(s["start_time"])) / 3600, 3)
+            s["temp_gained"] = (None if s["start_temp"] is None or s["end_temp"] is None
+                                else s["end_temp"] - s["start_temp"])
+            counts = s["atmosphere_counts"]
+            s["dominant_atmosphere"] = max(counts, key=counts.get) if counts else None
+            rows.append((kiln, firing_id, *(json.dumps(counts) if c == "atmosphere_counts" else s[c]
+                                              for c in SEGMENT_COLUMNS)))
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO phase_segments (kiln, firing_id, {', '.join(SEGMENT_COLUMNS)}) "
+            f"VALUES (?, ?, {', '.join('?' * len(SEGMENT_COLUMNS))})", rows)
+
+    @staticmethod
+    def _extend_segments(segments, entry):
+        """Fold one entry (in time order) into the segment list, opening a segment on a phase change."""
+        last = segments[-1] if segments else None
+        phase = entry.get("phase")
+        phase = getattr(phase, "value", phase)
+        # An entry without a phase (old imports) stays in the running segment
+        if last is None or (phase is not None and phase != last["phase"]):
+            if last is not None:
+                last["end_time"] = entry["time"]  # a phase runs until the next one starts
+            last = {"seq": last["seq"] + 1 if last else 1, "phase": phase,
+                    "start_time": entry["time"], "end_time": entry["time"], "start_temp": None, "end_temp": None,
+                    "wood_pieces": 0, "entries": 0, "atmosphere_counts": {}}
+            segments.append(last)
+        last["end_time"] = entry["time"]
+        last["entries"] += 1
+        front = entry.get("temp_front")
+        if front is not None:
+            if last["start_temp"] is None:
+                last["start_temp"] = front
+            last["end_temp"] = front
+        atmosphere = entry.get("atmosphere")
+        if atmosphere is not None:
+            atmosphere = getattr(atmosphere, "value", atmosphere)
+            last["atmosphere_counts"][atmosphere] = last["atmosphere_counts"].get(atmosphere, 0) + 1
+        return segments
+
+    def _advance_segments(self, kiln, firing_id, entries):
+        """Extend the firing's segments with newly inserted entries; rebuilds if they arrived out of order."""
+        entries = sorted(entries, key=lambda e: (e.get("time") or "", e["id"]))
+        segments = self._load_segments(kiln, firing_id, open_only=True)
+        if any(not e.get("time") for e in entries) or (segments and entries[0]["time"] < segments[-1]["end_time"]):
+            return self._rebuild_segments(kiln, firing_id)
+        for entry in entries:
+            self._extend_segments(segments, entry)
+        self._save_segments(kiln, firing_id, segments)
+
+    def _add_segment_wood(self, kiln, firing_id, time, quantity):
+        self._conn.execute(
+            "UPDATE phase_segments SET wood_pieces = wood_pieces + ? WHERE kiln = ? AND firing_id = ? AND seq = "
+            "(SELECT COALESCE(MAX(seq) FILTER (WHERE start_time <= ?), MIN(seq)) FROM phase_segments "
+            "WHERE kiln = ? AND firing_id = ?)",
+            (quantity or 0, kiln, firing_id, time or "9999", kiln, firing_id))
+
+    def _rebuild_segments(self, kiln, firing_id):
+        key = (kiln, firing_id)
+        self._conn.execute("DELETE FROM phase_segments WHERE kiln = ? AND firing_id = ?", key)
+        segments = []
+        for time, phase, front, atmosphere in self._conn.execute(
+                "SELECT time, phase, temp_front, atmosphere FROM entries WHERE kiln = ? AND firing_id = ? "
+                "AND deleted = 0 AND time IS NOT NULL ORDER BY time, id", key).fetchall():
+            self._extend_segments(segments, {"time": time, "phase": phase, "temp_front": front,
+                                             "atmosphere": atmosphere})
+        self._save_segments(kiln, firing_id, segments)
+        for time, quantity in self._conn.execute(
+                "SELECT time, quantity FROM wood_entries WHERE kiln = ? AND firing_id = ?", key).fetchall():
+            self._add_segment_wood(kiln, firing_id, time, quantity)
+
+    def phase_segments(self, kiln, firing_id):
+        """The firing's phase segments in order, as dicts of ``SEGMENT_COLUMNS``."""
+        with self._lock:
+            return self._load_segments(kiln, firing_id)
+
+    # Wood consumption
+    def append_wood(self, wood_entries):
+        with self._write() as conn:
+            ids = [conn.execute(
+                f"INSERT INTO wood_entries ({', '.join(WOOD_COLUMNS)}) VALUES ({', '.join('?' * len(WOOD_COLUMNS))})",
+                tuple(w.get(c) for c in WOOD_COLUMNS)).lastrowid for w in wood_entries]
+            for w in wood_entries:
+                self._add_segment_wood(w.get("kiln"), w.get("firing_id"), w.get("time"), w.get("quantity"))
+            for kiln, firing_id in {(w.get("kiln"), w.get("firing_id")) for w in wood_entries}:
+                self._touch_firing(kiln, firing_id)
+        if ids:
+            self._notify("wood", [dict(w, id=i) for w, i in zip(wood_entries, ids)])
+        return ids
+
+    def delete_wood(self, wood_id):
+        with self._write() as conn:
+            row = conn.execute("SELECT kiln, firing_id FROM wood_entries WHERE id = ?", (wood_id,)).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM wood_entries WHERE id = ?", (wood_id,))
+            self._rebuild_segments(*row)
+            self._touch_firing(*row)
+        return True
+
+    def wood_entries(self, kiln, firing_id, after=0, limit=None):
+        """The firing's wood log in id order; ``after``/``limit`` page through it by id."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, {', '.join(WOOD_COLUMNS)} FROM wood_entries "
+                "WHERE kiln = ? AND firing_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (kiln, firing_id, after, -1 if limit is None else limit)).fetchall()
+        return [dict(zip(("id",) + WOOD_COLUMNS, row)) for row in rows]
+
+    def last_stoke_time(self, kiln, firing_id):
+        """Time of the latest stoke entry or wood log for the firing, or None."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT MAX(t) FROM (SELECT MAX(time) AS t FROM entries WHERE kiln = ? AND firing_id = ? "
+                "AND deleted = 0 AND entry_type = 'stoke' "
+                "UNION ALL SELECT MAX(time) FROM wood_entries WHERE kiln = ? AND firing_id = ?)",
+                (kiln, firing_id, kiln, firing_id)).fetchone()[0]
+
+    # Alarm definitions
+    def add_alarm(self, kiln, kind, threshold=None, minutes=None, created_by=None):
+        with self._write() as conn:
+            return conn.execute(
+                "INSERT INTO alarms (kiln, kind, threshold, minutes, created_by, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (kiln, kind, threshold, minutes, created_by, datetime.now().strftime(TIME_FORMAT))).lastrowid
+
+    def delete_alarm(self, alarm_id):
+        with self._write() as conn:
+            return conn.execute("DELETE FROM alarms WHERE id = ?", (alarm_id,)).rowcount > 0
+
+    def alarms(self, kiln):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kiln, kind, threshold, minutes, created_by, created_at FROM alarms "
+                "WHERE kiln = ? ORDER BY id", (kiln,)).fetchall()
+        return [dict(zip(("id", "kiln", "kind", "threshold", "minutes", "created_by", "created_at"), row))
+                for row in rows]
+
+    def firings(self, kiln=None, status=None):
+        """Every firing's bookkeeping row (status, timestamps, version), newest first."""
+        sql, params = "SELECT kiln, firing_id, status, created_at, updated_at, archived_at, version FROM firings", []
+        filters = [(column, value) for column, value in (("kiln", kiln), ("status", status)) if value]
+        if filters:
+            sql += " WHERE " + " AND ".join(f"{column} = ?" for column, _ in filters)
+            params = [value for _, value in filters]
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY updated_at DESC", params).fetchall()
+        return [dict(zip(("kiln", "firing_id", "status", "created_at", "updated_at", "archived_at", "version"), row))
+                for row in rows]
+
+    def data_version(self):
+        """Goes up whenever anything is written to or deleted from any firing; never repeats."""
+        with self._lock:
+            return self._conn.execute("SELECT version FROM store_versions WHERE name = 'data'").fetchone()[0]
+
+    def latest_active_firing(self, kiln):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT firing_id FROM firings WHERE kiln = ? AND status = 'active' "
+                "ORDER BY updated_at DESC LIMIT 1", (kiln,)).fetchone()
+        return row[0] if row else None
+
+    # Historical archive
+    def archive_firing(self, kiln, firing_id, entries=None):
+        """Move a firing into the historical archive, optionally importing its entries first.
+
+        Its catalog summary is computed here, once, rather than on every rerun.
+
+        Imported entries are re-keyed to ``kiln``/``firing_id`` so an old CSV
+        lands under the name it was given.
+        """
+        if entries:
+            self.append_entries([dict(e, kiln=kiln, firing_id=firing_id) for e in entries])
+        now = datetime.now().strftime(TIME_FORMAT)
+        with self._write() as conn:
+            self._touch_firing(kiln, firing_id)
+            conn.execute(
+                "UPDATE firings SET status = 'archived', archived_at = ? WHERE kiln = ? AND firing_id = ?",
+                (now, kiln, firing_id))
+            self._bump("archive")
+            self._refresh_catalog(kiln, firing_id)
+            if self.cleaner:
+                self.cleaner.forget(kiln, firing_id)
+
+    def delete_firing(self, kiln, firing_id):
+        """Remove a firing and everything kept with it, for good (e.g. a half-imported bundle)."""
+        key = (kiln, firing_id)
+        with self._write() as conn:
+            status = conn.execute("SELECT status FROM firings WHERE kiln = ? AND firing_id = ?", key).fetchone()
+            if status:
+                # So nothing cached from it (an ETag, an archive summary) is taken for current
+                self._bump("data")
+                if status[0] == "archived":
+                    self._bump("archive")
+            for table in ("entry_derived", "entry_heatwork", "entry_events", "entries", "wood_entries",
+                          "phase_segments", "firing_catalog", "firing_attachments", "firings"):
+                conn.execute(f"DELETE FROM {table} WHERE kiln = ? AND firing_id = ?", key)
+            self._event_counts.pop(key, None)
+            if self.cleaner:
+                self.cleaner.forget(*key)
+            current = conn.execute("SELECT firing_id FROM kiln_status WHERE kiln = ?", (kiln,)).fetchone()
+            if current and current[0] == firing_id:
+                # Back to the kiln's latest other firing, if it has one: the kiln's few firings rows, not its log
+                conn.execute("DELETE FROM kiln_status WHERE kiln = ?", (kiln,))
+                other = conn.execute(
+                    "SELECT firing_id FROM firings WHERE kiln = ? "
+                    "ORDER BY status = 'active' DESC, updated_at DESC LIMIT 1", (kiln,)).fetchone()
+                if other:
+                    self._refresh_kiln_status(kiln, other[0])
+        self._notify("deleted", [{"kiln": kiln, "firing_id": firing_id}])
+
+    def _refresh_catalog(self, kiln, firing_id):
+        summary = self._summarize(kiln, firing_id)
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO firing_catalog ({', '.join(CATALOG_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(CATALOG_COLUMNS))})",
+            tuple(json.dumps(summary[c]) if c in CATALOG_JSON else summary[c] for c in CATALOG_COLUMNS))
+
+    def _summarize(self, kiln, firing_id):
+        conn = self._conn
+        key = (kiln, firing_id)
+        (start, end, hours, count, stokes, incidents,
+         front, middle, back, stack) = conn.execute(
+            "SELECT MIN(time), MAX(time), (julianday(MAX(time)) - julianday(MIN(time))) * 24, COUNT(*), "
+            "SUM(entry_type = 'stoke'), SUM(entry_type = 'incident'), "
+            "MAX(temp_front), MAX(temp_middle), MAX(temp_back), MAX(temp_stack) "
+            "FROM entries WHERE kiln = ? AND firing_id = ? AND deleted = 0", key).fetchone()
+        pieces, wood_count = conn.execute(
+            "SELECT COALESCE(SUM(quantity), 0), COUNT(*) FROM wood_entries WHERE kiln = ? AND firing_id = ?",
+            key).fetchone()
+        # A phase the firing went back to adds up over all its segments
+        phase_timings = {phase: {"start": first, "end": until, "hours": round(hours, 2)}
+                         for phase, first, until, hours in conn.execute(
+                             "SELECT phase, MIN(start_time), MAX(end_time), SUM(hours) FROM phase_segments "
+                             "WHERE kiln = ? AND firing_id = ? AND phase IS NOT NULL GROUP BY phase "
+                             "ORDER BY MIN(seq)", key)}
+        final_actions = [row[0] for row in conn.execute(
+            "SELECT action_taken FROM entries WHERE kiln = ? AND firing_id = ? "
+            "AND deleted = 0 AND COALESCE(action_taken, '') != '' ORDER BY time DESC, id DESC LIMIT 3", key)][::-1]
+        atmosphere_counts = dict(conn.execute(
+            "SELECT atmosphere, COUNT(*) FROM entries WHERE kiln = ? AND firing_id = ? "
+            "AND deleted = 0 AND atmosphere IS NOT NULL GROUP BY atmosphere", key).fetchall())
+        return dict(zip(CATALOG_COLUMNS, (
+            kiln, firing_id, start, end, hours, count, stokes or 0, incidents or 0,
+            front, middle, back, stack, pieces, wood_count,
+            phase_timings, final_actions, datetime.now().strftime(TIME_FORMAT), atmosphere_counts)))
+
+    def summary(self, kiln, firing_id):
+        """Catalog-style summary of any firing, archived or not, computed now."""
+        with self._lock:
+            return self._summarize(kiln, firing_id)
+
+    def catalog(self):
+        """Summary rows of every archived firing, oldest archived first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join('c.' + c for c in CATALOG_COLUMNS)}, f.archived_at "
+                "FROM firing_catalog c JOIN firings f USING (kiln, firing_id) "
+                "WHERE f.status = 'archived' ORDER BY f.archived_at").fetchall()
+        catalog = []
+        for row in rows:
+            summary = dict(zip(CATALOG_COLUMNS + ("archived_at",), row))
+            for column in CATALOG_JSON:
+                summary[column] = json.loads(summary[column])
+            catalog.append(summary)
+        return catalog
+
+    def first_archived_entry_near(self, temp_front, tolerance=50):
+        """Earliest-archived historical entry within ``tolerance`` °F of ``temp_front``."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT e.firing_id, e.action_taken FROM entries e JOIN firings f USING (kiln, firing_id) "
+                "WHERE f.status = 'archived' AND e.deleted = 0 AND ABS(e.temp_front - ?) < ? "
+                "ORDER BY f.archived_at, e.id LIMIT 1", (temp_front, tolerance)).fetchone()
+        return dict(zip(("firing_id", "action_taken"), row)) if row else None
+
+    def set_attachment(self, kiln, firing_id, name, value):
+        with self._write() as conn:
+            conn.execute("INSERT OR REPLACE INTO firing_attachments VALUES (?, ?, ?, ?)",
+                         (kiln, firing_id, name, json.dumps(value)))
+
+    def attachment(self, kiln, firing_id, name, default=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM firing_attachments WHERE kiln = ? AND firing_id = ? AND name = ?",
+                (kiln, firing_id, name)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    # Archive-wide analytics: grouped queries over the catalog, never per-firing rows
+    def _archive_filter(self, kiln=None, start=None, end=None, join=""):
+        sql = f"FROM firing_catalog c JOIN firings f USING (kiln, firing_id){join} WHERE f.status = 'archived'"
+        params = []
+        if kiln:
+            kilns = [kiln] if isinstance(kiln, str) else list(kiln)
+            sql += f" AND c.kiln IN ({', '.join('?' * len(kilns))})"
+            params += kilns
+        if start is not None:
+            sql += " AND c.start_time >= ?"
+            params.append(str(start))
+        if end is not None:
+            sql += " AND c.start_time < ?"
+            params.append(str(end))
+        return sql, params
+
+    def archive_stats(self, kiln=None, start=None, end=None):
+        """Per-firing (kiln, firing_id, start_time, duration_hours, peak_temp, wood_pieces, entry_count) rows.
+
+        ``kiln`` is one name or a list; ``start``/``end`` bound the firing's
+        start time (end exclusive).
+        """
+        where, params = self._archive_filter(kiln, start, end)
+        with self._lock:
+            return self._conn.execute(
+                "SELECT c.kiln, c.firing_id, c.start_time, c.duration_hours, "
+                "MAX(COALESCE(c.peak_front, 0), COALESCE(c.peak_middle, 0), COALESCE(c.peak_back, 0)), "
+                f"c.wood_pieces, c.entry_count {where} ORDER BY c.start_time", params).fetchall()
+
+    def archive_phase_segments(self, kiln=None, start=None, end=None):
+        """(kiln, firing_id, phase, hours, temp_gained, wood_pieces, entries) rows, one per segment."""
+        where, params = self._archive_filter(
+            kiln, start, end, " JOIN phase_segments s ON s.kiln = c.kiln AND s.firing_id = c.firing_id")
+        with self._lock:
+            return self._conn.execute(
+                "SELECT c.kiln, c.firing_id, s.phase, s.hours, s.temp_gained, s.wood_pieces, s.entries "
+                f"{where} AND s.phase IS NOT NULL ORDER BY c.start_time, s.seq", params).fetchall()
+
+    def archive_atmosphere_counts(self, kiln=None, start=None, end=None):
+        """(kiln, firing_id, atmosphere, entries) rows from the catalog's atmosphere counts."""
+        where, params = self._archive_filter(kiln, start, end, ", json_each(c.atmosphere_counts) a")
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT c.kiln, c.firing_id, a.key, a.value {where}", params).fetchall()
+
+    def archive_control_rows(self, kiln=None, start=None, end=None):
+        """(kiln, firing_id, time, damper_position, air_intake, temp_front, temp_middle, temp_back, temp_stack,
+        entry_type) rows of every live, timed entry, grouped by firing and in time order.
+
+        Incident and quick phone entries get no damper or air: those are not
+        settings anyone made.
+        """
+        where, params = self._archive_filter(
+            kiln, start, end, " JOIN entries e ON e.kiln = c.kiln AND e.firing_id = c.firing_id")
+        setting = "CASE WHEN e.entry_type IN ('incident', 'mobile_quick') THEN NULL ELSE e.{} END"
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT c.kiln, c.firing_id, e.time, {setting.format('damper_position')}, "
+                f"{setting.format('air_intake')}, e.temp_front, e.temp_middle, e.temp_back, e.temp_stack, e.entry_type "
+                f"{where} AND e.deleted = 0 AND e.time IS NOT NULL "
+                "ORDER BY c.start_time, c.kiln, c.firing_id, e.time", params).fetchall()
+
+    def archived_firings(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kiln, firing_id, created_at, archived_at FROM firings "
+                "WHERE status = 'archived' ORDER BY archived_at").fetchall()
+        return [dict(zip(("kiln", "firing_id", "created_at", "archived_at"), row)) for row in rows]
+
+    def archive_version(self):
+        """Goes up whenever a firing is archived, or an archived firing is written to or deleted."""
+        with self._lock:
+            return self._conn.execute("SELECT version FROM store_versions WHERE name = 'archive'").fetchone()[0]
+
+    # Full-text search
+    def search(self, query, min_temp=None, kiln=None, firing_id=None, limit=50):
+        """Ranked entries whose free text matches ``query``, best match first.
+
+        ``query`` uses FTS5 syntax (``salt AND reduction``, ``"body reduction"``,
+        ``stok*``); if it doesn't parse, each word is searched for literally.
+        ``min_temp`` filters on the hottest spy reading of the entry.
+        """
+        peak = "MAX(COALESCE(e.temp_front, 0), COALESCE(e.temp_middle, 0), COALESCE(e.temp_back, 0))"
+        sql = (
+            "SELECT e.id, e.kiln, e.firing_id, e.time, e.entry_type, e.logged_by, "
+            f"e.temp_front, e.temp_middle, e.temp_back, {peak} AS peak_temp, "
+            "snippet(entries_fts, -1, '**', '**', '…', 12) AS snippet, bm25(entries_fts) AS rank "
+            "FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid "
+            "WHERE entries_fts MATCH ? AND e.deleted = 0")
+        params = []
+        if min_temp is not None:
+            sql += f" AND {peak} >= ?"
+            params.append(min_temp)
+        if kiln is not None:
+            sql += " AND e.kiln = ?"
+            params.append(kiln)
+        if firing_id is not None:
+            sql += " AND e.firing_id = ?"
+            params.append(firing_id)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        names = ("id", "kiln", "firing_id", "time", "entry_type", "logged_by",
+                 "temp_front", "temp_middle", "temp_back", "peak_temp", "snippet", "rank")
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, [query, *params]).fetchall()
+            except sqlite3.OperationalError:
+                literal = " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+                rows = self._conn.execute(sql, [literal, *params]).fetchall() if literal else []
+        return [dict(zip(names, row)) for row in rows]
@@ -0,0 +1,204 @@
+"""Weather time series: periodic sampling, backfill and interpolation onto log times.
+
+Samples are written to the shared ``FiringStore`` at a fixed cadence instead of
+being copied into every log entry, so any entry, stoke or historical firing
+can be joined to the conditions at its own timestamp.
+
+numpy, pandas and requests are imported inside the functions that use them:
+the sampler thread and the sidebar only need the stored samples, and a phone
+opening Mobile Mode shouldn't pay for them.
+"""
+import threading
+from datetime import datetime, timedelta
+
+from woodfire_store import TIME_FORMAT, to_epoch
+
+WEATHER_CADENCE_MINUTES = 10
+# How far past the first/last sample a log time may be and still get a value
+WEATHER_TOLERANCE_MINUTES = 60
+
+DEMO_WEATHER = {
+    "temperature": 72, "humidity": 65, "pressure": 29.92,
+    "wind_speed": 8, "wind_direction": "SW", "conditions": "Clear",
+}
+
+# Log column name for each sampled field
+WEATHER_COLUMNS = {
+    "temperature": "weather_temp",
+    "humidity": "weather_humidity",
+    "pressure": "weather_pressure",
+    "wind_speed": "weather_wind",
+    "conditions": "weather_conditions",
+}
+NUMERIC_FIELDS = ("temperature", "humidity", "pressure", "wind_speed")
+
+
+# Weather API function (using OpenWeatherMap - requires API key)
+def get_weather_data(api_key=None, location="40.7128,-74.0060"):  # Default NYC coords
+    if not api_key:
+        return dict(DEMO_WEATHER, note="Demo data - add API key for real weather")
+
+    try:
+        import requests
+        url = f"http://api.openweathermap.org/data/2.5/weather?lat={location.split(',')[0]}&lon={location.split(',')[1]}&appid={api_key}&units=imperial"
+        response = requests.get(url, timeout=5)
+        data = response.json()
+
+        return {
+            "temperature": data['main']['temp'],
+            "humidity": data['main']['humidity'],
+            "pressure": data['main']['pressure'] * 0.02953,  # Convert hPa to inHg
+            "wind_speed": data['wind']['speed'],
+            "wind_direction": data['wind'].get('deg', 0),
+            "conditions": data['weather'][0]['description'],
+            "note": "Live weather data"
+        }
+    except Exception:
+        return dict(DEMO_WEATHER, conditions="Unable to fetch",
+                    note="Weather API error - using demo data")
+
+
+class WeatherSampler(threading.Thread):
+    """Background thread recording one weather sample per cadence into the store."""
+
+    def __init__(self, store, cadence_minutes=WEATHER_CADENCE_MINUTES, fetch=get_weather_data):
+        super().__init__(name="weather-sampler", daemon=True)
+        self.store = store
+        self.cadence = cadence_minutes * 60
+        self.fetch = fetch
+        self.api_key = None
+        self.location = "40.7128,-74.0060"
+        self._latest = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+    def configure(self, api_key, location):
+        # A new key or location should not wait a full cadence for fresh data
+        if (api_key or None, location) != (self.api_key, self.location):
+            self.api_key, self.location = api_key or None, location
+            self._latest = None
+            self._wake.set()
+
+    def sample_now(self):
+        sample = self.fetch(self.api_key, self.location)
+        source = "live" if sample.get("note") == "Live weather data" else "demo"
+        self.store.record_weather(sample, source=source)
+        self._latest = sample
+        return sample
+
+    def latest(self):
+        """Most recent sample, never waiting on the network.
+
+        Until the thread's first fetch lands this is the last stored sample if
+        it is recent, otherwise demo values saying so.
+        """
+        if self._latest:
+            return self._latest
+        row = self.store.latest_weather()
+        if row is not None and to_epoch(datetime.now()) - row[0] <= 2 * self.cadence and None not in row[1:5]:
+            sample = dict(zip(("t", *NUMERIC_FIELDS, "wind_direction", "conditions", "source"), row))
+            return dict(sample, note=f"Last recorded sample ({sample['source']})")
+        return dict(DEMO_WEATHER, note="Fetching weather...")
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                self.sample_now()
+            except Exception:
+                pass  # try again next cadence; one bad sample shouldn't stop the series
+            self._wake.wait(self.cadence)
+            self._wake.clear()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+
+def backfill_weather_csv(store, file):
+    """Load a local CSV of past conditions (a ``time`` column plus sample fields)."""
+    import pandas as pd
+    df = pd.read_csv(file)
+    if "time" not in df.columns:
+        raise ValueError("Weather CSV needs a 'time' column")
+    df = df.rename(columns={log_col: field for field, log_col in WEATHER_COLUMNS.items()})
+    df["t"] = pd.to_datetime(df["time"]).astype("datetime64[s]").astype("int64")
+    fields = ["t"] + [c for c in (*NUMERIC_FIELDS, "wind_direction", "conditions") if c in df.columns]
+    samples = df[fields].astype(object).where(df[fields].notna(), None).to_dict("records")
+    return store.record_weather_many(samples, source="backfill")
+
+
+def backfill_weather_stub(store, start, end, cadence_minutes=WEATHER_CADENCE_MINUTES):
+    """Fill ``start``..``end`` with demo conditions where no sample exists yet."""
+    existing = {int(row[0]) for row in store.weather_rows(to_epoch(start), to_epoch(end))}
+    samples = []
+    t = to_epoch(start)
+    while t <= to_epoch(end):
+        if t not in existing:
+            samples.append(dict(DEMO_WEATHER, t=t))
+        t += cadence_minutes * 60
+    return store.record_weather_many(samples, source="stub")
+
+
+def weather_frame(store, start=None, end=None):
+    """The stored series as a DataFrame with a log-style ``time`` column."""
+    import pandas as pd
+    rows = store.weather_rows(start, end)
+    df = pd.DataFrame(rows, columns=["t", *NUMERIC_FIELDS, "wind_direction", "conditions", "source"])
+    df["time"] = pd.to_datetime(df["t"], unit="s").dt.strftime(TIME_FORMAT)
+    return df
+
+
+def interpolate_weather(store, times, tolerance_minutes=WEATHER_TOLERANCE_MINUTES):
+    """Weather at each of ``times``, linearly interpolated between samples.
+
+    Returns a DataFrame aligned with ``times`` using the log's ``weather_*``
+    column names. Conditions take the most recent sample at or before each
+    time. Times further than ``tolerance_minutes`` outside the series are NaN.
+    """
+    import numpy as np
+    import pandas as pd
+    times = pd.Series(times)
+    index = times.index
+    out = pd.DataFrame(index=index, columns=list(WEATHER_COLUMNS.values()), dtype=object)
+    if times.empty:
+        return out
+    t = pd.to_datetime(times).astype("datetime64[s]").astype("int64").to_numpy(dtype=float)
+    tolerance = tolerance_minutes * 60
+    rows = store.weather_rows(np.nanmin(t) - tolerance, np.nanmax(t) + tolerance)
+    if not rows:
+        return out
+
+    series = np.array([r[:5] for r in rows], dtype=float)
+    sample_t = series[:, 0]
+    covered = (t >= sample_t[0] - tolerance) & (t <= sample_t[-1] + tolerance)
+    for i, field in enumerate(NUMERIC_FIELDS, start=1):
+        known = ~np.isnan(series[:, i])
+        if known.any():
+            values = np.interp(t, sample_t[known], series[known, i])
+            out[WEATHER_COLUMNS[field]] = np.where(covered, values, np.nan)
+    conditions = np.array([r[6] for r in rows], dtype=object)
+    previous = np.clip(np.searchsorted(sample_t, t, side="right") - 1, 0, len(rows) - 1)
+    out["weather_conditions"] = np.where(covered, conditions[previous], None)
+    return out
+
+
+def join_weather(df, store, time_col="time"):
+    """Add interpolated weather columns to a log/wood frame.
+
+    Values recorded in the rows themselves (older firings copied weather into
+    every entry) win over the interpolated series.
+    """
+    if df.empty or time_col not in df.columns:
+        return df
+    joined = interpolate_weather(store, df[time_col])
+    df = df.copy()
+    for col in joined.columns:
+        df[col] = df[col].combine_first(joined[col]) if col in df.columns else joined[col]
+    return df
+
+
+def stub_range_for(times, pad_minutes=WEATHER_CADENCE_MINUTES):
+    import pandas as pd
+    times = pd.to_datetime(pd.Series(times))
+    pad = timedelta(minutes=pad_minutes)
+    return (times.min() - pad).to_pydatetime(), (times.max() + pad).to_pydatetime()
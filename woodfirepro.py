@@ -1,8 +1,25 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta
 import json
-import requests
+import os
+import re
+import tempfile
+
+from woodfire_alarms import ALARM_KINDS, AlarmMonitor, describe
+from woodfire_api import mobile_entry, start_ingest_server
+from woodfire_bundle import cone_rows, import_bundle, write_bundle
+from woodfire_derived import DerivedSeries
+from woodfire_field import cones_as_of
+from woodfire_heatwork import HEATWORK_BASE_F, HeatWork, cone_heatwork
+from woodfire_replay import REPLAY_SUFFIX, SPEEDS, Replayer
+from woodfire_report import ReportBuilder
+from woodfire_schema import (ATMOSPHERES, ENTRY_TYPES, FUEL_TYPES, MOBILE_ATMOSPHERES, PHASES, WEATHER_IMPACTS,
+                             entries_frame)
+from woodfire_store import FiringStore, to_epoch
+from woodfire_weather import (WEATHER_CADENCE_MINUTES, WeatherSampler, backfill_weather_csv,
+                              backfill_weather_stub, join_weather, stub_range_for, weather_frame)
+# pandas, altair and the analysis modules load with the desktop tabs (see below), so a
+# phone opening Mobile Mode never pays for them
 
 st.set_page_config(page_title="WoodFirePro", page_icon="🔥", layout="wide")
 
@@ -16,18 +33,15 @@ if "wood_log" not in st.session_state:
 if "inventory" not in st.session_state:
     st.session_state.inventory = []
 if "cone_status" not in st.session_state:
-    st.session_state.cone_status = {}
-    for row in range(6):
-        for col in range(8):
-            st.session_state.cone_status[f"{row}_{col}"] = {"cones": {}, "last_updated": None}
+    st.session_state.cone_status = {}  # "row_col" -> {"cones", "last_updated"}, added as positions are used
+if "cone_events" not in st.session_state:
+    st.session_state.cone_events = []  # every cone status change, for the temperature overlay
 if "timer_end" not in st.session_state:
     st.session_state.timer_end = None
 if "firing_phase" not in st.session_state:
     st.session_state.firing_phase = "heating"
 if "active_user" not in st.session_state:
     st.session_state.active_user = "Kiln Master"
-if "historical_firings" not in st.session_state:
-    st.session_state.historical_firings = []
 if "safety_checklist" not in st.session_state:
     st.session_state.safety_checklist = {}
 if "emergency_contacts" not in st.session_state:
@@ -35,35 +49,143 @@ if "emergency_contacts" not in st.session_state:
 if "mobile_mode" not in st.session_state:
     st.session_state.mobile_mode = False
 
-# Weather API function (using OpenWeatherMap - requires API key)
-def get_weather_data(api_key=None, location="40.7128,-74.0060"):  # Default NYC coords
-    if not api_key:
-        return {
-            "temperature": 72, "humidity": 65, "pressure": 29.92, 
-            "wind_speed": 8, "wind_direction": "SW", "conditions": "Clear",
-            "note": "Demo data - add API key for real weather"
-        }
-    
+# Process-wide storage and background weather sampling, shared by every session
+@st.cache_resource
+def get_store():
+    return FiringStore()
+
+@st.cache_resource
+def get_weather_sampler():
+    sampler = WeatherSampler(get_store())
+    sampler.start()
+    return sampler
+
+@st.cache_resource
+def get_ingest_server():
+    return start_ingest_server(get_store())
+
+@st.cache_resource
+def get_alarm_monitor():
+    monitor = AlarmMonitor(get_store())
+    monitor.start()
+    return monitor
+
+@st.cache_resource
+def get_derived_series():
+    return DerivedSeries(get_store())
+
+@st.cache_resource
+def get_heatwork():
+    return HeatWork(get_store())
+
+@st.cache_resource
+def get_history_cache():
+    # One copy of each decoded historical firing for all sessions, within a memory budget
+    from woodfire_cache import FiringCache
+    return FiringCache(get_store())
+
+@st.cache_resource
+def get_firing_overlay():
+    from woodfire_overlay import FiringOverlay
+    return FiringOverlay(get_history_cache())
+
+@st.cache_resource
+def get_control_lag():
+    from woodfire_lag import ControlLag
+    return ControlLag(get_store())
+
+@st.cache_resource
+def get_replayer():
+    return Replayer(get_store(), get_heatwork())
+
+@st.cache_resource
+def get_sensor_feed():
+    # Samples come from a separate acquisition process through a memory-mapped ring
+    from woodfire_sensors import SensorFeed
+    return SensorFeed()
+
+@st.cache_resource
+def get_report_builder():
+    builder = ReportBuilder(get_store())
+    builder.start()
+    return builder
+
+NEW_KILN = "➕ New kiln..."
+# Session state that belongs to one firing, saved with it as it changes so every device on the
+# firing shares it: session state name -> attachment name (the cone map is rebuilt from its changes)
+FIRING_STATE = {"crew": "crew", "cone_events": "cone_events", "safety_checklist": "safety"}
+
+def cone_map(events):
+    """``cone_status`` as the cone changes in ``events`` leave it."""
+    cone_status = {}
+    for event in events:
+        cone_status[f"{event['row']}_{event['col']}"] = {
+            "cones": {}, "last_updated": f"{event['time'][11:16]} by {event.get('by') or 'Unknown'}"}
+    for (row, col), cones in cones_as_of(events, "9999").items():
+        cone_status[f"{row}_{col}"]["cones"] = cones
+    return cone_status
+
+def save_firing_state(kiln, firing_id, name):
+    """Save one of ``FIRING_STATE`` with the firing, as it stands in this session."""
+    get_store().set_attachment(kiln, firing_id, FIRING_STATE[name], st.session_state[name])
+    st.session_state.firing_seen[name] = json.dumps(st.session_state[name], sort_keys=True)
+
+def load_firing_state(kiln, firing_id):
+    """Take up whatever of ``FIRING_STATE`` was saved since this session last looked, e.g. by a second device."""
+    seen = st.session_state.firing_seen
+    for name, attachment in FIRING_STATE.items():
+        value = get_store().attachment(kiln, firing_id, attachment, {} if name == "safety_checklist" else [])
+        saved = json.dumps(value, sort_keys=True)
+        if seen.get(name) == saved:
+            continue
+        st.session_state[name], seen[name] = value, saved
+        if name == "cone_events":
+            st.session_state.cone_status = cone_map(value)
+        elif name == "safety_checklist":
+            # The checkboxes keep their own state; let them start again from the saved checklist
+            for key in [k for k in st.session_state if k.startswith("safety_") and k[7:].isdigit()]:
+                del st.session_state[key]
+
+def ago(time):
+    if not time:
+        return "never"
+    minutes = max((to_epoch(datetime.now()) - to_epoch(time)) / 60, 0)  # a replay runs ahead of the clock
+    return f"{minutes:.0f} min ago" if minutes < 120 else f"{minutes / 60:.1f} hrs ago"
+
+def temp_text(value):
+    """A reading for display; one the sensor cleaner masked is left empty."""
+    return "—" if value is None or value != value else f"{value}"
+
+def masked_readings(row):
+    """``sensor: raw°F (reason)`` for each reading of a log row the cleaner masked."""
+    return [f"{name[5:].replace('temp_', '')}: {row.get('raw_' + name[5:])}°F ({row[name]})"
+            for name in row.keys() if name.startswith("flag_") and isinstance(row[name], str)]
+
+def ingest_url(server):
+    """The ingest server's base URL as this browser reaches the app."""
     try:
-        url = f"http://api.openweathermap.org/data/2.5/weather?lat={location.split(',')[0]}&lon={location.split(',')[1]}&appid={api_key}&units=imperial"
-        response = requests.get(url, timeout=5)
-        data = response.json()
-        
-        return {
-            "temperature": data['main']['temp'],
-            "humidity": data['main']['humidity'], 
-            "pressure": data['main']['pressure'] * 0.02953,  # Convert hPa to inHg
-            "wind_speed": data['wind']['speed'],
-            "wind_direction": data['wind'].get('deg', 0),
-            "conditions": data['weather'][0]['description'],
-            "note": "Live weather data"
-        }
-    except:
-        return {
-            "temperature": 72, "humidity": 65, "pressure": 29.92,
-            "wind_speed": 8, "wind_direction": "SW", "conditions": "Unable to fetch",
-            "note": "Weather API error - using demo data"
-        }
+        host = st.context.headers.get("Host", "localhost").split(":")[0]
+    except RuntimeError:  # headless runs (AppTest, the load test) have no browser request
+        host = "localhost"
+    return f"http://{host}:{server.server_address[1]}"
+
+def start_replay():
+    # A button callback, so the kiln selector can be pointed at the replay before it is drawn
+    watching = st.session_state.get("kiln_name", "")
+    if watching.endswith(REPLAY_SUFFIX):
+        # One replay per trainee: the one they were on makes way for the new one
+        if watching in st.session_state.get("firing_defaults", {}):
+            get_replayer().close(watching, st.session_state.firing_defaults[watching])
+    else:
+        st.session_state.replay_return = watching
+    replay_kiln, replay_firing = get_replayer().start(*st.session_state.replay_source, st.session_state.replay_speed)
+    st.session_state.kiln_name = st.session_state.kiln_choice = replay_kiln
+    st.session_state.setdefault("firing_defaults", {})[replay_kiln] = replay_firing
+# Listen for new samples before anything in this run can log one
+get_alarm_monitor()
+ingest_server = get_ingest_server()  # the offline quick log and the read-only API, for every session
+get_derived_series()
+get_heatwork()
 
 st.title("🔥 WoodFirePro")
 st.caption("Professional wood firing toolkit - built for real potters")
@@ -76,8 +198,58 @@ st.session_state.mobile_mode = mobile_toggle
 # Sidebar controls
 with st.sidebar:
     st.header("🎯 Session Info")
-    kiln_name = st.text_input("Kiln name", value="Ana")
-    firing_id = st.text_input("Firing ID", value=datetime.now().strftime("%Y%m%d-%H%M"))
+    # One status row per kiln, kept by the store - the fleet never reads a log.
+    # Training replays stay out of it, bar the one this session is watching
+    last_kiln = st.session_state.get("kiln_name", "Ana")
+    fleet = [k for k in get_store().fleet() if not k["kiln"].endswith(REPLAY_SUFFIX)]
+    known_kilns = [k["kiln"] for k in fleet]
+    if last_kiln.endswith(REPLAY_SUFFIX):
+        if get_replayer().get(last_kiln, st.session_state.get("firing_defaults", {}).get(last_kiln)):
+            known_kilns.append(last_kiln)
+        else:
+            # Closed, or cleared away after sitting unwatched: back to the kiln from before
+            st.session_state.get("firing_defaults", {}).pop(last_kiln, None)
+            last_kiln = st.session_state.pop("replay_return", None) or "Ana"
+    if st.session_state.get("kiln_choice") not in known_kilns + [NEW_KILN] or (
+            st.session_state.kiln_choice == NEW_KILN and last_kiln in known_kilns and st.session_state.kiln_typed):
+        # First run, or the new kiln typed in below has logged its first entry
+        st.session_state.kiln_choice = last_kiln if last_kiln in known_kilns else NEW_KILN
+    kiln_choice = st.selectbox("Kiln", known_kilns + [NEW_KILN], key="kiln_choice")
+    if kiln_choice == NEW_KILN:
+        kiln_name = st.text_input("Kiln name", value="" if last_kiln in known_kilns else last_kiln).strip()
+        if not kiln_name:
+            st.info("Name the new kiln to start logging")
+            st.stop()
+    else:
+        kiln_name = kiln_choice
+    st.session_state.kiln_name = kiln_name
+    st.session_state.kiln_typed = kiln_choice == NEW_KILN
+    
+    firing_defaults = st.session_state.setdefault("firing_defaults", {})
+    if kiln_name not in firing_defaults:
+        # Join the kiln's running firing (e.g. from a second phone) rather than starting a new one
+        firing_defaults[kiln_name] = (get_store().latest_active_firing(kiln_name)
+                                      or datetime.now().strftime("%Y%m%d-%H%M"))
+    firing_id = st.text_input("Firing ID", value=firing_defaults[kiln_name])
+    firing_defaults[kiln_name] = firing_id
+    
+    if st.session_state.get("firing_key") != (kiln_name, firing_id):
+        st.session_state.firing_key = (kiln_name, firing_id)
+        st.session_state.firing_seen = {}  # attachment JSON this session is up to date with
+    load_firing_state(kiln_name, firing_id)
+    
+    # The log lives in the shared store; only reload it when the firing has changed
+    log_version = get_store().firing_version(kiln_name, firing_id)
+    if st.session_state.get("log_version") != (kiln_name, firing_id, log_version):
+        st.session_state.log = get_store().entries(kiln_name, firing_id)
+        st.session_state.wood_log = get_store().wood_entries(kiln_name, firing_id)
+        st.session_state.log_version = (kiln_name, firing_id, log_version)
+    replay = get_replayer().get(kiln_name, firing_id)
+    if replay:
+        # What this run shows (its cone changes came in with the rest above), so the status knows when to redraw
+        st.session_state.replay_seen = (replay.target, replay.played)
+    # One precomputed summary row per archived firing
+    historical_catalog = get_store().catalog()
     
     st.header("👤 Active User")
     active_user = st.text_input("Your Name", value=st.session_state.active_user)
@@ -85,8 +257,8 @@ with st.sidebar:
     
     st.header("🔥 Firing Phase")
     phase = st.selectbox("Current Phase", 
-                        ["heating", "water_smoking", "dehydration", "body_reduction", "glaze_maturation", "flash", "cooling", "finished"],
-                        index=["heating", "water_smoking", "dehydration", "body_reduction", "glaze_maturation", "flash", "cooling", "finished"].index(st.session_state.firing_phase))
+                        PHASES,
+                        index=PHASES.index(st.session_state.firing_phase))
     st.session_state.firing_phase = phase
     
     # Weather integration
@@ -96,7 +268,9 @@ with st.sidebar:
     location_coords = st.text_input("Location (lat,lon)", value="40.7128,-74.0060",
                                    help="Your kiln's GPS coordinates")
     
-    current_weather = get_weather_data(weather_api_key, location_coords)
+    weather_sampler = get_weather_sampler()
+    weather_sampler.configure(weather_api_key, location_coords)
+    current_weather = weather_sampler.latest()
     col1, col2 = st.columns(2)
     with col1:
         st.metric("Temp", f"{current_weather['temperature']:.0f}°F")
@@ -104,16 +278,59 @@ with st.sidebar:
     with col2:
         st.metric("Pressure", f"{current_weather['pressure']:.2f} inHg")
         st.metric("Wind", f"{current_weather['wind_speed']} mph")
-    st.caption(current_weather['note'])
+    st.caption(f"{current_weather['note']} · sampled every {WEATHER_CADENCE_MINUTES} min")
+    
+    with st.expander("Weather backfill"):
+        weather_file = st.file_uploader("Past conditions CSV", type="csv", key="weather_backfill",
+                                        help="Columns: time, temperature, humidity, pressure, wind_speed, conditions")
+        if weather_file and st.button("Load weather file"):
+            try:
+                st.success(f"Loaded {backfill_weather_csv(get_store(), weather_file)} weather samples")
+            except Exception as e:
+                st.error(f"Error reading weather CSV: {e}")
+        if st.session_state.log and st.button("Fill gaps with demo weather",
+                                              help="Stub samples across the current log where none were recorded"):
+            start, end = stub_range_for([entry.time for entry in st.session_state.log])
+            st.success(f"Added {backfill_weather_stub(get_store(), start, end)} stub samples")
     
     # Live stats
     if st.session_state.log:
-        df = pd.DataFrame(st.session_state.log)
-        latest = df.iloc[-1]
+        latest = st.session_state.log[-1]
+        log_times = [to_epoch(entry.time) for entry in st.session_state.log if entry.time]
         st.header("📊 Current Status")
         st.metric("Latest Temp (Front)", f"{latest.get('temp_front', 0)}°F")
         st.metric("Last Entry By", latest.get('logged_by', 'Unknown'))
-        st.metric("Firing Duration", f"{(pd.to_datetime(df['time']).max() - pd.to_datetime(df['time']).min()).total_seconds() / 3600:.1f} hrs")
+        st.metric("Firing Duration", f"{(max(log_times) - min(log_times)) / 3600 if log_times else 0:.1f} hrs")
+    
+    if replay:
+        @st.fragment(run_every=2 if replay.running else None)
+        def replay_status():
+            st.progress(replay.progress(), text=f"🎓 Replay of {replay.source[1]} · {replay.played} records"
+                                                + ("" if replay.running else " · finished"))
+            if replay.error:
+                st.error(f"Replay stopped: {replay.error}")
+            if replay.running:
+                replay_speed = st.select_slider("Replay speed", SPEEDS, value=replay.speed,
+                                                format_func=lambda s: f"{s}×", key="replay_live_speed")
+                if replay_speed != replay.speed:
+                    replay.set_speed(replay_speed)
+                if st.button("⏹️ Stop Replay"):
+                    replay.stop()
+            elif st.button("🗑️ Close Replay", help="Deletes the replayed firing and goes back to your kiln"):
+                get_replayer().close(*replay.target)
+                st.rerun(scope="app")
+            if st.session_state.replay_seen != (replay.target, replay.played):
+                st.rerun(scope="app")  # new records: redraw the log, charts and cone map
+        replay_status()
+    
+    # Training: an archived firing played back through the live views
+    if historical_catalog:
+        with st.expander("🎓 Training Replay"):
+            st.selectbox("Archived firing", [(f["kiln"], f["firing_id"]) for f in historical_catalog[::-1]],
+                         format_func=" / ".join, key="replay_source")
+            st.select_slider("Speed", SPEEDS, value=25, format_func=lambda s: f"{s}×", key="replay_speed")
+            st.button("▶️ Start Replay", on_click=start_replay,
+                      help="Plays the firing into a new '(replay)' kiln and switches to it")
 
 # Emergency contacts quick access
 if st.session_state.emergency_contacts:
@@ -123,25 +340,63 @@ if st.session_state.emergency_contacts:
             st.write(f"**{contact['name']}**: {contact['phone']}")
 
 # Historical firing comparison
-if st.session_state.historical_firings and st.session_state.log:
+if historical_catalog and st.session_state.log:
     with st.sidebar:
         st.header("📊 Historical Comparison")
-        current_df = pd.DataFrame(st.session_state.log)
-        if not current_df.empty:
-            current_temp = current_df.iloc[-1]['temp_front']
-            current_duration = (pd.to_datetime(current_df['time']).max() - pd.to_datetime(current_df['time']).min()).total_seconds() / 3600
-            
-            # Find similar point in historical data
-            for firing in st.session_state.historical_firings:
-                hist_df = pd.DataFrame(firing['log_data'])
-                if not hist_df.empty:
-                    # Find entry with similar temperature
-                    similar_entries = hist_df[abs(hist_df['temp_front'] - current_temp) < 50]
-                    if not similar_entries.empty:
-                        similar_entry = similar_entries.iloc[0]
-                        st.write(f"**{firing['firing_id']}** at {current_temp}°F:")
-                        st.caption(f"Action: {similar_entry.get('action_taken', 'N/A')}")
-                        break
+        current_temp = st.session_state.log[-1].temp_front
+        
+        # Find similar point in historical data
+        similar_entry = get_store().first_archived_entry_near(current_temp) if current_temp is not None else None
+        if similar_entry:
+            st.write(f"**{similar_entry['firing_id']}** at {current_temp}°F:")
+            st.caption(f"Action: {similar_entry['action_taken'] or 'N/A'}")
+
+# Alarms fired by any session (or the phone quick log), polled without a full rerun
+@st.fragment(run_every=15)
+def alarm_banner():
+    monitor = get_alarm_monitor()
+    if "alarm_seq" not in st.session_state:
+        # Only alarms from now on - don't replay the whole feed into a new tab
+        st.session_state.alarm_seq = monitor.seq
+    for event in monitor.events_since(st.session_state.alarm_seq, kiln_name):
+        st.toast(f"🚨 {event['kiln']} / {event['firing_id']}: {event['message']}", icon="🚨")
+        st.session_state.alarm_seq = event["seq"]
+    active = monitor.active(kiln_name, firing_id)
+    for alarm in get_store().alarms(kiln_name):
+        if alarm["id"] in active:
+            st.error(f"🚨 ALARM: {describe(alarm)}")
+
+alarm_banner()
+
+# Every kiln on this server at a glance, from the store's per-kiln status rows
+if st.sidebar.checkbox("🏭 Fleet Overview", value=sum(k["status"] == "active" for k in fleet) > 1,
+                       help="Latest temps, phase and last stoke of every kiln"):
+    @st.fragment(run_every=30)
+    def fleet_overview():
+        monitor = get_alarm_monitor()
+        kilns = [k for k in get_store().fleet() if not k["kiln"].endswith(REPLAY_SUFFIX)]
+        st.subheader(f"🏭 Fleet · {sum(k['status'] == 'active' for k in kilns)} of {len(kilns)} kilns firing")
+        for kiln in kilns:
+            kiln_col1, kiln_col2, kiln_col3, kiln_col4 = st.columns([2, 3, 2, 2])
+            alarms = len(monitor.active(kiln["kiln"], kiln["firing_id"]))
+            with kiln_col1:
+                marker = "👉 " if kiln["kiln"] == kiln_name else ""
+                st.write(f"{marker}**{kiln['kiln']}** {'🔥' if kiln['status'] == 'active' else '📦'}"
+                         + (f" 🚨 {alarms}" if alarms else ""))
+                st.caption(kiln["firing_id"])
+            with kiln_col2:
+                temps = " / ".join("-" if kiln[c] is None else f"{kiln[c]:.0f}"
+                                   for c in ("temp_front", "temp_middle", "temp_back"))
+                st.write(f"{temps}°F")
+                st.caption("front / middle / back" + ("" if kiln["temp_stack"] is None
+                                                       else f" · stack {kiln['temp_stack']:.0f}°F"))
+            with kiln_col3:
+                st.write((kiln["phase"] or "-").replace("_", " ").title())
+                st.caption(f"{kiln['atmosphere'] or ''} · {ago(kiln['last_time'])}")
+            with kiln_col4:
+                st.write(f"🪵 {ago(kiln['last_stoke'])}")
+                st.caption(f"by {kiln['logged_by'] or 'Unknown'}")
+    fleet_overview()
 
 # Main content area
 if st.session_state.mobile_mode:
@@ -151,58 +406,59 @@ if st.session_state.mobile_mode:
     # Simplified mobile entry form
     with st.form("mobile_log"):
         temp_front = st.number_input("Front Temp (°F)", value=900, step=25)
-        atmosphere = st.selectbox("Atmosphere", ["oxidation", "neutral", "reduction", "heavy_reduction"])
+        atmosphere = st.selectbox("Atmosphere", MOBILE_ATMOSPHERES)
         action = st.text_area("What did you do?", placeholder="Added 3 oak splits, adjusted damper...")
         notes = st.text_area("Voice Notes (use speech-to-text)", placeholder="Tap here and use voice input...")
         
-        # Weather inclusion
-        include_weather = st.checkbox("Include current weather", value=True)
-        
         submitted = st.form_submit_button("🔥 Quick Log Entry")
         
         if submitted:
-            entry = {
-                "kiln": kiln_name,
-                "firing_id": firing_id,
-                "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "logged_by": active_user,
-                "phase": phase,
-                "entry_type": "mobile_quick",
-                "temp_front": temp_front,
-                "temp_middle": temp_front,  # Assume similar for quick entry
-                "temp_back": temp_front,
-                "temp_stack": temp_front - 500,
-                "atmosphere": atmosphere,
-                "damper_position": 50,  # Default
-                "air_intake": 50,  # Default
-                "fuel_type": "wood_only",
-                "action_taken": action,
-                "notes": notes
-            }
-            
-            if include_weather:
-                entry.update({
-                    "weather_temp": current_weather['temperature'],
-                    "weather_humidity": current_weather['humidity'],
-                    "weather_pressure": current_weather['pressure'],
-                    "weather_wind": current_weather['wind_speed'],
-                    "weather_conditions": current_weather['conditions']
-                })
-            
-            st.session_state.log.append(entry)
+            entry = mobile_entry(kiln_name, firing_id, active_user, phase, temp_front, atmosphere, action, notes)
+            get_store().append_entries([entry])
             st.success("✅ Quick entry logged!")
             st.rerun()
     
+    # Offline-capable quick log served outside Streamlit
+    if ingest_server:
+        token = f"&token={ingest_server.token}" if ingest_server.token else ""
+        st.caption(f"📴 Patchy Wi-Fi? Use the offline quick log at "
+                   f"{ingest_url(ingest_server)}/?kiln={kiln_name}&firing_id={firing_id}{token} - "
+                   f"entries queue on the phone and send when the connection returns."
+                   + (" (Only reachable from this computer; start the app with WOODFIREPRO_INGEST_HOST=0.0.0.0 "
+                      "to let phones on the shop Wi-Fi use it.)" if ingest_server.local else ""))
+    
     # Recent entries for mobile
     if st.session_state.log:
         st.subheader("Recent Entries")
-        df = pd.DataFrame(st.session_state.log)
-        recent = df.tail(3).sort_values("time", ascending=False)
-        for _, row in recent.iterrows():
-            st.write(f"**{row['time'].split()[1]}** - {row['temp_front']}°F - {row.get('action_taken', 'No action')}")
+        recent = sorted(st.session_state.log[-3:], key=lambda entry: entry.time or "", reverse=True)
+        for entry in recent:
+            st.write(f"**{entry.time.split()[1]}** - {temp_text(entry.temp_front)}°F - {entry.get('action_taken', 'No action')}")
 
 else:
     # Full desktop interface
+    import altair as alt
+    import pandas as pd
+
+    from woodfire_analytics import archive_analytics, distribution
+    from woodfire_crew import ShiftIndex, shift_label, shift_times
+    from woodfire_field import (GRID_COLS, GRID_ROWS, cone_event_temperatures, field_at,
+                                sensor_positions, temperature_field)
+    from woodfire_lag import CONTROLS, MIN_STEP_PCT, SENSORS, control_grid, control_steps, lag_summary, step_responses
+    from woodfire_overlay import elapsed_curve
+
+    CONTROL_LABELS = {"damper_position": "Damper", "air_intake": "Air Intake"}
+    LIVE_WINDOW_MINUTES = 30
+    LIVE_STALE_SECONDS = 10
+    SENSOR_LABELS = dict(zip(SENSORS, ['Front Spy', 'Middle Spy', 'Back Spy', 'Stack']))
+
+    def response_table(summary, control):
+        """``lag_summary`` rows for one control, labelled for display."""
+        table = summary[summary["control"] == control].drop(columns="control")
+        table["sensor"] = table["sensor"].map(SENSOR_LABELS)
+        return table.rename(columns={
+            "sensor": "Sensor", "steps": "Steps", "best_lag_min": "Strongest Lag (min)", "r": "Correlation",
+            "half_response_min": "Half Response (min)", "f_per_10pct": "°F per +10%"}).set_index("Sensor").round(2)
+
     # Main tabs
     log_tab, safety_tab, wood_tab, analysis_tab, timer_tab, cones_tab, crew_tab, history_tab, export_tab, about_tab = st.tabs([
         "📝 Firing Log", "⚠️ Safety", "🪵 Wood Tracker", "📊 Analysis", "⏲️ Timer", "🎯 Cone Map", "👥 Crew", "📊 History", "💾 Export", "ℹ️ About"
@@ -229,7 +485,10 @@ else:
         for i, item in enumerate(safety_items):
             checked = st.checkbox(item, key=f"safety_{i}", 
                                 value=st.session_state.safety_checklist.get(f"safety_{i}", False))
+            changed = st.session_state.safety_checklist.get(f"safety_{i}", False) != checked
             st.session_state.safety_checklist[f"safety_{i}"] = checked
+            if changed:
+                save_firing_state(kiln_name, firing_id, "safety_checklist")
         
         # Safety status
         completed_items = sum(st.session_state.safety_checklist.values())
@@ -308,11 +567,55 @@ else:
                     "notes": f"SAFETY INCIDENT: {incident_description}"
                 }
                 
-                st.session_state.log.append(log_entry)
+                get_store().append_entries([log_entry])
                 st.error(f"⚠️ {incident_type} incident logged!")
 
     # Enhanced Firing Log with weather integration
     with log_tab:
+        sensor_feed = get_sensor_feed()
+        sensor_age = sensor_feed.age()
+        sensors_live = sensor_feed.running or (sensor_age is not None and sensor_age < LIVE_STALE_SECONDS)
+        with st.expander("📡 Live Sensors", expanded=sensors_live):
+            source_col, button_col = st.columns([3, 1])
+            with source_col:
+                sensor_source = st.text_input(
+                    "Source", value=sensor_feed.source or "sim",
+                    help="'sim' for a simulated feed, or serial:/dev/ttyUSB0@9600 for a pyrometer sending one line of "
+                         "comma-separated °F per sample (front, middle, back, stack)")
+            with button_col:
+                if sensor_feed.running:
+                    if st.button("⏹️ Stop Sensors"):
+                        sensor_feed.stop()
+                        st.rerun()
+                elif st.button("▶️ Start Sensors"):
+                    try:
+                        sensor_feed.start(sensor_source)
+                        st.rerun()
+                    except (ValueError, RuntimeError) as e:
+                        st.error(str(e))
+            if sensor_feed.exitcode:
+                st.error(f"The acquisition process stopped (exit code {sensor_feed.exitcode})")
+            
+            @st.fragment(run_every=2 if sensors_live else None)
+            def live_sensors():
+                times, values = sensor_feed.latest(LIVE_WINDOW_MINUTES * 60)  # views of the ring, not copies
+                if not len(times):
+                    st.caption("No samples yet - start the feed here or run `python woodfire_sensors.py` next to the app")
+                    return
+                for metric_col, label, value in zip(st.columns(len(SENSOR_LABELS)), SENSOR_LABELS.values(), values[-1]):
+                    metric_col.metric(label, "-" if value != value else f"{value:.0f}°F")
+                st.line_chart(pd.DataFrame(values, columns=list(SENSOR_LABELS.values()),
+                                           index=pd.to_datetime(times, unit="s")))
+                st.caption(f"{len(times)} samples in the last {LIVE_WINDOW_MINUTES} min · "
+                           f"newest {sensor_feed.age():.0f} s ago")
+                if st.button("📝 Log Current Readings", help="Median of the last minute, as an observation"):
+                    get_store().append_entries([dict(
+                        sensor_feed.reading(60), kiln=kiln_name, firing_id=firing_id,
+                        time=datetime.now().strftime("%Y-%m-%d %H:%M:%S"), logged_by=active_user, phase=phase,
+                        entry_type="observation", action_taken="", notes="Live sensor reading (1 min median)")])
+                    st.rerun(scope="app")
+            live_sensors()
+        
         st.subheader("📝 New Log Entry")
         
         # Time and basic info
@@ -323,13 +626,13 @@ else:
             t_now = datetime.combine(t_date, t_time)
         with col2:
             entry_type = st.selectbox("Entry Type", 
-                                     ["observation", "stoke", "damper_change", "door_brick", "problem", "milestone", "shift_change"])
+                                     ENTRY_TYPES)
         with col3:
             st.write(f"**Logging as:** {active_user}")
             
             # Weather impact assessment
             weather_impact = st.selectbox("Weather Impact", 
-                                        ["none", "helping_draft", "hindering_draft", "affecting_heat", "other"])
+                                        WEATHER_IMPACTS)
         
         # Multiple temperature readings
         st.subheader("🌡️ Temperature Readings")
@@ -348,13 +651,13 @@ else:
         atm_col1, atm_col2, atm_col3, atm_col4 = st.columns(4)
         with atm_col1:
             atmosphere = st.selectbox("Atmosphere", 
-                                     ["neutral", "light_oxidation", "oxidation", "light_reduction", "reduction", "heavy_reduction"])
+                                     ATMOSPHERES)
         with atm_col2:
             damper_position = st.slider("Damper Position", 0, 100, 50, help="0 = closed, 100 = fully open")
         with atm_col3:
             air_intake = st.slider("Primary Air", 0, 100, 50, help="Primary air intake %")
         with atm_col4:
-            fuel_type = st.selectbox("Primary Fuel", ["wood_only", "gas_only", "wood+gas", "coasting"])
+            fuel_type = st.selectbox("Primary Fuel", FUEL_TYPES)
         
         # Flame and color observations
         st.subheader("👁️ Visual Observations")
@@ -374,7 +677,7 @@ else:
                            placeholder="Problems, decisions, atmospheric conditions, weather effects...")
         
         # Historical comparison suggestion
-        if st.session_state.historical_firings:
+        if historical_catalog:
             st.info("💡 Check the History tab for similar temperature comparisons from previous firings")
         
         # Add entry button
@@ -399,33 +702,21 @@ else:
                 "draft_sound": draft_sound,
                 "action_taken": action_taken,
                 "notes": notes,
-                "weather_impact": weather_impact,
-                # Include current weather data
-                "weather_temp": current_weather['temperature'],
-                "weather_humidity": current_weather['humidity'],
-                "weather_pressure": current_weather['pressure'],
-                "weather_wind": current_weather['wind_speed'],
-                "weather_conditions": current_weather['conditions']
+                "weather_impact": weather_impact
+                # Weather comes from the sampled series, joined on entry time
             }
-            st.session_state.log.append(entry)
+            get_store().append_entries([entry])
             st.success(f"✅ Entry logged by {active_user}")
             st.rerun()
 
         # Display recent entries with edit/delete functionality
         if st.session_state.log:
             st.subheader("📋 Recent Entries")
-            df = pd.DataFrame(st.session_state.log)
+            df = join_weather(entries_frame(st.session_state.log), get_store())
             df_display = df.sort_values("time", ascending=False).head(8)
             
             for i, (_, row) in enumerate(df_display.iterrows()):
-                # Find the actual index in the session state
-                entry_index = None
-                for idx, entry in enumerate(st.session_state.log):
-                    if (entry['time'] == row['time'] and 
-                        entry.get('logged_by') == row.get('logged_by') and
-                        entry['temp_front'] == row['temp_front']):
-                        entry_index = idx
-                        break
+                entry_id = row['id']
                 
                 # Color-code by entry type
                 entry_colors = {
@@ -435,11 +726,15 @@ else:
                 }
                 icon = entry_colors.get(row['entry_type'], "📝")
                 
-                with st.expander(f"{icon} {row['time']} - {row['entry_type'].replace('_', ' ').title()} by {row.get('logged_by', 'Unknown')} ({row['temp_front']}°F)"):
+                with st.expander(f"{icon} {row['time']} - {row['entry_type'].replace('_', ' ').title()} by {row.get('logged_by', 'Unknown')} ({temp_text(row['temp_front'])}°F)"):
                     # Entry content
                     temp_col, atm_col, weather_col = st.columns(3)
                     with temp_col:
-                        st.write(f"**Temps:** F:{row['temp_front']}° M:{row['temp_middle']}° B:{row['temp_back']}° Stack:{row['temp_stack']}°")
+                        st.write(f"**Temps:** F:{temp_text(row['temp_front'])}° M:{temp_text(row['temp_middle'])}° "
+                                 f"B:{temp_text(row['temp_back'])}° Stack:{temp_text(row['temp_stack'])}°")
+                        masked = masked_readings(row)
+                        if masked:
+                            st.write(f"**🧹 Masked:** {', '.join(masked)}")
                         if row.get('flame_color'):
                             st.write(f"**Flame:** {row['flame_color']}")
                         if row.get('spy_color'):
@@ -448,12 +743,13 @@ else:
                             st.write(f"**Draft:** {row['draft_sound']}")
                     with atm_col:
                         st.write(f"**Atmosphere:** {row['atmosphere']}")
-                        st.write(f"**Damper:** {row['damper_position']}% | **Air:** {row['air_intake']}%")
+                        damper, air = temp_text(row['damper_position']), temp_text(row['air_intake'])
+                        st.write(f"**Damper:** {damper}{'%' * (damper != '—')} | **Air:** {air}{'%' * (air != '—')}")
                         st.write(f"**Fuel:** {row['fuel_type']}")
                         if row.get('action_taken'):
                             st.write(f"**Action:** {row['action_taken']}")
                     with weather_col:
-                        if row.get('weather_temp'):
+                        if pd.notna(row.get('weather_temp')):
                             st.write(f"**Weather:** {row['weather_temp']:.0f}°F, {row['weather_humidity']}% humidity")
                             st.write(f"**Wind:** {row['weather_wind']} mph")
                             st.write(f"**Conditions:** {row['weather_conditions']}")
@@ -466,29 +762,29 @@ else:
                     edit_col, delete_col = st.columns(2)
                     with edit_col:
                         if st.button(f"✏️ Edit Entry", key=f"edit_{i}"):
-                            st.session_state[f"editing_{entry_index}"] = True
+                            st.session_state[f"editing_{entry_id}"] = True
                             st.rerun()
                     with delete_col:
                         if st.button(f"🗑️ Delete Entry", key=f"delete_{i}", type="secondary"):
-                            if entry_index is not None:
-                                st.session_state.log.pop(entry_index)
-                                st.success("Entry deleted!")
-                                st.rerun()
+                            get_store().delete_entry(entry_id, actor=active_user)
+                            st.success("Entry deleted!")
+                            st.rerun()
         
         # Edit form for entries
         if st.session_state.log:
-            for idx, entry in enumerate(st.session_state.log):
+            for entry in st.session_state.log:
+                idx = entry.id
                 if st.session_state.get(f"editing_{idx}", False):
-                    st.subheader(f"✏️ Editing Entry: {entry['time']}")
+                    st.subheader(f"✏️ Editing Entry: {entry.time}")
                     
                     with st.form(f"edit_form_{idx}"):
                         # Editable fields
                         edit_col1, edit_col2 = st.columns(2)
                         with edit_col1:
-                            new_temp_front = st.number_input("Front Temp", value=entry['temp_front'], key=f"edit_temp_front_{idx}")
+                            new_temp_front = st.number_input("Front Temp", value=entry.temp_front, key=f"edit_temp_front_{idx}")
                             new_atmosphere = st.selectbox("Atmosphere", 
-                                                        ["neutral", "light_oxidation", "oxidation", "light_reduction", "reduction", "heavy_reduction"],
-                                                        index=["neutral", "light_oxidation", "oxidation", "light_reduction", "reduction", "heavy_reduction"].index(entry.get('atmosphere', 'neutral')),
+                                                        ATMOSPHERES,
+                                                        index=ATMOSPHERES.index(entry.atmosphere) if entry.atmosphere in ATMOSPHERES else 0,
                                                         key=f"edit_atmosphere_{idx}")
                             new_damper = st.slider("Damper Position", 0, 100, entry.get('damper_position', 50), key=f"edit_damper_{idx}")
                         
@@ -501,13 +797,15 @@ else:
                         with save_col:
                             if st.form_submit_button("💾 Save Changes"):
                                 # Update the entry
-                                st.session_state.log[idx]['temp_front'] = new_temp_front
-                                st.session_state.log[idx]['atmosphere'] = new_atmosphere
-                                st.session_state.log[idx]['damper_position'] = new_damper
-                                st.session_state.log[idx]['action_taken'] = new_action
-                                st.session_state.log[idx]['notes'] = new_notes
-                                st.session_state.log[idx]['edited_by'] = active_user
-                                st.session_state.log[idx]['edited_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                                get_store().update_entry(idx, {
+                                    "temp_front": new_temp_front,
+                                    "atmosphere": new_atmosphere,
+                                    "damper_position": new_damper,
+                                    "action_taken": new_action,
+                                    "notes": new_notes,
+                                    "edited_by": active_user,
+                                    "edited_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                                }, actor=active_user)
                                 
                                 # Clear editing state
                                 st.session_state[f"editing_{idx}"] = False
@@ -527,8 +825,9 @@ else:
             with bulk_log_col1:
                 if st.button("🗑️ Clear Last Entry", type="secondary"):
                     if st.session_state.log:
-                        removed = st.session_state.log.pop()
-                        st.success(f"Removed entry from {removed['time']}")
+                        removed = st.session_state.log[-1]
+                        get_store().delete_entry(removed.id, actor=active_user)
+                        st.success(f"Removed entry from {removed.time}")
                         st.rerun()
             
             with bulk_log_col2:
@@ -536,7 +835,30 @@ else:
                 st.write(f"**Total Entries:** {entry_count}")
                 if entry_count > 0:
                     latest_entry = st.session_state.log[-1]
-                    st.write(f"**Latest:** {latest_entry['time']} - {latest_entry['temp_front']}°F")
+                    st.write(f"**Latest:** {latest_entry.time} - {latest_entry.temp_front}°F")
+        
+        # Undo/redo your own log changes (adds, edits, deletes) - deleted entries are only tombstoned
+        undo_col, redo_col = st.columns(2)
+        with undo_col:
+            if st.button("↩️ Undo My Last Change", help=f"Undo {active_user}'s most recent add, edit or delete"):
+                undone = get_store().undo(kiln_name, firing_id, active_user)
+                if undone:
+                    st.success(f"Undid {undone['op']} of entry #{undone['entry_id']}")
+                    st.rerun()
+                elif undone is False:
+                    st.warning("Someone else has changed that entry since, so it was left as it is")
+                else:
+                    st.info("Nothing to undo")
+        with redo_col:
+            if st.button("↪️ Redo", help="Re-apply the change you just undid"):
+                redone = get_store().redo(kiln_name, firing_id, active_user)
+                if redone:
+                    st.success(f"Redid {redone['op']} of entry #{redone['entry_id']}")
+                    st.rerun()
+                elif redone is False:
+                    st.warning("Someone else has changed that entry since, so it was left as it is")
+                else:
+                    st.info("Nothing to redo")
 
     # Historical Comparison Tab - NEW
     with history_tab:
@@ -552,35 +874,41 @@ else:
                 firing_name = st.text_input("Name this firing", value=f"Import_{datetime.now().strftime('%m%d')}")
                 
                 if st.button("Add to Historical Database"):
-                    historical_firing = {
-                        "firing_id": firing_name,
-                        "date_imported": datetime.now().strftime("%Y-%m-%d"),
-                        "log_data": historical_df.to_dict('records')
-                    }
-                    st.session_state.historical_firings.append(historical_firing)
+                    import_kiln = historical_df['kiln'].mode().iloc[0] if 'kiln' in historical_df.columns else kiln_name
+                    records = historical_df.astype(object).where(historical_df.notna(), None).to_dict('records')
+                    get_store().archive_firing(str(import_kiln), firing_name, records)
                     st.success(f"Added {firing_name} to historical database!")
                     
             except Exception as e:
                 st.error(f"Error reading CSV: {e}")
         
+        bundle_upload = st.file_uploader("Or import a firing bundle (.zip)", type="zip")
+        if bundle_upload and st.button("📦 Import Bundle to Historical Database"):
+            try:
+                imported = import_bundle(get_store(), bundle_upload)
+                st.success(f"Added {imported['firing_id']} ({imported['kiln']}) to historical database!")
+            except ValueError as e:
+                st.error(f"Couldn't import bundle: {e}")
+        
         # Display historical firings
-        if st.session_state.historical_firings:
-            st.write(f"**Historical Firings Available: {len(st.session_state.historical_firings)}**")
+        if historical_catalog:
+            st.write(f"**Historical Firings Available: {len(historical_catalog)}**")
             
-            selected_firing = st.selectbox("Select firing for comparison", 
-                                         [f["firing_id"] for f in st.session_state.historical_firings])
+            selected_summary = st.selectbox(
+                "Select firing for comparison", historical_catalog,
+                format_func=lambda f: (f"{f['firing_id']} ({f['kiln']}) - {(f['start_time'] or '')[:10]}, "
+                                       f"peak {f['peak_front'] or 0:.0f}°F, {f['duration_hours'] or 0:.1f} hrs"))
+            selected_firing = selected_summary["firing_id"]
             
             if selected_firing and st.session_state.log:
                 # Current firing data
-                current_df = pd.DataFrame(st.session_state.log)
+                current_df = entries_frame(st.session_state.log)
                 current_df['datetime'] = pd.to_datetime(current_df['time'])
                 
-                # Selected historical firing data
-                historical_firing = next(f for f in st.session_state.historical_firings if f["firing_id"] == selected_firing)
-                historical_df = pd.DataFrame(historical_firing["log_data"])
+                # Selected historical firing data (shared across sessions - don't modify in place)
+                historical_df = get_history_cache().get(selected_summary["kiln"], selected_firing)
                 
                 if 'time' in historical_df.columns:
-                    historical_df['datetime'] = pd.to_datetime(historical_df['time'])
                     
                     # Real-time comparison
                     if not current_df.empty:
@@ -613,61 +941,167 @@ else:
                                 st.write(f"Temperature: {closest_entry['temp_front']}°F")
                                 st.write(f"Action taken: {closest_entry.get('action_taken', 'None')}")
                                 st.write(f"Notes: {closest_entry.get('notes', 'None')[:100]}...")
-                            
-                            # Temperature progression comparison
-                            st.subheader("🔥 Temperature Progression Comparison")
-                            
-                            # Prepare data for comparison chart
-                            current_chart_data = current_df.set_index('datetime')[['temp_front']].copy()
-                            current_chart_data.columns = ['Current Firing Front Temp']
-                            
-                            # Normalize historical data to start at same time as current
-                            if not historical_df.empty:
-                                hist_start = historical_df['datetime'].min()
-                                current_start = current_df['datetime'].min()
-                                time_offset = current_start - hist_start
-                                
-                                historical_df['adjusted_datetime'] = historical_df['datetime'] + time_offset
-                                historical_chart_data = historical_df.set_index('adjusted_datetime')[['temp_front']].copy()
-                                historical_chart_data.columns = [f'{selected_firing} Front Temp']
-                                
-                                # Combine datasets
-                                combined_data = pd.concat([current_chart_data, historical_chart_data], axis=1)
-                                st.line_chart(combined_data)
                         
                         else:
                             st.info("No similar temperature points found in historical data")
+            
+            # Temperature progression: any number of firings lined up by hours since their first entry
+            st.subheader("🔥 Temperature Progression Comparison")
+            overlay_col1, overlay_col2 = st.columns([3, 1])
+            with overlay_col1:
+                overlay_firings = st.multiselect(
+                    "Compare against", historical_catalog,
+                    default=historical_catalog[-5:],
+                    format_func=lambda f: f"{f['firing_id']} ({f['kiln']})")
+            with overlay_col2:
+                overlay_sensor = st.selectbox("Sensor", ["temp_front", "temp_middle", "temp_back", "temp_stack"],
+                                              format_func=lambda c: c.replace("temp_", "").title())
+                show_each = st.checkbox("Show each firing", value=len(overlay_firings) <= 10)
+            
+            if overlay_firings:
+                overlay = get_firing_overlay()
+                selection = [(f["kiln"], f["firing_id"]) for f in overlay_firings]
+                bands = overlay.bands(selection, overlay_sensor).reset_index()
+                layers = [
+                    alt.Chart(bands).mark_area(opacity=0.25, color="#ff7f0e").encode(
+                        x=alt.X("hours:Q", title="Hours since first entry"),
+                        y=alt.Y("p10:Q", title="°F"), y2="p90:Q",
+                        tooltip=[alt.Tooltip("hours:Q", format=".2f"), alt.Tooltip("p10:Q", format=".0f"),
+                                 alt.Tooltip("median:Q", format=".0f"), alt.Tooltip("p90:Q", format=".0f"),
+                                 "firings:Q"]),
+                    alt.Chart(bands).mark_line(color="#ff7f0e", strokeDash=[6, 3]).encode(
+                        x="hours:Q", y="median:Q"),
+                ]
+                if show_each:
+                    each = overlay.frame(selection, overlay_sensor).reset_index().melt(
+                        "hours", var_name="firing", value_name="temp").dropna()
+                    layers.insert(0, alt.Chart(each).mark_line(strokeWidth=1, opacity=0.35).encode(
+                        x="hours:Q", y="temp:Q", color=alt.Color("firing:N", legend=None), tooltip=["firing"]))
+                if st.session_state.log:
+                    current = entries_frame(st.session_state.log)
+                    curve = elapsed_curve(current["time"], current[overlay_sensor], overlay.step)
+                    current_line = pd.DataFrame({"hours": [i * overlay.step for i in range(len(curve))],
+                                                 "temp": curve})
+                    layers.append(alt.Chart(current_line).mark_line(color="#d62728", strokeWidth=3).encode(
+                        x="hours:Q", y="temp:Q"))
+                st.altair_chart(alt.layer(*layers), use_container_width=True)
+                st.caption(f"Current firing (red) against the median (dashed) and 10th-90th percentile band of "
+                           f"{len(selection)} firing(s), every {overlay.step * 60:.0f} min since each firing's first entry")
+            
+            cache_stats = get_history_cache().stats()
+            st.caption(f"Firing cache: {cache_stats['firings']} firings, "
+                       f"{cache_stats['bytes'] / 2**20:.1f} of {cache_stats['budget'] / 2**20:.0f} MB · "
+                       f"{cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                       f"{cache_stats['evictions']} evictions")
                 
         else:
             st.info("No historical firings loaded. Upload previous firing CSV files to enable comparison.")
         
         # Quick historical insights
-        if st.session_state.historical_firings and st.session_state.log:
+        if historical_catalog and st.session_state.log:
             st.subheader("💡 Historical Insights")
             
-            current_df = pd.DataFrame(st.session_state.log)
-            if not current_df.empty:
-                current_temp = current_df.iloc[-1]['temp_front']
+            current_temp = st.session_state.log[-1].temp_front or 0
+            insights = [{
+                "firing_id": summary["firing_id"],
+                "max_temp": summary["peak_front"],
+                "final_actions": summary["final_actions"]
+            } for summary in historical_catalog if (summary["peak_front"] or 0) > current_temp]
+            
+            if insights:
+                st.write("**What happened next in previous firings:**")
+                for insight in insights[:3]:  # Show top 3
+                    st.write(f"**{insight['firing_id']}** (reached {insight['max_temp']:.0f}°F):")
+                    for action in insight['final_actions'][-2:]:  # Last 2 actions
+                        st.write(f"  • {action}")
+        
+        # Full-text search over every firing in the store (current and historical)
+        st.subheader("🔎 Search Notes & Actions")
+        search_col1, search_col2, search_col3 = st.columns([3, 1, 1])
+        with search_col1:
+            search_query = st.text_input("Search", placeholder='e.g. salt, "body reduction", stok*')
+        with search_col2:
+            search_min_temp = st.number_input("Above (°F)", min_value=0, max_value=2600, value=0, step=50)
+        with search_col3:
+            search_scope = st.selectbox("Firings", ["All firings", "This firing"])
+        
+        if search_query:
+            search_started = datetime.now()
+            hits = get_store().search(search_query, min_temp=search_min_temp or None,
+                                      kiln=kiln_name if search_scope == "This firing" else None,
+                                      firing_id=firing_id if search_scope == "This firing" else None)
+            search_ms = (datetime.now() - search_started).total_seconds() * 1000
+            st.caption(f"{len(hits)} matches in {search_ms:.0f} ms")
+            for hit in hits:
+                st.write(f"**{hit['firing_id']}** ({hit['kiln']}) · {hit['time']} · "
+                         f"F:{hit['temp_front']}° M:{hit['temp_middle']}° B:{hit['temp_back']}° · "
+                         f"{hit['entry_type']} by {hit['logged_by']}")
+                st.caption(hit['snippet'])
+        
+        # Archive-wide analytics, from the catalog rather than each firing's log
+        if historical_catalog:
+            st.subheader("📈 Archive Analytics")
+            archive_kilns = sorted({f["kiln"] for f in historical_catalog})
+            archive_starts = [f["start_time"][:10] for f in historical_catalog if f["start_time"]]
+            filter_col1, filter_col2 = st.columns(2)
+            with filter_col1:
+                analytics_kilns = st.multiselect("Kilns", archive_kilns, default=archive_kilns)
+            with filter_col2:
+                analytics_dates = st.date_input(
+                    "Firings started between",
+                    value=(datetime.strptime(min(archive_starts), "%Y-%m-%d").date(),
+                           datetime.strptime(max(archive_starts), "%Y-%m-%d").date()) if archive_starts else ())
+            
+            date_from = date_to = None
+            if len(analytics_dates) == 2:
+                date_from = analytics_dates[0].strftime("%Y-%m-%d")
+                date_to = (analytics_dates[1] + timedelta(days=1)).strftime("%Y-%m-%d")
+            archive = archive_analytics(get_store(), analytics_kilns, date_from, date_to)
+            archive_df = archive["firings"]
+            
+            if archive_df.empty:
+                st.info("No archived firings match these filters")
+            else:
+                stat_col1, stat_col2, stat_col3, stat_col4 = st.columns(4)
+                with stat_col1:
+                    st.metric("Firings", len(archive_df))
+                with stat_col2:
+                    st.metric("Median Duration", f"{archive_df['duration_hours'].median():.1f} hrs")
+                with stat_col3:
+                    st.metric("Median Peak", f"{archive_df['peak_temp'].median():.0f}°F")
+                with stat_col4:
+                    st.metric("Median Wood", f"{archive_df['wood_pieces'].median():.0f} pieces")
                 
-                insights = []
-                for firing in st.session_state.historical_firings:
-                    hist_df = pd.DataFrame(firing["log_data"])
-                    if not hist_df.empty and 'temp_front' in hist_df.columns:
-                        max_temp = hist_df['temp_front'].max()
-                        if max_temp > current_temp:
-                            final_actions = hist_df.tail(3)['action_taken'].tolist()
-                            insights.append({
-                                "firing_id": firing["firing_id"],
-                                "max_temp": max_temp,
-                                "final_actions": [a for a in final_actions if pd.notna(a)]
-                            })
+                dist_col1, dist_col2, dist_col3 = st.columns(3)
+                with dist_col1:
+                    st.write("**Duration (hrs)**")
+                    st.bar_chart(distribution(archive_df['duration_hours']))
+                with dist_col2:
+                    st.write("**Peak Temperature (°F)**")
+                    st.bar_chart(distribution(archive_df['peak_temp']))
+                with dist_col3:
+                    st.write("**Wood per Firing (pieces)**")
+                    st.bar_chart(distribution(archive_df['wood_pieces']))
+                
+                if not archive["phases"].empty:
+                    st.write("**Hours per Phase**")
+                    st.bar_chart(archive["phases"].describe().loc[["25%", "50%", "75%"]].T)
+                    st.write("**°F Gained per Phase (median)**")
+                    st.bar_chart(archive["phase_gain"].median())
+                if not archive["atmosphere"].empty:
+                    st.write("**Atmosphere Mix (share of entries, averaged over firings)**")
+                    st.bar_chart(archive["atmosphere"].mean())
+                
+                archive_grid, archive_response = get_control_lag().archive(analytics_kilns, date_from, date_to)
+                if archive_response["steps"].any():
+                    st.write("**Control Response (median over every damper and air change)**")
+                    archive_control = st.radio("Control", CONTROLS, format_func=CONTROL_LABELS.get, horizontal=True,
+                                               key="archive_response_control")
+                    st.dataframe(response_table(archive_response, archive_control), use_container_width=True)
                 
-                if insights:
-                    st.write("**What happened next in previous firings:**")
-                    for insight in insights[:3]:  # Show top 3
-                        st.write(f"**{insight['firing_id']}** (reached {insight['max_temp']}°F):")
-                        for action in insight['final_actions'][-2:]:  # Last 2 actions
-                            st.write(f"  • {action}")
+                with st.expander("Per-firing table"):
+                    st.dataframe(archive_df.join(archive["phases"].add_suffix("_hrs"), on=["kiln", "firing_id"]),
+                                 use_container_width=True)
 
     # Rest of the tabs (Wood Tracker, Analysis, Timer, Cone Map, Crew, Export, About) remain the same as before
     # Wood Consumption Tracker
@@ -692,6 +1126,7 @@ else:
         
         if st.button("🔥 Log Wood Consumption"):
             wood_entry = {
+                "kiln": kiln_name,
                 "time": f"{datetime.now().strftime('%Y-%m-%d')} {wood_time}",
                 "logged_by": active_user,
                 "species": wood_species,
@@ -701,7 +1136,7 @@ else:
                 "notes": wood_notes,
                 "firing_id": firing_id
             }
-            st.session_state.wood_log.append(wood_entry)
+            get_store().append_wood([wood_entry])
             st.success(f"✅ Logged {wood_quantity} {wood_size} {wood_species} to {wood_location}")
         
         # Wood consumption summary
@@ -729,20 +1164,10 @@ else:
                 with wood_col1:
                     st.write(f"**{wood['time']}** - {wood['quantity']} {wood['size']} {wood['species']} → {wood['location']} *(by {wood['logged_by']})*")
                 with wood_col2:
-                    # Find the actual index in wood_log
-                    wood_index = None
-                    for i, entry in enumerate(st.session_state.wood_log):
-                        if (entry['time'] == wood['time'] and 
-                            entry['species'] == wood['species'] and 
-                            entry['quantity'] == wood['quantity']):
-                            wood_index = i
-                            break
-                    
-                    if wood_index is not None:
-                        if st.button("🗑️", key=f"delete_wood_{idx}", help="Delete this wood entry"):
-                            st.session_state.wood_log.pop(wood_index)
-                            st.success("Wood entry deleted!")
-                            st.rerun()
+                    if st.button("🗑️", key=f"delete_wood_{wood['id']}", help="Delete this wood entry"):
+                        get_store().delete_wood(wood['id'])
+                        st.success("Wood entry deleted!")
+                        st.rerun()
         
         # Traditional inventory section
         st.subheader("📦 Wood Inventory Management")
@@ -772,7 +1197,7 @@ else:
     # Analysis Tab - Enhanced with weather correlation
     with analysis_tab:
         if st.session_state.log and len(st.session_state.log) > 1:
-            df = pd.DataFrame(st.session_state.log)
+            df = join_weather(entries_frame(st.session_state.log), get_store())
             df['datetime'] = pd.to_datetime(df['time'])
             df = df.sort_values('datetime')
             df_chart = df.set_index('datetime')
@@ -783,21 +1208,69 @@ else:
             temp_chart_data.columns = ['Front Spy', 'Middle Spy', 'Back Spy', 'Stack']
             st.line_chart(temp_chart_data)
             
+            # Readings the store's cleaning stage masked on the way in
+            flag_columns = [c for c in df.columns if c.startswith("flag_")]
+            if flag_columns:
+                flags = df[flag_columns].melt(var_name="sensor", value_name="reason").dropna()
+                if not flags.empty:
+                    st.subheader("🧹 Sensor Cleaning")
+                    flags["sensor"] = flags["sensor"].str.replace("flag_temp_", "", regex=False)
+                    st.dataframe(pd.crosstab(flags["sensor"], flags["reason"]), use_container_width=True)
+                    st.caption(f"{len(flags)} readings masked (dropouts, spikes, stuck or incident readings) - "
+                               f"they are left out of the charts above; the raw values stay in the log export.")
+            
             # Atmosphere Control Chart
             st.subheader("💨 Atmosphere Control")
             control_chart_data = df_chart[['damper_position', 'air_intake']].copy()
             control_chart_data.columns = ['Damper Position %', 'Air Intake %']
             st.line_chart(control_chart_data)
             
+            # Derived series, kept up to date in the store as entries come in
+            derived = get_derived_series().frame(kiln_name, firing_id)
+            st.subheader("📈 Climb Rate (°F/hr, smoothed)")
+            climb_chart_data = derived[['rate_front', 'rate_middle', 'rate_back', 'rate_stack']].copy()
+            climb_chart_data.columns = ['Front Spy', 'Middle Spy', 'Back Spy', 'Stack']
+            st.line_chart(climb_chart_data)
+            
+            st.subheader("⚖️ Kiln Evenness")
+            even_col1, even_col2 = st.columns(2)
+            with even_col1:
+                diff_chart_data = derived[['front_back', 'front_middle']].copy()
+                diff_chart_data.columns = ['Front - Back (°F)', 'Front - Middle (°F)']
+                st.line_chart(diff_chart_data)
+            with even_col2:
+                ratio_chart_data = derived[['stack_ratio']].copy()
+                ratio_chart_data.columns = ['Stack / Chamber']
+                st.line_chart(ratio_chart_data)
+            
+            # Lagged response of the temperatures to damper and air changes
+            st.subheader("🎛️ Control Response")
+            response_grid = control_grid(df)
+            response_control = st.radio("Control", CONTROLS, format_func=CONTROL_LABELS.get, horizontal=True,
+                                        key="response_control")
+            response_steps = control_steps(response_grid, response_control)
+            if response_steps.empty:
+                st.info(f"No {CONTROL_LABELS[response_control].lower()} changes of {MIN_STEP_PCT}% or more logged yet")
+            else:
+                response_curves = pd.DataFrame({label: step_responses(response_grid, response_control, sensor).median()
+                                                for sensor, label in SENSOR_LABELS.items()})
+                response_curves.index.name = "Minutes after the change"
+                st.line_chart(response_curves)
+                st.caption(f"Median °F per +10% {CONTROL_LABELS[response_control].lower()} over "
+                           f"{len(response_steps)} changes, beyond the climb the kiln was already on. "
+                           f"Compare against the archive in the History tab.")
+                st.dataframe(response_table(lag_summary(response_grid), response_control), use_container_width=True)
+            
             # Weather correlation analysis
-            if 'weather_temp' in df.columns:
+            if df['weather_temp'].notna().any():
                 st.subheader("🌤️ Weather Impact Analysis")
-                weather_chart_data = df_chart[['weather_temp', 'weather_humidity', 'weather_wind']].copy()
+                weather_chart_data = df_chart[['weather_temp', 'weather_humidity', 'weather_wind']].astype(float)
                 weather_chart_data.columns = ['Outside Temp (°F)', 'Humidity (%)', 'Wind Speed (mph)']
                 st.line_chart(weather_chart_data)
                 
                 # Weather impact insights
                 weather_impacts = df['weather_impact'].value_counts()
+                weather_impacts = weather_impacts[weather_impacts > 0]
                 if len(weather_impacts) > 1:
                     st.bar_chart(weather_impacts)
             
@@ -814,9 +1287,19 @@ else:
                 wood_chart_data.columns = ['Total Wood Pieces Used']
                 st.line_chart(wood_chart_data)
             
+            # Phase segments, maintained by the store as entries come in
+            st.subheader("🧭 Phase Segments")
+            segments_df = pd.DataFrame(get_store().phase_segments(kiln_name, firing_id))
+            if not segments_df.empty:
+                segments_df = segments_df.drop(columns=['seq', 'atmosphere_counts'])
+                segments_df.columns = ['Phase', 'Start', 'End', 'Hours', 'Start °F', 'End °F', '°F Gained',
+                                       'Wood Pieces', 'Entries', 'Main Atmosphere']
+                st.dataframe(segments_df, use_container_width=True, hide_index=True)
+            
             # Atmosphere distribution
             st.subheader("🔥 Atmosphere Distribution")
             atmosphere_counts = df['atmosphere'].value_counts()
+            atmosphere_counts = atmosphere_counts[atmosphere_counts > 0]
             st.bar_chart(atmosphere_counts)
             
             # Enhanced statistics with weather
@@ -829,13 +1312,14 @@ else:
                 max_temp = df[['temp_front', 'temp_middle', 'temp_back']].max().max()
                 st.metric("Peak Temperature", f"{max_temp:.0f}°F")
             with stats_col3:
-                if 'weather_wind' in df.columns:
-                    avg_wind = df['weather_wind'].mean()
+                if df['weather_wind'].notna().any():
+                    avg_wind = df['weather_wind'].astype(float).mean()
                     st.metric("Avg Wind Speed", f"{avg_wind:.1f} mph")
                 else:
-                    temp_range = df[['temp_front', 'temp_middle', 'temp_back']].max() - df[['temp_front', 'temp_middle', 'temp_back']].min()
-                    avg_variance = temp_range.mean()
-                    st.metric("Avg Temp Variance", f"{avg_variance:.0f}°F")
+                    # Spread across the spy holes at each reading, not each hole's range over the firing
+                    spy_temps = df[['temp_front', 'temp_middle', 'temp_back']]
+                    avg_spread = (spy_temps.max(axis=1) - spy_temps.min(axis=1)).mean()
+                    st.metric("Avg Spy Spread", f"{avg_spread:.0f}°F")
             with stats_col4:
                 total_entries = len(df)
                 avg_interval = duration * 60 / max(total_entries - 1, 1)  # minutes between entries
@@ -886,6 +1370,40 @@ else:
                 st.session_state.timer_end = None
         else:
             st.info(f"⏸️ Timer idle - Suggested interval for {phase} phase: {default_interval} minutes")
+        
+        # Kiln master's own alarms - they notify every connected session, nothing more
+        st.subheader("🚨 Kiln Alarms")
+        st.caption(f"Checked on every new log entry for {kiln_name} and shown to everyone logged in")
+        alarm_col1, alarm_col2, alarm_col3, alarm_col4 = st.columns(4)
+        with alarm_col1:
+            alarm_kind = st.selectbox("Alarm", list(ALARM_KINDS),
+                                      format_func=lambda k: ALARM_KINDS[k].split(" {")[0])
+        with alarm_col2:
+            alarm_threshold = st.number_input(
+                "°F/hr" if alarm_kind == "climb_below" else "°F", value=1800 if alarm_kind == "stack_above" else 100,
+                step=25, disabled=alarm_kind == "no_stoke")
+        with alarm_col3:
+            alarm_minutes = st.number_input("Minutes", min_value=0, value=20, step=5,
+                                            disabled=alarm_kind not in ("climb_below", "no_stoke"))
+        with alarm_col4:
+            if st.button("➕ Add Alarm"):
+                get_store().add_alarm(kiln_name, alarm_kind,
+                                      None if alarm_kind == "no_stoke" else alarm_threshold,
+                                      alarm_minutes if alarm_kind in ("climb_below", "no_stoke") else None,
+                                      active_user)
+                st.rerun()
+        
+        active_alarms = get_alarm_monitor().active(kiln_name, firing_id)
+        for alarm in get_store().alarms(kiln_name):
+            alarm_col1, alarm_col2 = st.columns([5, 1])
+            with alarm_col1:
+                status = "🔴 FIRING" if alarm["id"] in active_alarms else "🟢 armed"
+                st.write(f"{status} · {describe(alarm)} · set by {alarm['created_by']}")
+            with alarm_col2:
+                if st.button("🗑️", key=f"delete_alarm_{alarm['id']}", help="Remove alarm"):
+                    get_store().delete_alarm(alarm["id"])
+                    get_alarm_monitor().forget(alarm["id"])
+                    st.rerun()
 
     # Visual Kiln Map for Cone Tracking with Edit/Clear functionality
     with cones_tab:
@@ -901,6 +1419,14 @@ else:
         with cone_col3:
             st.write(f"**Updating as:** {active_user}")
         
+        def record_cone_events(events):
+            # Saved with the firing, each with the heat-work at its position, for comparing firings later
+            st.session_state.cone_events.extend(events)
+            st.session_state.cone_events = get_heatwork().cone_events(kiln_name, firing_id, st.session_state.cone_events)
+            save_firing_state(kiln_name, firing_id, "cone_events")
+        
+        heatwork_now = get_heatwork().at(kiln_name, firing_id)
+        
         # Visual kiln grid (6 rows x 8 columns)
         st.subheader("Kiln Interior View (Front to Back)")
         
@@ -930,12 +1456,16 @@ else:
                         display_text = "Empty"
                     
                     # Main button for this position
-                    if st.button(f"R{row+1}C{col+1}", key=f"pos_{row}_{col}", help=display_text):
+                    if st.button(f"R{row+1}C{col+1}", key=f"pos_{row}_{col}",
+                                 help=f"{display_text}\n\nHeat-work: {heatwork_now['cells'][row][col]:,.0f} °F·h"):
                         # Update the position
                         if position_key not in st.session_state.cone_status:
                             st.session_state.cone_status[position_key] = {"cones": {}, "last_updated": None}
                         
                         st.session_state.cone_status[position_key]["cones"][selected_cone] = cone_status
+                        record_cone_events([{
+                            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "row": row, "col": col,
+                            "cone_number": selected_cone, "status": cone_status, "by": active_user}])
                         st.session_state.cone_status[position_key]["last_updated"] = f"{datetime.now().strftime('%H:%M')} by {active_user}"
                         st.success(f"Updated R{row+1}C{col+1}: Cone {selected_cone} = {cone_status}")
                         st.rerun()
@@ -949,6 +1479,10 @@ else:
                                 st.rerun()
                         with edit_clear_col2:
                             if st.button("🗑️", key=f"clear_pos_{row}_{col}", help="Clear this position"):
+                                record_cone_events([{
+                                    "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "row": row, "col": col,
+                                    "cone_number": cone_num, "status": "removed", "by": active_user}
+                                    for cone_num in position_data["cones"]])
                                 st.session_state.cone_status[position_key] = {"cones": {}, "last_updated": None}
                                 st.success(f"Cleared R{row+1}C{col+1}")
                                 st.rerun()
@@ -957,6 +1491,81 @@ else:
                     if position_data["cones"]:
                         st.caption(display_text.replace('\n', ' | '))
         
+        # Estimated temperature at each grid position, scrubbable through the firing
+        st.subheader("🌡️ Estimated Temperature Overlay")
+        field_df = entries_frame(st.session_state.log) if st.session_state.log else pd.DataFrame()
+        if field_df.empty or not field_df[list(sensor_positions(field_df.columns))].notna().any().any():
+            st.info("Log spy-hole temperatures to see the estimated temperature across the cone map.")
+        else:
+            field_times, field = temperature_field(field_df)
+            log_times = sorted(field_df['time'].dropna().unique())
+            scrub_time = st.select_slider("Firing time", options=log_times, value=log_times[-1])
+            grid = field_at(field_times, field, to_epoch(scrub_time))[0]
+            cones_then = cones_as_of(st.session_state.cone_events, scrub_time)
+            
+            cells = []
+            for row in range(GRID_ROWS):
+                for col in range(GRID_COLS):
+                    cones_here = cones_then.get((row, col), {})
+                    cells.append({
+                        "row": f"R{row+1}", "col": f"C{col+1}", "temp": grid[row, col],
+                        "label": f"{grid[row, col]:.0f}°" + "".join(f"\n{c}: {s}" for c, s in cones_here.items()),
+                        "cones": ", ".join(f"{c}: {s}" for c, s in cones_here.items()) or "none",
+                    })
+            cells = pd.DataFrame(cells)
+            heat = alt.Chart(cells).mark_rect().encode(
+                x=alt.X("col:O", title="Front → Back", sort=None),
+                y=alt.Y("row:O", title=None, sort=None),
+                color=alt.Color("temp:Q", title="°F", scale=alt.Scale(scheme="inferno")),
+                tooltip=["row", "col", alt.Tooltip("temp:Q", format=".0f"), "cones"])
+            labels = heat.mark_text(lineBreak="\n", fontSize=11).encode(
+                text="label:N", color=alt.value("white"))
+            st.altair_chart(heat + labels, use_container_width=True)
+            st.caption(f"Estimated from {', '.join(sensor_positions(field_df.columns))} by inverse-distance "
+                       f"weighting; cones as recorded by {scrub_time}")
+            
+            cone_temps = cone_event_temperatures(st.session_state.cone_events, field_times, field)
+            if not cone_temps.empty:
+                cone_temps["heatwork"] = [event["heatwork"] for event in get_heatwork().cone_events(
+                    kiln_name, firing_id, st.session_state.cone_events)]
+                st.write("**Cone changes vs. estimated local temperature and heat-work (°F·h):**")
+                st.dataframe(cone_temps.round({"est_temp": 0, "heatwork": 0}), use_container_width=True)
+        
+        # Time at temperature, kept up to date as readings arrive
+        st.subheader("🔥 Heat-Work")
+        if not heatwork_now["sensors"]:
+            st.info("Heat-work accumulates as temperatures are logged.")
+        else:
+            sensor_cols = st.columns(len(heatwork_now["sensors"]))
+            for sensor_col, (sensor, total) in zip(sensor_cols, heatwork_now["sensors"].items()):
+                sensor_col.metric(sensor.replace("temp_", "").title(), f"{total:,.0f} °F·h")
+            
+            cells = pd.DataFrame([{
+                "row": f"R{row+1}", "col": f"C{col+1}", "heatwork": heatwork_now["cells"][row][col],
+                "label": f"{heatwork_now['cells'][row][col]:,.0f}" + "".join(
+                    f"\n{c}: {s}" for c, s in st.session_state.cone_status.get(f"{row}_{col}", {"cones": {}})["cones"].items()),
+            } for row in range(GRID_ROWS) for col in range(GRID_COLS)])
+            heat = alt.Chart(cells).mark_rect().encode(
+                x=alt.X("col:O", title="Front → Back", sort=None),
+                y=alt.Y("row:O", title=None, sort=None),
+                color=alt.Color("heatwork:Q", title="°F·h", scale=alt.Scale(scheme="inferno")),
+                tooltip=["row", "col", alt.Tooltip("heatwork:Q", format=",.0f")])
+            labels = heat.mark_text(lineBreak="\n", fontSize=11).encode(
+                text="label:N", color=alt.value("white"))
+            st.altair_chart(heat + labels, use_container_width=True)
+            st.caption(f"Degree-hours above {HEATWORK_BASE_F}°F as of {heatwork_now['time']}, "
+                       "with current cone status")
+        
+        # Heat-work at which cones went down, this firing against the archive
+        cone_downs = cone_heatwork(get_store(), [(f["kiln"], f["firing_id"]) for f in historical_catalog
+                                                 if (f["kiln"], f["firing_id"]) != (kiln_name, firing_id)]
+                                   + [(kiln_name, firing_id)])
+        if cone_downs:
+            st.write("**Heat-work when cones went down (°F·h, median across positions):**")
+            cone_downs = pd.DataFrame(cone_downs)
+            st.dataframe(cone_downs.pivot_table(index="cone_number", columns="firing_id", values="heatwork",
+                                                aggfunc="median").round(0), use_container_width=True)
+        
         # Edit forms for cone positions
         for position_key, data in st.session_state.cone_status.items():
             if st.session_state.get(f"editing_cone_{position_key}", False):
@@ -1006,6 +1615,13 @@ else:
                                 updated_cones[new_cone_num] = new_cone_status
                             
                             # Save to session state
+                            edit_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                            record_cone_events([{
+                                "time": edit_time, "row": int(row), "col": int(col),
+                                "cone_number": cone_num, "status": updated_cones.get(cone_num, "removed"),
+                                "by": active_user}
+                                for cone_num in set(data["cones"]) | set(updated_cones)
+                                if data["cones"].get(cone_num) != updated_cones.get(cone_num, "removed")])
                             st.session_state.cone_status[position_key]["cones"] = updated_cones
                             st.session_state.cone_status[position_key]["last_updated"] = f"{datetime.now().strftime('%H:%M')} by {active_user} (edited)"
                             
@@ -1026,6 +1642,11 @@ else:
         with bulk_col1:
             if st.button("🗑️ Clear All Cone Data", type="secondary"):
                 if st.button("⚠️ Confirm Clear All", type="secondary"):
+                    clear_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    record_cone_events([{
+                        "time": clear_time, "row": int(key.split("_")[0]), "col": int(key.split("_")[1]),
+                        "cone_number": cone_num, "status": "removed", "by": active_user}
+                        for key, data in st.session_state.cone_status.items() for cone_num in data["cones"]])
                     for position_key in st.session_state.cone_status:
                         st.session_state.cone_status[position_key] = {"cones": {}, "last_updated": None}
                     st.success("All cone data cleared!")
@@ -1095,30 +1716,35 @@ else:
         st.subheader("👥 Crew Management & Collaboration")
         
         # Add crew member
-        crew_col1, crew_col2, crew_col3, crew_col4 = st.columns(4)
+        crew_col1, crew_col2, crew_col3, crew_col4, crew_col5 = st.columns(5)
         with crew_col1:
             crew_name = st.text_input("Name")
         with crew_col2:
             crew_role = st.selectbox("Role", 
                                    ["kiln_master", "lead_stoker", "stoker", "spotter", "wood_prep", "door_tender", "floater", "observer", "student"])
         with crew_col3:
-            shift_start = st.time_input("Shift Start")
+            shift_day = st.date_input("Shift Date")
         with crew_col4:
-            shift_end = st.time_input("Shift End", value=datetime.now().time())
+            shift_start = st.time_input("Shift Start")
+        with crew_col5:
+            shift_end = st.time_input("Shift End", value=(datetime.now() + timedelta(hours=4)).time(),
+                                      help="An end at or before the start is the next morning (overnight shift)")
         
         crew_notes = st.text_input("Crew Notes", placeholder="Experience level, special instructions, contact info")
         
         if st.button("Add Crew Member") and crew_name:
+            shift_start, shift_end = shift_times(shift_day, shift_start, shift_end)
             crew_entry = {
                 "name": crew_name,
                 "role": crew_role, 
-                "shift_start": str(shift_start),
-                "shift_end": str(shift_end),
+                "shift_start": shift_start,
+                "shift_end": shift_end,
                 "notes": crew_notes,
                 "added_by": active_user,
                 "date": datetime.now().strftime("%Y-%m-%d")
             }
             st.session_state.crew.append(crew_entry)
+            save_firing_state(kiln_name, firing_id, "crew")
             st.success(f"✅ Added {crew_name} as {crew_role}")
         
         # Current crew display
@@ -1141,7 +1767,7 @@ else:
                         st.write(f"{icon} **{member['name']}**")
                         st.write(f"*{member['role'].replace('_', ' ').title()}*")
                     with member_col2:
-                        st.write(f"**Shift:** {member['shift_start']} - {member['shift_end']}")
+                        st.write(f"**Shift:** {shift_label(member)}")
                         st.write(f"*Added by: {member.get('added_by', 'Unknown')}*")
                     with member_col3:
                         if member.get('notes'):
@@ -1158,6 +1784,7 @@ else:
                         if crew_index is not None:
                             if st.button("🗑️", key=f"remove_crew_{idx}", help="Remove crew member"):
                                 st.session_state.crew.pop(crew_index)
+                                save_firing_state(kiln_name, firing_id, "crew")
                                 st.success(f"Removed {member['name']}")
                                 st.rerun()
                     st.divider()
@@ -1165,11 +1792,48 @@ else:
             # Crew activity summary
             if st.session_state.log:
                 st.subheader("📊 Crew Activity Summary")
-                log_df = pd.DataFrame(st.session_state.log)
+                log_df = entries_frame(st.session_state.log)
                 activity_summary = log_df['logged_by'].value_counts()
                 
                 for person, count in activity_summary.items():
                     st.write(f"**{person}:** {count} log entries")
+            
+            shifts = ShiftIndex(st.session_state.crew)
+            if len(shifts):
+                st.subheader("🕐 Shifts")
+                if st.session_state.log:
+                    per_shift = shifts.entries_per_shift(log_df)
+                    st.dataframe(per_shift.rename(columns={
+                        "entries_logged": "logged by them", "entries_in_shift": "all entries in shift"}),
+                        use_container_width=True, hide_index=True)
+                
+                duty_col1, duty_col2 = st.columns(2)
+                with duty_col1:
+                    duty_day = st.date_input("On duty on", key="duty_day")
+                with duty_col2:
+                    duty_time = st.time_input("at", key="duty_time")
+                on_duty = shifts.on_duty(datetime.combine(duty_day, duty_time))
+                if on_duty.empty:
+                    st.warning("⚠️ Nobody on shift then")
+                else:
+                    st.write(", ".join(f"**{m['name']}** ({m['role'].replace('_', ' ')})" for _, m in on_duty.iterrows()))
+                
+                # The hours nobody volunteers for, across every day of the firing
+                gap_col1, gap_col2 = st.columns(2)
+                with gap_col1:
+                    gap_from = st.time_input("Coverage window from", value=datetime.strptime("02:00", "%H:%M").time())
+                with gap_col2:
+                    gap_to = st.time_input("to", value=datetime.strptime("05:00", "%H:%M").time())
+                span = [entry.time for entry in st.session_state.log if entry.time]
+                span += list(shifts.shifts["shift_start"]) + list(shifts.shifts["shift_end"])
+                gaps = shifts.window_gaps(min(span), max(span), gap_from, gap_to)
+                if gaps.empty:
+                    st.success(f"✅ {gap_from:%H:%M}-{gap_to:%H:%M} covered on every day of the firing")
+                else:
+                    st.warning(f"⚠️ {len(gaps)} uncovered stretch(es), {gaps['minutes'].sum() / 60:.1f} hrs in total")
+                    st.dataframe(gaps.assign(start=gaps["start"].dt.strftime("%a %m-%d %H:%M"),
+                                             end=gaps["end"].dt.strftime("%a %m-%d %H:%M")),
+                                 use_container_width=True, hide_index=True)
 
     # Enhanced Export with weather and safety data
     with export_tab:
@@ -1177,7 +1841,7 @@ else:
         
         if st.session_state.log:
             # Complete firing package
-            log_df = pd.DataFrame(st.session_state.log)
+            log_df = join_weather(entries_frame(st.session_state.log), get_store())
             wood_df = pd.DataFrame(st.session_state.wood_log) if st.session_state.wood_log else pd.DataFrame()
             crew_df = pd.DataFrame(st.session_state.crew) if st.session_state.crew else pd.DataFrame()
             
@@ -1235,28 +1899,14 @@ else:
             with export_col5:
                 # Save current firing to historical database
                 if st.button("💾 Save to Historical Database"):
-                    historical_firing = {
-                        "firing_id": firing_id,
-                        "kiln": kiln_name,
-                        "date_completed": datetime.now().strftime("%Y-%m-%d"),
-                        "log_data": log_df.to_dict('records')
-                    }
-                    st.session_state.historical_firings.append(historical_firing)
+                    # Crew, cone changes and safety are already saved with it; the cone map as it ends up
+                    get_store().set_attachment(kiln_name, firing_id, "cones", cone_rows(st.session_state.cone_status))
+                    get_store().archive_firing(kiln_name, firing_id)
                     st.success(f"✅ {firing_id} saved to historical database!")
             
             # Cone status export
             if any(pos_data["cones"] for pos_data in st.session_state.cone_status.values()):
-                cone_export_data = []
-                for position, data in st.session_state.cone_status.items():
-                    if data["cones"]:
-                        row, col = position.split("_")
-                        for cone_num, status in data["cones"].items():
-                            cone_export_data.append({
-                                "position": f"R{int(row)+1}C{int(col)+1}",
-                                "cone_number": cone_num,
-                                "status": status,
-                                "last_updated": data["last_updated"]
-                            })
+                cone_export_data = cone_rows(st.session_state.cone_status)
                 
                 if cone_export_data:
                     cone_df = pd.DataFrame(cone_export_data)
@@ -1267,6 +1917,66 @@ else:
                         "text/csv"
                     )
             
+            # Weather series over the firing, as sampled (not just at entry times)
+            log_times = pd.to_datetime(log_df['time'])
+            weather_df = weather_frame(get_store(),
+                                       log_times.min().timestamp() - WEATHER_CADENCE_MINUTES * 60,
+                                       log_times.max().timestamp() + WEATHER_CADENCE_MINUTES * 60)
+            if not weather_df.empty:
+                st.download_button(
+                    "🌤️ Weather Series",
+                    weather_df.drop(columns=['t']).to_csv(index=False).encode('utf-8'),
+                    f"{kiln_name}_{firing_id}_weather.csv",
+                    "text/csv"
+                )
+            
+            # Everything above in one file that can be re-imported on another machine
+            st.write("**📦 Firing Bundle** - log, wood, crew, cone map and changes, safety, weather and summary in one checksummed file")
+            bundle_key = st.session_state.log_version
+            if st.button("📦 Build Firing Bundle"):
+                # Streamed to disk rather than built in memory, in a file of this session's own
+                with tempfile.NamedTemporaryFile(prefix="woodfirepro_", suffix=".zip", delete=False) as bundle_file:
+                    write_bundle(get_store(), bundle_file, kiln_name, firing_id, crew=st.session_state.crew,
+                                 cones=cone_rows(st.session_state.cone_status),
+                                 safety=st.session_state.safety_checklist)
+                if "bundle" in st.session_state and os.path.exists(st.session_state.bundle[1]):
+                    os.remove(st.session_state.bundle[1])
+                st.session_state.bundle = (bundle_key, bundle_file.name)
+            if st.session_state.get("bundle", (None,))[0] == bundle_key:
+                with open(st.session_state.bundle[1], "rb") as bundle_file:
+                    st.download_button(
+                        "📥 Download Firing Bundle",
+                        bundle_file,
+                        re.sub(r"[^\w.-]+", "_", f"{kiln_name}_{firing_id}") + "_bundle.zip",
+                        "application/zip"
+                    )
+            
+            # Rendered in the background; sections whose data hasn't changed are reused
+            st.write("**📄 Firing Report** - temperature, control and wood charts, phases, cone map, crew, "
+                     "incidents and weather in one HTML file")
+            def firing_report():
+                builder = get_report_builder()
+                if st.button("📄 Build Firing Report"):
+                    builder.request(kiln_name, firing_id, crew=st.session_state.crew,
+                                    cones=cone_rows(st.session_state.cone_status))
+                    st.rerun()  # so this section starts polling for the result
+                building = builder.building(kiln_name, firing_id)
+                if st.session_state.get("report_polling") and not building:
+                    st.session_state.report_polling = False
+                    st.rerun()  # done: stop polling
+                report = builder.report(kiln_name, firing_id)
+                if building:
+                    st.caption("⏳ Building the report in the background...")
+                if report and report["error"]:
+                    st.error(f"Report failed: {report['error']}")
+                if report and report["html"]:
+                    st.download_button("📥 Download Firing Report", report["html"],
+                                       f"{kiln_name}_{firing_id}_report.html", "text/html")
+                    st.caption(f"Built {report['built_at']} in {report['seconds']:.1f}s · "
+                               f"{len(report['rendered'])} section(s) rendered, {len(report['reused'])} reused")
+            st.session_state.report_polling = get_report_builder().building(kiln_name, firing_id)
+            st.fragment(run_every=2 if st.session_state.report_polling else None)(firing_report)()
+            
             # Master summary export with weather data
             st.subheader("📋 Enhanced Firing Summary")
             summary_data = {
@@ -1301,6 +2011,19 @@ else:
             
         else:
             st.info("🔍 No firing data to export yet. Start logging to enable exports!")
+        
+        # Dashboards and scripts read the same data over HTTP
+        st.subheader("🔌 Read-only API")
+        if ingest_server:
+            st.write(f"Base URL: `{ingest_url(ingest_server)}/api/` - e.g. `/api/fleet`, `/api/firings`, "
+                     f"`/api/firings/<kiln>/<firing_id>/entries`")
+            if ingest_server.token:
+                st.write(f"Token: `{ingest_server.token}` - send it as `Authorization: Bearer <token>` or `?token=`")
+            else:
+                st.caption("Only reachable from this computer, so no token is needed; start the app with "
+                           "WOODFIREPRO_INGEST_HOST=0.0.0.0 to open it to the shop network.")
+        else:
+            st.caption("The API port is taken (a standalone `python woodfire_api.py` may be serving it).")
 
     # About & Help Section
     with about_tab:
@@ -1389,7 +2112,7 @@ else:
             - **Single-screen Entry**: All essential data in one form
             - **Voice-to-Text**: Use speech input for hands-free logging
             - **Quick Actions**: Streamlined interface for rapid entry
-            - **Weather Auto-include**: Automatically capture weather conditions
+            - **Weather Auto-include**: Conditions are sampled in the background and matched to every entry
             
             **Mobile Best Practices:**
             - Enable mobile mode when actively firing